@@ -1,16 +1,33 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 from models.stock_model import StockPricePredictor
+from models.global_model import GlobalStockPredictor
 from models.trading_strategy import TradingStrategy
+from models.portfolio_backtest import PortfolioBacktester
+from models.screener import screen_signals, SCREEN_FILTERS
+from models.payloads import parse_prices
+from models.ingest import CSVIngestor
+from models.prediction_cache import PredictionCache, window_key
+from models.live_store import LiveBarStore
+from models.streaming import EventBroadcaster, format_sse
+from models.shared_arrays import SharedArrayPublisher, SharedArrayReader
+from models.feature_store import FeatureStore, MODEL_FEATURES
+from models.schema import restore_prices, memory_report, log_memory_report
+from concurrent.futures import ThreadPoolExecutor
+from models.instrumentation import metrics
 import os
 import logging
+import threading
+import time
 from datetime import datetime
 import shutil
 from train import prepare_training_data as prepare_training_data
 from train import evaluate_model as evaluate_model
+from train import promote_quantized_model
 
 # Set up logging
 logging.basicConfig(
@@ -23,7 +40,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records serialization time as a pipeline stage"""
+    def response(self, *args, **kwargs):
+        with metrics.stage('json_serialization'):
+            return super().response(*args, **kwargs)
+
 app = Flask(__name__)
+app.json = InstrumentedJSONProvider(app)
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:5173"],
@@ -32,60 +56,125 @@ CORS(app, resources={
     }
 })
 
-# Load the trained model
-try:
-    logger.info("Loading model...")
-    model = StockPricePredictor()
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(current_dir, 'models', 'saved_models', 'stock_model.h5')
-    scaler_path = os.path.join(current_dir, 'models', 'saved_models', 'scaler.pkl')
+current_dir = os.path.dirname(os.path.abspath(__file__))
+model_path = os.path.join(current_dir, 'models', 'saved_models', 'stock_model.h5')
+scaler_path = os.path.join(current_dir, 'models', 'saved_models', 'scaler.pkl')
+# Kept outside saved_models, which /api/retrain clears
+checkpoint_dir = os.path.join(current_dir, 'models', 'checkpoints')
+# MODEL_VARIANT=quantized serves the promoted TFLite variant when it matches the saved model
+model_variant = os.environ.get('MODEL_VARIANT', 'float')
+# MODEL_TYPE=global serves every symbol from the cross-symbol model that
+# train_global.py writes to GLOBAL_MODEL_DIR
+model_type = os.environ.get('MODEL_TYPE', 'symbol')
+global_model_dir = os.environ.get('GLOBAL_MODEL_DIR', os.path.join(current_dir, 'models', 'global'))
+model = StockPricePredictor()
+
+# Repeated requests for the same window are answered from memory until the
+# TTL passes or another model version is swapped in
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_ENTRIES', 1024)),
+    max_bytes=int(float(os.environ.get('PREDICTION_CACHE_MB', 16)) * 1024 * 1024),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+)
+
+# Each Monte Carlo sample adds a full input window to the forecast batch
+max_mc_samples = int(os.environ.get('MAX_MC_SAMPLES', 1000))
+
+def cached_next_day(predictor, df, features=None, symbol=None):
+    if isinstance(predictor, GlobalStockPredictor):
+        # Without a symbol the request is for the served data file's symbol
+        symbol = str(symbol or data_symbol(resolve_data_path())).upper()
+        key = window_key('next_day', df, symbol=symbol)
+        return prediction_cache.get_or_compute(predictor.model_version, key,
+                                               lambda: predictor.predict_next_day(df, symbol=symbol))
+    key = window_key('next_day', df, features)
+    return prediction_cache.get_or_compute(predictor.model_version, key,
+                                           lambda: predictor.predict_next_day(df, features))
+
+def cached_weekly(predictor, df, n_samples=None, features=None):
+    n_samples = predictor.mc_samples if n_samples is None else int(n_samples)
+    key = window_key('weekly', df, features, n_samples=n_samples)
+    return prediction_cache.get_or_compute(predictor.model_version, key,
+                                           lambda: predictor.predict_weekly(df, n_samples=n_samples,
+                                                                            features=features))
+
+def serving_model_paths():
+    """Model and scaler files of the configured MODEL_TYPE"""
+    if model_type == 'global':
+        return os.path.join(global_model_dir, 'stock_model.h5'), os.path.join(global_model_dir, 'scaler.pkl')
+    return model_path, scaler_path
+
+def load_trained_model():
+    """Load the trained model and scaler into the global predictor"""
+    global model
+    try:
+        logger.info("Loading model...")
+        predictor = GlobalStockPredictor() if model_type == 'global' else StockPricePredictor()
+        served_model_path, served_scaler_path = serving_model_paths()
+        
+        if not os.path.exists(served_model_path) or not os.path.exists(served_scaler_path):
+            logger.warning("Model files not found. Some functionality may be limited.")
+        else:
+            predictor.load_model(served_model_path, served_scaler_path, variant=model_variant,
+                                 num_threads=int(os.environ.get('TF_INTRA_OP_THREADS', 0)) or None)
+            logger.info("Model loaded successfully!")
+        model = predictor
+    except Exception as e:
+        logger.error(f"Error loading model: {str(e)}")
+    return model
+
+# The production server (serve.py) defers loading to each worker process
+if os.environ.get('STOCK_APP_DEFER_MODEL_LOAD') != '1':
+    load_trained_model()
+
+def resolve_data_path():
+    """Locate the stock data export on disk (STOCK_DATA_PATH overrides the default export)"""
+    override = os.environ.get('STOCK_DATA_PATH')
+    if override:
+        if not os.path.exists(override):
+            raise FileNotFoundError(f"STOCK_DATA_PATH points to a missing file: {override}")
+        return override
+
+    # Define possible file paths
+    possible_paths = [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 
+                    'nepsealpha_export_price_UNL_20200103_20250103.csv'),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 
+                    'nepsealpha_export_price_UNL_2020-01-03_2025-01-03.csv')
+    ]
     
-    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-        logger.warning("Model files not found. Some functionality may be limited.")
-    else:
-        model.load_model(model_path, scaler_path)
-        logger.info("Model loaded successfully!")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
+    # Try each possible path
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+            
+    raise FileNotFoundError(f"Data file not found in any of the expected locations: {possible_paths}")
 
-def load_stock_data():
-    """Helper function to load and process stock data"""
+def load_stock_data(data_path=None, report_memory=False):
+    """Helper function to load and process stock data in the compact schema"""
     try:
-        # Define possible file paths
-        possible_paths = [
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 
-                        'nepsealpha_export_price_UNL_20200103_20250103.csv'),
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 
-                        'nepsealpha_export_price_UNL_2020-01-03_2025-01-03.csv')
-        ]
-        
-        # Try each possible path
-        data_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                data_path = path
-                break
-                
         if data_path is None:
-            raise FileNotFoundError(f"Data file not found in any of the expected locations: {possible_paths}")
+            data_path = resolve_data_path()
         
         logger.info(f"Loading data from: {data_path}")
         
-        # Read and process data
-        df = pd.read_csv(data_path)
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Clean numeric data
-        numeric_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
-        
-        # Handle missing values
-        df = df.fillna(method='ffill').fillna(method='bfill')
-        
-        # Sort by date in descending order
-        df = df.sort_values('Date', ascending=False)
+        with metrics.stage('data_load'):
+            # Chunked read straight into float32 prices, integer volume and
+            # categorical symbols; thousands separators and dates parse in the C engine
+            df, report = CSVIngestor(measure_memory=report_memory).load(data_path)
+            if report.rejected_rows or report.duplicate_dates:
+                logger.warning(f"Dropped {report.rejected_rows} invalid row(s) and "
+                               f"{report.duplicate_dates} duplicate date(s) from {data_path}")
+            
+            # Handle missing values; each pass copies the frame, so only when needed
+            if df.isna().to_numpy().any():
+                df = df.ffill().bfill()
+            if report_memory:
+                log_memory_report(report.memory_before, memory_report(df))
+            
+            # Sort by date in descending order, which exports usually already are
+            if not df['Date'].is_monotonic_decreasing:
+                df = df.sort_values('Date', ascending=False)
         
         return df
         
@@ -94,6 +183,39 @@ def load_stock_data():
         logger.error("Stack trace:", exc_info=True)
         raise
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.request_sampled = metrics.start_sample()
+    # PROFILE_ALLOCATIONS=1 traces the peak allocation of every request and stage
+    g.allocation_profile = metrics.start_allocation_profile()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('requests_total', endpoint=endpoint, method=request.method,
+                status=str(response.status_code))
+    if g.get('request_sampled'):
+        metrics.observe('request_latency_seconds', time.perf_counter() - g.request_start,
+                        endpoint=endpoint, method=request.method)
+    return response
+
+@app.teardown_request
+def end_request_sample(exc):
+    metrics.end_sample()
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    profile = metrics.end_allocation_profile(g.pop('allocation_profile', None), endpoint=endpoint)
+    if profile is not None:
+        peak, stages = profile
+        breakdown = ', '.join(f"{stage} {size / 2**20:.2f}" for stage, size in stages.items())
+        logger.info(f"Peak allocation for {request.method} {endpoint}: {peak / 2**20:.2f} MiB"
+                    + (f" (stages, MiB: {breakdown})" if breakdown else ""))
+
+@app.route('/metrics', methods=['GET'])
+def get_service_metrics():
+    """Expose service metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/historical', methods=['GET'])
 def get_historical_data():
     try:
@@ -103,7 +225,7 @@ def get_historical_data():
         analysis = model.analyze_trends(df)
         
         # Prepare response data
-        historical_data = df[['Date', 'Close', 'High', 'Low', 'Volume']].to_dict('records')
+        historical_data = restore_prices(df[['Date', 'Close', 'High', 'Low', 'Volume']]).to_dict('records')
         
         return jsonify({
             'data': historical_data,
@@ -129,8 +251,11 @@ def predict():
                 'status': 'error'
             }), 400
 
-        df = pd.DataFrame(data['prices'])
-        prediction = model.predict_next_day(df)
+        # Records or one array per field, validated into typed columns
+        with metrics.stage('request_parse'):
+            df = parse_prices(data['prices'])
+        # With a symbol, indicators come from the feature store when it has every date
+        prediction = cached_next_day(model, df, stored_features(data.get('symbol'), df), data.get('symbol'))
         analysis = model.analyze_trends(df)
         
         return jsonify({
@@ -157,21 +282,20 @@ def predict_weekly():
                 'status': 'error'
             }), 400
 
-        df = pd.DataFrame(data['prices'])
-        
-        # Convert data types
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-        # Handle required columns
-        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = df['Close']
-        
-        df['Volume'] = pd.to_numeric(df['Volume'].astype(str).str.replace(',', ''), errors='coerce')
+        n_samples = data.get('n_samples')
+        if n_samples is not None and not 1 <= int(n_samples) <= max_mc_samples:
+            return jsonify({
+                'error': f'n_samples must be between 1 and {max_mc_samples}',
+                'status': 'error'
+            }), 400
+
+        # Missing Open/High/Low/Volume fields are filled from Close
+        with metrics.stage('request_parse'):
+            df = parse_prices(data['prices'], fill_from_close=True)
         
-        predictions = model.predict_weekly(df)
+        # More Monte Carlo samples give tighter interval estimates at higher latency
+        predictions = cached_weekly(model, df, n_samples=n_samples,
+                                    features=stored_features(data.get('symbol'), df))
         analysis = model.analyze_trends(df)
         
         # Calculate prediction dates
@@ -201,8 +325,12 @@ def get_trading_signals():
     try:
         df = load_stock_data()
         
-        # Initialize trading strategy
-        strategy = TradingStrategy(df)
+        # Initialize trading strategy, reading indicators from the feature store if enabled
+        if feature_store is not None:
+            get_bar_store()
+            strategy = TradingStrategy(df, feature_store, data_symbol(resolve_data_path()))
+        else:
+            strategy = TradingStrategy(df)
         
         # Generate signals
         signals = strategy.generate_signals()
@@ -247,28 +375,126 @@ def get_temporal_analysis():
             'status': 'error'
         }), 400
 
+# In-memory bar store with range-query indexes and incremental indicators per symbol.
+# It is seeded from the data file and reseeded only when that file changes;
+# bars posted to /api/ingest are appended in memory.
+bar_store = LiveBarStore()
+bar_store_source = None
+bar_store_lock = threading.Lock()
+
+# With SHARED_ARRAYS_DIR set, the price and indicator arrays are published once
+# (by the serving master) as memory-mapped snapshots and workers attach read-only
+shared_arrays_dir = os.environ.get('SHARED_ARRAYS_DIR')
+shared_arrays = SharedArrayReader(shared_arrays_dir) if shared_arrays_dir else None
+
+# Ingested bars are only broadcast to the stream subscribers of the process
+# that received them, so streaming needs a single serving process (serve.py)
+serving_workers = int(os.environ.get('SERVING_WORKERS', 1))
+
+# With FEATURE_STORE_DIR set, indicators are computed once per new bar into an
+# on-disk store that training, predictions and the strategy read back
+feature_store_dir = os.environ.get('FEATURE_STORE_DIR')
+feature_store = FeatureStore(feature_store_dir) if feature_store_dir else None
+
+def data_symbol(data_path):
+    """Symbol encoded in an export file name (nepsealpha_export_price_<SYMBOL>_...)"""
+    return os.path.basename(data_path).split('_')[3]
+
+def sync_feature_store(store, symbols=None):
+    """Append bars of the live store that the feature store has not seen yet"""
+    if feature_store is None:
+        return
+    for symbol in symbols or store.symbols():
+        feature_store.update(symbol, store.frame(symbol))
+
+def stored_features(symbol, df):
+    """Stored model features aligned with the rows of `df`, or None to compute them from `df`"""
+    if feature_store is None or not symbol or 'Date' not in df.columns:
+        return None
+    try:
+        return feature_store.features_for(str(symbol).upper(), df['Date'], MODEL_FEATURES)
+    except KeyError:
+        return None
+
+def publish_shared_arrays():
+    """Load the data file and publish it as a new shared array snapshot"""
+    global bar_store_source
+    data_path = resolve_data_path()
+    with bar_store_lock:
+        staging = LiveBarStore()
+        staging.load_frame(load_stock_data(data_path, report_memory=True),
+                           default_symbol=data_symbol(data_path))
+        SharedArrayPublisher(shared_arrays_dir).publish(staging.export_arrays())
+        # Workers and ingest.py write to the feature store too; each symbol's
+        # writes are serialized by its lock file
+        sync_feature_store(staging)
+        bar_store_source = None
+    return get_bar_store()
+
+def get_bar_store():
+    """Return the live bar store, seeding it from the data file if that file changed"""
+    global bar_store_source
+    with bar_store_lock:
+        if shared_arrays is not None and bar_store_source != 'memory':
+            # Re-attach only when a new snapshot version has been published
+            changed = shared_arrays.refresh()
+            metrics.inc('cache_requests_total', cache='bar_store',
+                        result='miss' if changed or bar_store_source is None else 'hit')
+            if changed or bar_store_source is None:
+                bar_store.load_shared(shared_arrays)
+                bar_store_source = ('shared', shared_arrays.version)
+            return bar_store
+        
+        if bar_store_source == 'memory':
+            metrics.inc('cache_requests_total', cache='bar_store', result='hit')
+            return bar_store
+        
+        data_path = resolve_data_path()
+        source = (data_path, os.path.getmtime(data_path))
+        metrics.inc('cache_requests_total', cache='bar_store',
+                    result='hit' if source == bar_store_source else 'miss')
+        if source != bar_store_source:
+            bar_store.load_frame(load_stock_data(data_path, report_memory=True),
+                                 default_symbol=data_symbol(data_path))
+            sync_feature_store(bar_store)
+            bar_store_source = source
+        return bar_store
+
+def seed_bar_store(df, default_symbol=None):
+    """Seed the live bar store from a frame instead of the data file (e.g. for replays)"""
+    global bar_store_source
+    with bar_store_lock:
+        bar_store.load_frame(df, default_symbol=default_symbol)
+        sync_feature_store(bar_store)
+        bar_store_source = 'memory'
+    return bar_store
+
+def parse_list_arg(name):
+    """Read a query argument given either repeated or comma-separated"""
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(item.strip() for item in value.split(',') if item.strip())
+    return values
+
 @app.route('/api/metrics', methods=['GET'])
 def get_market_metrics():
     try:
-        df = load_stock_data()
+        windows = [int(window) for window in parse_list_arg('windows')]
+        if any(window < 1 for window in windows):
+            raise ValueError("Window lengths must be positive integers")
         
-        # Calculate metrics
-        current_price = float(df['Close'].iloc[0])
-        previous_price = float(df['Close'].iloc[1])
-        
-        metrics = {
-            'current_price': current_price,
-            'daily_change': float(current_price - previous_price),
-            'daily_change_percent': float((current_price - previous_price) / previous_price * 100),
-            'weekly_high': float(df.head(5)['High'].max()),
-            'weekly_low': float(df.head(5)['Low'].min()),
-            'monthly_high': float(df.head(20)['High'].max()),
-            'monthly_low': float(df.head(20)['Low'].min()),
-            'average_volume': float(df.head(20)['Volume'].mean())
-        }
+        store = get_bar_store()
+        symbols = [symbol.upper() for symbol in parse_list_arg('symbols')] or store.symbols()[:1]
+        unknown = [symbol for symbol in symbols if symbol not in store]
+        if unknown:
+            raise ValueError(f"Unknown symbols: {unknown}")
+        
+        # Calculate metrics in constant time per window
+        symbol_metrics = {symbol: store.metrics(symbol, windows) for symbol in symbols}
         
         return jsonify({
-            'metrics': metrics,
+            'metrics': symbol_metrics[symbols[0]],
+            'symbols': symbol_metrics,
             'status': 'success'
         })
     except Exception as e:
@@ -277,9 +503,285 @@ def get_market_metrics():
             'error': str(e),
             'status': 'error'
         }), 400
+@app.route('/api/trading/portfolio', methods=['GET'])
+def get_portfolio_backtest():
+    try:
+        store = get_bar_store()
+        symbols = [symbol.upper() for symbol in parse_list_arg('symbols')] or store.symbols()
+        unknown = [symbol for symbol in symbols if symbol not in store]
+        if unknown:
+            raise ValueError(f"Unknown symbols: {unknown}")
+        
+        # Run every symbol's signals against one shared cash account
+        backtester = PortfolioBacktester(
+            {symbol: store.frame(symbol) for symbol in symbols},
+            initial_capital=request.args.get('capital', 100000, type=float),
+            max_positions=request.args.get('max_positions', 10, type=int),
+            sizing=request.args.get('sizing', 'equal'),
+            position_fraction=request.args.get('position_fraction', 0.1, type=float),
+            transaction_cost_bps=request.args.get('cost_bps', 10.0, type=float)
+        )
+        
+        return jsonify({
+            'portfolio': backtester.run(),
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error(f"Error running portfolio backtest: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/api/screener', methods=['GET'])
+def get_screener():
+    try:
+        symbols, dates, prev, current = get_bar_store().latest_indicators()
+        wanted = [symbol.upper() for symbol in parse_list_arg('symbols')]
+        if wanted:
+            rows = np.isin(symbols, wanted)
+            symbols, dates, prev, current = symbols[rows], dates[rows], prev[rows], current[rows]
+        
+        # Score the latest bar of every symbol at once and keep the matches
+        matches = screen_signals(
+            symbols, dates, prev, current,
+            action=request.args.get('action', 'any'),
+            min_confidence=request.args.get('min_confidence', 0.5, type=float),
+            filters={name: request.args.get(name, type=float)
+                     for name in SCREEN_FILTERS if request.args.get(name) is not None},
+            limit=request.args.get('limit', type=int)
+        )
+        
+        return jsonify({
+            'matches': matches,
+            'screened': len(symbols),
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error(f"Error running screener: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+# Server-push updates: derived data is recomputed once per data change and
+# fanned out to subscribers, instead of once per client poll
+broadcaster = EventBroadcaster()
+refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream-refresh')
+pending_refreshes = set()
+pending_refreshes_lock = threading.Lock()
+
+# Bars of history used to refresh streamed predictions
+STREAM_PREDICTION_HISTORY = 250
+
+def publish_bar_update(symbol, snapshots):
+    """Push new bars and signals, then schedule a metrics/prediction refresh"""
+    if not broadcaster.has_subscribers(symbol):
+        return
+    broadcaster.publish(symbol, 'bar', snapshots[-1])
+    for snapshot in snapshots:
+        if snapshot['signal']:
+            broadcaster.publish(symbol, 'signal', snapshot['signal'])
+    
+    # Coalesce refreshes requested while one for the symbol is still queued
+    with pending_refreshes_lock:
+        if symbol in pending_refreshes:
+            return
+        pending_refreshes.add(symbol)
+    refresh_executor.submit(refresh_derived_data, symbol)
+
+def refresh_derived_data(symbol):
+    """Recompute metrics and predictions for a symbol and publish them"""
+    with pending_refreshes_lock:
+        pending_refreshes.discard(symbol)
+    try:
+        store = get_bar_store()
+        broadcaster.publish(symbol, 'metrics', store.metrics(symbol))
+        
+        if model.model is not None and model.feature_columns is not None:
+            df = store.frame(symbol, tail=STREAM_PREDICTION_HISTORY)
+            features = stored_features(symbol, df)
+            prediction = {'prediction': float(cached_next_day(model, df, features, symbol))}
+            # The global model only serves next-day predictions
+            if not isinstance(model, GlobalStockPredictor):
+                weekly_predictions = model.predict_weekly(df, features=features)
+                start_date = df['Date'].iloc[-1] + pd.Timedelta(days=1)
+                for i, pred in enumerate(weekly_predictions):
+                    pred['date'] = (start_date + pd.Timedelta(days=i)).strftime('%Y-%m-%d')
+                prediction['weekly_predictions'] = weekly_predictions
+            broadcaster.publish(symbol, 'prediction', prediction)
+    except Exception as e:
+        logger.error(f"Error refreshing streamed data for {symbol}: {str(e)}")
+
+@app.route('/api/stream', methods=['GET'])
+def stream_updates():
+    """Server-Sent Events stream of bars, signals, metrics and predictions"""
+    if serving_workers > 1:
+        return jsonify({
+            'error': f"Streaming needs a single worker process, the server runs {serving_workers}",
+            'status': 'error'
+        }), 503
+    
+    try:
+        store = get_bar_store()
+        symbols = [symbol.upper() for symbol in parse_list_arg('symbols')] or store.symbols()[:1]
+        unknown = [symbol for symbol in symbols if symbol not in store]
+        if unknown:
+            raise ValueError(f"Unknown symbols: {unknown}")
+        max_pending = int(request.args.get('max_pending', 100))
+        subscription = broadcaster.subscribe(symbols, max_pending=max_pending)
+    except Exception as e:
+        logger.error(f"Error opening stream: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+    
+    def generate():
+        try:
+            # Start every client from the current state
+            for symbol in symbols:
+                yield format_sse({'id': 0, 'symbol': symbol, 'type': 'metrics',
+                                  'data': store.metrics(symbol)})
+                yield format_sse({'id': 0, 'symbol': symbol, 'type': 'bar',
+                                  'data': store.snapshot(symbol)})
+            while True:
+                event = subscription.get(timeout=15)
+                if subscription.closed:
+                    break
+                # A comment line keeps idle connections open through proxies
+                yield format_sse(event) if event else ': keep-alive\n\n'
+        finally:
+            broadcaster.unsubscribe(subscription)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest_bars():
+    """Append new OHLCV bars and evaluate trading signals for them incrementally"""
+    try:
+        data = request.get_json()
+        if not data or 'bars' not in data:
+            return jsonify({
+                'error': 'No data provided or invalid format',
+                'status': 'error'
+            }), 400
+        
+        # Bars may name their symbol individually or share a top-level one
+        bars_by_symbol = {}
+        for bar in data['bars']:
+            symbol = str(bar.get('Symbol', data.get('symbol', ''))).upper()
+            if not symbol:
+                raise ValueError("Each bar needs a Symbol, or the payload a top-level symbol")
+            bars_by_symbol.setdefault(symbol, []).append(
+                {key: value for key, value in bar.items() if key != 'Symbol'})
+        
+        store = get_bar_store()
+        start = time.perf_counter()
+        results = store.ingest_batch(bars_by_symbol)
+        sync_feature_store(store, list(results))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        for symbol, snapshots in results.items():
+            publish_bar_update(symbol, snapshots)
+        
+        return jsonify({
+            'results': results,
+            'bars_ingested': sum(len(bars) for bars in results.values()),
+            'elapsed_ms': elapsed_ms,
+            'status': 'success'
+        })
+    except Exception as e:
+        logger.error(f"Error ingesting bars: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+def fine_tune_frame():
+    """Bars of the data file plus newer ones that only arrived through /api/ingest, newest first"""
+    df = load_stock_data()
+    symbol = data_symbol(resolve_data_path())
+    store = get_bar_store()
+    if symbol in store:
+        live = store.frame(symbol)
+        newer = live[live['Date'] > df['Date'].max()]
+        if len(newer):
+            logger.info(f"Fine-tuning on {len(newer)} ingested bar(s) newer than the data file")
+            df = pd.concat([newer.iloc[::-1], df], ignore_index=True)
+    return df
+
+def fine_tune_model(options):
+    """Fine-tune the saved model on the current data and ingested bars, keeping saved_models in place"""
+    global model
+    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+        raise FileNotFoundError("No saved model to fine-tune; run a full retrain first")
+    
+    start = time.perf_counter()
+    # Tune a separate float instance; the serving model is swapped only when done
+    predictor = StockPricePredictor()
+    predictor.load_model(model_path, scaler_path)
+    
+    # The replay buffer's recent windows must include bars ingested since the export
+    df = fine_tune_frame()
+    if feature_store is not None:
+        prepared_data = prepare_training_data(df, feature_store, data_symbol(resolve_data_path()))
+    else:
+        prepared_data = prepare_training_data(df)
+    train_size = int(len(prepared_data) * 0.8)
+    train_data = prepared_data[:train_size]
+    test_data = prepared_data[train_size:]
+    
+    logger.info("Fine-tuning current model...")
+    report = predictor.fine_tune(
+        train_data,
+        epochs=int(options.get('epochs', 3)),
+        recent_windows=int(options.get('recent_windows', 250)),
+        replay_windows=int(options.get('replay_windows', 250)),
+        learning_rate=float(options.get('learning_rate', 1e-4)),
+        scaler_policy=options.get('scaler_policy', 'extend'),
+        drift_tolerance=float(options.get('drift_tolerance', 0.1)),
+        dates=df['Date'].iloc[:train_size],
+        features=train_data if feature_store is not None else None
+    )
+    
+    predictor.save_model(model_path, scaler_path)
+    final_metrics = {
+        'mode': 'finetune',
+        'loss': report['loss'][-1],
+        'epochs_trained': len(report['loss']),
+        **{key: value for key, value in report.items() if key != 'loss'}
+    }
+    if options.get('evaluate', True):
+        evaluation_metrics = evaluate_model(predictor, test_data)
+        final_metrics.update({key: float(value) for key, value in evaluation_metrics.items()})
+    final_metrics['seconds'] = time.perf_counter() - start
+    model = predictor
+    
+    logger.info(f"Model fine-tuned successfully. Final metrics: {final_metrics}")
+    return final_metrics
+
 @app.route('/api/retrain', methods=['POST'])
 def retrain_model():
     try:
+        options = request.get_json(silent=True) or {}
+        if model_type == 'global':
+            return jsonify({
+                'error': 'The global model is trained with train_global.py, not retrained through the API',
+                'status': 'error'
+            }), 400
+        
+        # Fine-tune mode refreshes the current model on new bars in seconds
+        if options.get('mode') == 'finetune':
+            return jsonify({
+                'message': 'Model fine-tuned successfully',
+                'metrics': fine_tune_model(options),
+                'status': 'success'
+            })
+        
         # Define paths
         current_dir = os.path.dirname(os.path.abspath(__file__))
         saved_models_dir = os.path.join(current_dir, 'models', 'saved_models')
@@ -293,7 +795,10 @@ def retrain_model():
         
         # Load and prepare data
         df = load_stock_data()
-        prepared_data = prepare_training_data(df)
+        if feature_store is not None:
+            prepared_data = prepare_training_data(df, feature_store, data_symbol(resolve_data_path()))
+        else:
+            prepared_data = prepare_training_data(df)
         
         # Split data
         train_size = int(len(prepared_data) * 0.8)
@@ -308,27 +813,43 @@ def retrain_model():
         logger.info("Training new model...")
         history = model.train(
             data=train_data,
-            epochs=50,
+            epochs=int(options.get('epochs', 50)),
             batch_size=32,
-            validation_split=0.2
+            validation_split=0.2,
+            features=train_data if feature_store is not None else None,
+            early_stopping_patience=int(options.get('early_stopping_patience', 10)),
+            reduce_lr_patience=int(options.get('reduce_lr_patience', 5)),
+            checkpoint_dir=checkpoint_dir,
+            checkpoint_every=int(options.get('checkpoint_every', 1)),
+            resume=bool(options.get('resume', False))
         )
         
         # Evaluate model
         evaluation_metrics = evaluate_model(model, test_data)
+        uncertainty = model.calibrate_uncertainty(test_data)
         
         # Save the new model
         model_path = os.path.join(saved_models_dir, 'stock_model.h5')
         scaler_path = os.path.join(saved_models_dir, 'scaler.pkl')
         model.save_model(model_path, scaler_path)
         
+        # Optionally build a quantized variant, promoted only if accurate enough
+        quantization = None
+        if options.get('quantize'):
+            quantization = promote_quantized_model(model, test_data, model_path, options['quantize'],
+                                                   float(options.get('quantize_tolerance', 0.02)))
+        
         final_metrics = {
             'loss': float(history.history['loss'][-1]),
             'val_loss': float(history.history['val_loss'][-1]) if 'val_loss' in history.history else None,
             'epochs_trained': len(history.history['loss']),
+            'best_val_loss': float(min(history.history['val_loss'])) if 'val_loss' in history.history else None,
             'mse': float(evaluation_metrics['mse']),
             'rmse': float(evaluation_metrics['rmse']),
             'mae': float(evaluation_metrics['mae']),
-            'mape': float(evaluation_metrics['mape'])
+            'mape': float(evaluation_metrics['mape']),
+            'interval_coverage': uncertainty['coverage'],
+            'quantization': quantization
         }
         
         logger.info(f"Model retrained successfully. Final metrics: {final_metrics}")
@@ -349,4 +870,6 @@ def retrain_model():
     
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; use serve.py in production. The reloader is
+    # off so the model is not loaded a second time in a child process.
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', use_reloader=False)
\ No newline at end of file
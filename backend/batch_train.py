@@ -0,0 +1,88 @@
+# backend/batch_train.py
+"""
+Train one model per symbol in parallel into a per-symbol model registry.
+Symbols whose registered model is already up to date are skipped.
+
+    python batch_train.py --data data/raw/*.csv
+    python batch_train.py --data data/raw/*.csv --symbols UNL NABIL --workers 2 --cores-per-worker 2
+    python batch_train.py --data data/raw/*.csv --force --report batch.json
+    python batch_train.py --data data/raw/*.csv --extra-features ATR ADX RSI_Wilder OBV
+"""
+import os
+import json
+import argparse
+from models.ingest import CSVIngestor
+from models.batch_training import BatchTrainer
+from models.indicators import INDICATOR_FEATURES
+
+
+def load_frames(paths, symbols=None):
+    """{symbol: frame} from price exports, one symbol per file or a Symbol column"""
+    frames = {}
+    for path in paths:
+        df, _ = CSVIngestor().load(path)
+        if 'Symbol' in df.columns:
+            frames.update({str(symbol): group.drop(columns='Symbol')
+                           for symbol, group in df.groupby('Symbol', observed=True)})
+        else:
+            # nepsealpha_export_price_<SYMBOL>_<start>_<end>.csv
+            frames[os.path.basename(path).split('_')[3]] = df
+    if symbols:
+        missing = set(symbols) - set(frames)
+        if missing:
+            raise ValueError(f"No data for symbol(s): {', '.join(sorted(missing))}")
+        frames = {symbol: frames[symbol] for symbol in symbols}
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train per-symbol models on a process pool')
+    parser.add_argument('--data', nargs='+', required=True, help='Price export file(s)')
+    parser.add_argument('--symbols', nargs='+', help='Only train these symbols')
+    parser.add_argument('--registry', default='models/registry', help='Per-symbol model registry directory')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count / cores per worker)')
+    parser.add_argument('--cores-per-worker', type=int, help='Cores each worker is pinned to')
+    parser.add_argument('--epochs', type=int, default=50, help='Training epochs per symbol')
+    parser.add_argument('--early-stopping-patience', type=int, default=10,
+                        help='Stop after this many epochs without validation improvement (0 disables)')
+    parser.add_argument('--reduce-lr-patience', type=int, default=5,
+                        help='Halve the learning rate after this many epochs without improvement (0 disables)')
+    parser.add_argument('--min-rows', type=int, default=250, help='Skip symbols with fewer bars')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--extra-features', nargs='+', choices=INDICATOR_FEATURES, default=[],
+                        help='Additional indicator inputs for the models')
+    parser.add_argument('--force', action='store_true', help='Retrain symbols that are already up to date')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Ignore checkpoints left by interrupted runs')
+    parser.add_argument('--report', help='Write per-symbol results to this JSON file')
+    args = parser.parse_args()
+
+    trainer = BatchTrainer(registry_root=args.registry, max_workers=args.workers,
+                           cores_per_worker=args.cores_per_worker, epochs=args.epochs,
+                           early_stopping_patience=args.early_stopping_patience,
+                           reduce_lr_patience=args.reduce_lr_patience, min_rows=args.min_rows,
+                           seed=args.seed, extra_features=args.extra_features)
+    results = trainer.run(load_frames(args.data, args.symbols), force=args.force, resume=not args.no_resume)
+
+    print(f"\n{'symbol':<12} {'status':<11} {'rows':>6} {'epochs':>7} {'rmse':>10} {'mape':>8} {'seconds':>8}")
+    for result in results:
+        metrics = result.get('metrics', {})
+        print(f"{result['symbol']:<12} {result['status']:<11} {result['rows']:>6} "
+              f"{result.get('epochs', ''):>7} {metrics.get('rmse', float('nan')):>10.2f} "
+              f"{metrics.get('mape', float('nan')):>7.2f}% {result.get('seconds', 0):>8.1f}")
+        if 'error' in result or 'reason' in result:
+            print(f"  {result.get('error') or result.get('reason')}")
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print("\n" + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+# backend/benchmarks/loadtest.py
+"""
+Load-test the API served by serve.py against synthetic data.
+
+Starts the gunicorn server on a local port with STOCK_DATA_PATH pointing at a
+generated export, drives concurrent closed-loop traffic across the main
+endpoints and reports throughput, latency percentiles, error rate and the
+resident memory of the server processes.
+
+Run from the backend directory:
+    python -m benchmarks.loadtest --concurrency 8 --duration 60
+    python -m benchmarks.loadtest --workers 2 --threads 4 --mix predict=5,weekly=1
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --duration 30
+    python -m benchmarks.loadtest --compare results/loadtest_base.json results/loadtest_head.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic_data import generate_ohlcv, write_export
+from benchmarks.run_benchmarks import environment_info, RESULTS_DIR
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (method, path)
+ENDPOINTS = {
+    'historical': ('GET', '/api/historical'),
+    'predict': ('POST', '/api/predict'),
+    'weekly': ('POST', '/api/predict/weekly'),
+    'signals': ('GET', '/api/trading/signals'),
+    'metrics': ('GET', '/api/metrics'),
+}
+DEFAULT_MIX = 'historical=2,predict=3,weekly=1,signals=2,metrics=2'
+
+
+def parse_mix(text):
+    """Relative request weights per endpoint from 'name=weight,...'"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("The mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prediction_payloads(df, window_rows, distinct, n_samples, seed):
+    """
+    Encoded request bodies for the prediction endpoints, one per distinct
+    window of consecutive bars. Rotating through several windows keeps the
+    prediction cache hit rate closer to real traffic than one repeated body.
+    """
+    df = df.sort_values('Date').reset_index(drop=True)
+    df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+    records = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].to_dict('records')
+    rng = random.Random(seed)
+    starts = [rng.randrange(0, len(records) - window_rows + 1) for _ in range(distinct)]
+    predict = [json.dumps({'prices': records[start:start + window_rows]}).encode() for start in starts]
+    weekly = [json.dumps({'prices': records[start:start + window_rows],
+                          **({'n_samples': n_samples} if n_samples else {})}).encode() for start in starts]
+    return {'predict': predict, 'weekly': weekly}
+
+
+def process_tree(pid):
+    """pid and every descendant process id (Linux /proc only)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; the parent pid follows it
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemorySampler(threading.Thread):
+    """Samples the resident memory of a server process and its workers"""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = {}
+        self.last = {}
+        self.stopped = threading.Event()
+
+    def sample(self):
+        for pid in process_tree(self.pid):
+            rss = rss_bytes(pid)
+            if rss is not None:
+                self.last[pid] = rss
+                self.peak[pid] = max(self.peak.get(pid, 0), rss)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def report(self):
+        self.sample()
+        return {
+            'processes': [{'pid': pid, 'role': 'master' if pid == self.pid else 'worker',
+                           'rss_mb': self.last.get(pid, 0) / 2**20, 'peak_rss_mb': peak / 2**20}
+                          for pid, peak in sorted(self.peak.items())],
+            'total_rss_mb': sum(self.last.values()) / 2**20,
+            'peak_worker_rss_mb': max((peak for pid, peak in self.peak.items() if pid != self.pid),
+                                      default=self.peak.get(self.pid, 0)) / 2**20
+        }
+
+
+def start_server(args, data_path, log_path):
+    """Launch serve.py on a free local port; returns (process, base url)"""
+    port = free_port()
+    env = {**os.environ, 'STOCK_DATA_PATH': data_path}
+    command = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+               '--threads', str(args.threads), '--tf-intra-op-threads', str(args.tf_intra_op_threads)]
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    return process, f'http://127.0.0.1:{port}'
+
+
+def wait_until_ready(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} during startup")
+        try:
+            with urllib.request.urlopen(url + '/metrics', timeout=5):
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise TimeoutError(f"Server at {url} not ready after {timeout}s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def send(url, name, payloads, timeout):
+    """One request; returns (endpoint, latency seconds, ok)"""
+    method, path = ENDPOINTS[name]
+    body = random.choice(payloads[name]) if name in payloads else None
+    request = urllib.request.Request(url + path, data=body, method=method,
+                                     headers={'Content-Type': 'application/json'} if body else {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            ok = 200 <= response.status < 300
+    except (urllib.error.URLError, OSError):
+        # HTTPError (4xx/5xx) is a URLError; timeouts and resets are OSErrors
+        ok = False
+    return name, time.perf_counter() - start, ok
+
+
+def drive(url, mix, payloads, concurrency, duration, timeout, seed):
+    """Closed-loop load: each client sends its next request as soon as the last one returns"""
+    names, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(seed + index)
+        samples = []
+        while time.monotonic() < deadline:
+            samples.append(send(url, rng.choices(names, weights)[0], payloads, timeout))
+        return samples
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return [sample for samples in executor.map(client, range(concurrency)) for sample in samples]
+
+
+def summarize(samples, seconds):
+    """Throughput, latency percentiles and error rate per endpoint and overall"""
+    def stats(group):
+        latencies = np.array([latency for _, latency, _ in group]) * 1000
+        errors = sum(not ok for _, _, ok in group)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(group) else (0.0, 0.0, 0.0)
+        return {
+            'requests': len(group),
+            'errors': errors,
+            'error_rate': errors / len(group) if group else 0.0,
+            'throughput_rps': len(group) / seconds,
+            'mean_ms': float(latencies.mean()) if len(group) else 0.0,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(latencies.max()) if len(group) else 0.0
+        }
+
+    endpoints = {name: stats([s for s in samples if s[0] == name]) for name in ENDPOINTS}
+    return {'overall': stats(samples),
+            'endpoints': {name: result for name, result in endpoints.items() if result['requests']}}
+
+
+def print_summary(report):
+    print(f"\n{'endpoint':<12} {'requests':>9} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>8}")
+    rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+    for name, result in rows:
+        print(f"{name:<12} {result['requests']:>9} {result['throughput_rps']:>8.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['max_ms']:>9.1f} "
+              f"{result['error_rate'] * 100:>7.1f}%")
+    memory = report.get('memory')
+    if memory:
+        print(f"\nServer RSS {memory['total_rss_mb']:.1f} MiB across {len(memory['processes'])} process(es), "
+              f"peak per worker {memory['peak_worker_rss_mb']:.1f} MiB")
+
+
+def compare(base_path, head_path, threshold):
+    """Print throughput and p99 ratios between two load-test results; return True on regression"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    regressed = False
+    print(f"{'endpoint':<12} {'base rps':>9} {'head rps':>9} {'base p99':>9} {'head p99':>9} {'p99 ratio':>10}")
+    for name, result in list(head['endpoints'].items()) + [('overall', head['overall'])]:
+        previous = base['overall'] if name == 'overall' else base['endpoints'].get(name)
+        if previous is None:
+            continue
+        ratio = result['p99_ms'] / previous['p99_ms'] if previous['p99_ms'] else float('inf')
+        slower = ratio > 1 + threshold or result['throughput_rps'] < previous['throughput_rps'] * (1 - threshold)
+        flag = ' !' if slower or result['error_rate'] > previous['error_rate'] else ''
+        regressed |= bool(flag)
+        print(f"{name:<12} {previous['throughput_rps']:>9.1f} {result['throughput_rps']:>9.1f} "
+              f"{previous['p99_ms']:>9.1f} {result['p99_ms']:>9.1f} {ratio:>10.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the stock API on synthetic data')
+    parser.add_argument('--url', help='Test an already running server instead of starting one')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds of load')
+    parser.add_argument('--warmup', type=float, default=10, help='Seconds of unmeasured load first')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Relative weights, e.g. predict=3,metrics=1')
+    parser.add_argument('--rows', type=int, default=1250, help='Bars in the synthetic export')
+    parser.add_argument('--window-rows', type=int, default=120, help='Bars sent per prediction request')
+    parser.add_argument('--distinct-windows', type=int, default=50,
+                        help='Distinct prediction windows rotated through')
+    parser.add_argument('--n-samples', type=int, help='Monte Carlo samples per weekly request')
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Request threads per server worker')
+    parser.add_argument('--tf-intra-op-threads', type=int, default=0, help='TensorFlow threads per worker')
+    parser.add_argument('--startup-timeout', type=float, default=180, help='Seconds to wait for the server')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Result file path (default: benchmarks/results/loadtest_<time>_<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'),
+                        help='Compare two load-test results instead of running one')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative p99 or throughput change flagged as a regression by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    mix = parse_mix(args.mix)
+    df = generate_ohlcv(args.rows, 1, seed=args.seed)
+    if args.window_rows > len(df):
+        parser.error('--window-rows cannot exceed --rows')
+    payloads = prediction_payloads(df, args.window_rows, args.distinct_windows, args.n_samples, args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='stock-loadtest-') as workdir:
+        process, sampler, memory = None, None, None
+        url = args.url
+        if url is None:
+            data_path = write_export(df, workdir, per_symbol=True)[0]
+            log_path = os.path.join(workdir, 'server.log')
+            process, url = start_server(args, data_path, log_path)
+        try:
+            print(f"Waiting for {url}...")
+            wait_until_ready(url, process, args.startup_timeout)
+            # Resident memory is read from /proc, so it is only reported on Linux
+            if process is not None and os.path.isdir('/proc'):
+                sampler = MemorySampler(process.pid)
+                sampler.start()
+
+            if args.warmup > 0:
+                print(f"Warming up for {args.warmup:.0f}s")
+                drive(url, mix, payloads, args.concurrency, args.warmup, args.timeout, args.seed)
+            print(f"Measuring {args.concurrency} client(s) for {args.duration:.0f}s")
+            start = time.perf_counter()
+            samples = drive(url, mix, payloads, args.concurrency, args.duration, args.timeout, args.seed + 1000)
+            seconds = time.perf_counter() - start
+        except Exception:
+            if process is not None:
+                with open(log_path) as f:
+                    print(f"Server log tail:\n{''.join(f.readlines()[-20:])}", file=sys.stderr)
+            raise
+        finally:
+            if sampler is not None:
+                sampler.stopped.set()
+                memory = sampler.report()
+            if process is not None:
+                stop_server(process)
+
+    report = {
+        'environment': environment_info(),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('compare', 'threshold', 'output')},
+        'seconds': seconds,
+        **summarize(samples, seconds),
+        'memory': memory
+    }
+    print_summary(report)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"loadtest_{stamp}_{report['environment']['commit'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# backend/benchmarks/run_benchmarks.py
+"""
+Benchmark the data, strategy and model pipeline on synthetic NEPSE-style data.
+
+Run from the backend directory:
+    python -m benchmarks.run_benchmarks --scale small
+    python -m benchmarks.run_benchmarks --rows 100000 --symbols 10 --repeat 5
+    python -m benchmarks.run_benchmarks --compare results/base.json results/head.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_ohlcv, write_export
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+# (total rows, symbols) per preset
+SCALES = {
+    'small': [(1_000, 1)],
+    'medium': [(100_000, 10)],
+    'large': [(1_000_000, 100)],
+    'xlarge': [(10_000_000, 1_000)],
+    'all': [(1_000, 1), (100_000, 10), (1_000_000, 100), (10_000_000, 1_000)]
+}
+
+
+def time_call(fn, repeat):
+    """Time fn() `repeat` times and summarize the wall-clock durations"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return {
+        'min_s': min(durations),
+        'median_s': statistics.median(durations),
+        'mean_s': statistics.fmean(durations),
+        'repeat': repeat
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_predictor(frame):
+    """Use the saved model if present, otherwise an untrained model of the same shape"""
+    from models.stock_model import StockPricePredictor
+
+    predictor = StockPricePredictor(sequence_length=60)
+    saved_dir = os.path.join(os.path.dirname(BENCHMARK_DIR), 'models', 'saved_models')
+    model_path = os.path.join(saved_dir, 'stock_model.h5')
+    scaler_path = os.path.join(saved_dir, 'scaler.pkl')
+    if os.path.exists(model_path) and os.path.exists(scaler_path):
+        predictor.load_model(model_path, scaler_path)
+    else:
+        features = predictor.prepare_features(frame.copy())
+        predictor.scaler.fit(features)
+        predictor.build_model((predictor.sequence_length, features.shape[1]))
+    return predictor
+
+
+def benchmark_scale(rows, symbols, repeat, only=None, skip=()):
+    """Run every benchmark case for one (rows, symbols) configuration"""
+    import app
+    from models.trading_strategy import TradingStrategy
+    from models.technical_analysis import TechnicalAnalysis
+
+    results = {}
+
+    def run(name, fn):
+        if (only and name not in only) or name in skip:
+            return
+        print(f"  {name} ...", end=' ', flush=True)
+        results[name] = time_call(fn, repeat)
+        print(f"{results[name]['median_s']:.4f}s")
+
+    data = generate_ohlcv(rows, symbols)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = write_export(data, tmp_dir)[0]
+        run('load_stock_data', lambda: app.load_stock_data(csv_path))
+
+    if symbols > 1:
+        from models.portfolio_backtest import PortfolioBacktester
+        run('PortfolioBacktester.run', lambda: PortfolioBacktester(data, max_positions=20).run())
+
+        from models.live_store import LiveBarStore
+        from models.screener import screen_signals
+        store = LiveBarStore()
+        store.load_frame(data)
+
+        def screen():
+            # Include the matrix rebuild an ingest would trigger
+            store.invalidate()
+            return screen_signals(*store.latest_indicators())
+        run('screen_signals', screen)
+
+        from models.indicators import bar_matrices, indicator_columns
+        _, _, bars = bar_matrices(data, ('High', 'Low', 'Close', 'Volume'))
+        run('indicator_columns.matrix', lambda: indicator_columns(bars['High'], bars['Low'], bars['Close'],
+                                                                 bars['Volume']))
+
+    # Per-symbol pipeline stages run on one symbol's history, as the API does
+    symbol_df = data[data['Symbol'] == data['Symbol'].iloc[0]].reset_index(drop=True)
+    symbol_rows = len(symbol_df)
+
+    run('TradingStrategy.generate_signals', lambda: TradingStrategy(symbol_df).generate_signals())
+
+    strategy = TradingStrategy(symbol_df)
+    strategy.generate_signals()
+    run('TradingStrategy.backtest_strategy', strategy.backtest_strategy)
+    run('TradingStrategy.analyze_temporal_patterns', strategy.analyze_temporal_patterns)
+
+    analysis = TechnicalAnalysis(symbol_df)
+    run('TechnicalAnalysis.calculate_moving_averages', analysis.calculate_moving_averages)
+    run('TechnicalAnalysis.determine_trend', analysis.determine_trend)
+    run('TechnicalAnalysis.get_best_performing_periods', analysis.get_best_performing_periods)
+    run('TechnicalAnalysis.get_support_resistance_levels', analysis.get_support_resistance_levels)
+    run('TechnicalAnalysis.calculate_indicators', analysis.calculate_indicators)
+
+    model_frame = symbol_df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+    # Request parsing overhead of the prediction endpoints, JSON decoding included
+    from models.payloads import parse_prices
+    payload = model_frame.assign(Date=model_frame['Date'].dt.strftime('%Y-%m-%d'))
+    records_body = json.dumps({'prices': payload.to_dict('records')})
+    columnar_body = json.dumps({'prices': payload.to_dict('list')})
+    run('parse_prices.records', lambda: parse_prices(json.loads(records_body)['prices']))
+    run('parse_prices.columnar', lambda: parse_prices(json.loads(columnar_body)['prices']))
+    wanted = {'StockPricePredictor.prepare_features', 'StockPricePredictor.predict_next_day',
+              'StockPricePredictor.predict_weekly'}
+    if not only or wanted & set(only):
+        predictor = build_predictor(model_frame)
+        run('StockPricePredictor.prepare_features', lambda: predictor.prepare_features(model_frame.copy()))
+        run('StockPricePredictor.predict_next_day', lambda: predictor.predict_next_day(model_frame))
+        run('StockPricePredictor.predict_weekly', lambda: predictor.predict_weekly(model_frame))
+
+    return {
+        'rows': rows,
+        'symbols': symbols,
+        'rows_per_symbol': symbol_rows,
+        'cases': results
+    }
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+
+def compare(base_path, head_path, threshold):
+    """Print median-time ratios between two result files; return True on regression"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    base_runs = {(r['rows'], r['symbols']): r['cases'] for r in base['results']}
+    regressed = False
+    print(f"{'case':<52} {'scale':>16} {'base':>10} {'head':>10} {'ratio':>7}")
+    for run in head['results']:
+        scale = (run['rows'], run['symbols'])
+        for name, stats in run['cases'].items():
+            if name not in base_runs.get(scale, {}):
+                continue
+            base_median = base_runs[scale][name]['median_s']
+            ratio = stats['median_s'] / base_median if base_median else float('inf')
+            flag = ' !' if ratio > 1 + threshold else ''
+            regressed |= bool(flag)
+            print(f"{name:<52} {f'{scale[0]}x{scale[1]}':>16} "
+                  f"{base_median:>10.4f} {stats['median_s']:>10.4f} {ratio:>7.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the stock pipeline on synthetic data')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                        help='Preset (rows, symbols) configuration')
+    parser.add_argument('--rows', type=int, nargs='+', help='Total rows, overrides --scale')
+    parser.add_argument('--symbols', type=int, nargs='+', help='Symbol counts, paired with --rows')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per case')
+    parser.add_argument('--only', nargs='+', help='Run only these case names')
+    parser.add_argument('--skip', nargs='+', default=[], help='Skip these case names')
+    parser.add_argument('--output', help='Result file path (default: benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'),
+                        help='Compare two result files instead of running benchmarks')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown flagged as a regression by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    if args.rows:
+        symbols = args.symbols or [1] * len(args.rows)
+        if len(symbols) != len(args.rows):
+            parser.error('--symbols must have one value per --rows value')
+        configs = list(zip(args.rows, symbols))
+    else:
+        configs = SCALES[args.scale]
+
+    report = {'environment': environment_info(), 'results': []}
+    for rows, symbols in configs:
+        print(f"Benchmarking {rows} rows across {symbols} symbol(s)")
+        report['results'].append(benchmark_scale(rows, symbols, args.repeat, args.only, set(args.skip)))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['environment']['commit'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# backend/benchmarks/synthetic_data.py
+import os
+import numpy as np
+import pandas as pd
+
+# NEPSE trades Sunday through Thursday
+NEPSE_WEEKMASK = 'Sun Mon Tue Wed Thu'
+EXPORT_COLUMNS = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Percent Change', 'Volume']
+
+
+def trading_days(n_days, end='2025-01-03'):
+    """The last `n_days` NEPSE trading days up to `end`, oldest first"""
+    offset = pd.offsets.CustomBusinessDay(weekmask=NEPSE_WEEKMASK)
+    return pd.date_range(end=end, periods=n_days, freq=offset)
+
+
+def symbol_names(n_symbols):
+    """Deterministic, export-style ticker names (SYM0001, SYM0002, ...)"""
+    return [f"SYM{i:04d}" for i in range(1, n_symbols + 1)]
+
+
+def generate_ohlcv(rows, symbols=1, seed=0, end='2025-01-03'):
+    """
+    Generate a synthetic OHLCV frame with numeric columns.
+    `rows` is the total number of rows, split evenly across `symbols`.
+    Prices follow a geometric random walk; rows are sorted by symbol and
+    then by date in descending order, like the nepsealpha export.
+    """
+    if rows < symbols:
+        raise ValueError(f"Need at least one row per symbol, got {rows} rows for {symbols} symbols")
+
+    rng = np.random.default_rng(seed)
+    days = rows // symbols
+    dates = trading_days(days, end=end)
+
+    # Geometric random walk per symbol, shape (symbols, days)
+    start_prices = rng.uniform(200, 50000, size=(symbols, 1))
+    returns = rng.normal(0.0003, 0.02, size=(symbols, days))
+    close = start_prices * np.exp(np.cumsum(returns, axis=1))
+    open_ = close * np.exp(rng.normal(0, 0.008, size=close.shape))
+    spread = np.abs(rng.normal(0, 0.01, size=close.shape))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(mean=6, sigma=1.2, size=close.shape).round()
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    pct_change = (close - prev_close) / prev_close * 100
+
+    df = pd.DataFrame({
+        'Symbol': np.repeat(symbol_names(symbols), days),
+        'Date': np.tile(dates.values, symbols),
+        'Open': open_.ravel().round(2),
+        'High': high.ravel().round(2),
+        'Low': low.ravel().round(2),
+        'Close': close.ravel().round(2),
+        'Percent Change': pct_change.ravel().round(2),
+        'Volume': volume.ravel()
+    })
+    return df.sort_values(['Symbol', 'Date'], ascending=[True, False], ignore_index=True)
+
+
+def to_export_format(df):
+    """Format a numeric OHLCV frame the way the nepsealpha CSV export does"""
+    export = pd.DataFrame({'Symbol': df['Symbol'], 'Date': pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')})
+    for col in ['Open', 'High', 'Low', 'Close']:
+        # Large prices carry thousands separators in some exports
+        export[col] = df[col].map('{:,.2f}'.format)
+    export['Percent Change'] = df['Percent Change'].map('{:.2f} %'.format)
+    export['Volume'] = df['Volume'].map('{:,.2f}'.format)
+    return export[EXPORT_COLUMNS]
+
+
+def write_export(df, output_dir, per_symbol=False):
+    """
+    Write synthetic data as nepsealpha-style CSV exports.
+    Returns the list of written file paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    dates = pd.to_datetime(df['Date'])
+    groups = df.groupby('Symbol', sort=True) if per_symbol else [('ALL', df)]
+
+    paths = []
+    for symbol, group in groups:
+        group_dates = dates.loc[group.index]
+        filename = (f"nepsealpha_export_price_{symbol}_"
+                    f"{group_dates.min():%Y-%m-%d}_{group_dates.max():%Y-%m-%d}.csv")
+        path = os.path.join(output_dir, filename)
+        to_export_format(group).to_csv(path, index=False, quoting=1)
+        paths.append(path)
+    return paths
@@ -0,0 +1,62 @@
+# backend/ingest.py
+"""
+Bulk-import nepsealpha price exports with validation statistics.
+
+    python ingest.py data/raw
+    python ingest.py data/raw --workers 4 --feature-store /var/lib/stock-features --report ingest.json
+"""
+import os
+import json
+import argparse
+from models.ingest import CSVIngestor, import_directory
+from models.feature_store import FeatureStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import price exports from a file or directory')
+    parser.add_argument('source', help='Export file, or directory of per-symbol exports')
+    parser.add_argument('--pattern', default='*.csv', help='File pattern within a directory')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help='Rows parsed per chunk')
+    parser.add_argument('--max-gap-days', type=int, default=7,
+                        help='Report calendar gaps between bars longer than this')
+    parser.add_argument('--keep-duplicates', action='store_true', help='Keep repeated dates instead of dropping them')
+    parser.add_argument('--feature-store', help='Bring this feature store up to date with the imported bars')
+    parser.add_argument('--report', help='Write per-file statistics to this JSON file')
+    args = parser.parse_args()
+
+    options = {'chunk_rows': args.chunk_rows, 'max_gap_days': args.max_gap_days,
+               'drop_duplicates': not args.keep_duplicates}
+    if os.path.isdir(args.source):
+        frames, reports, seconds = import_directory(args.source, args.pattern, args.workers, **options)
+    else:
+        df, report = CSVIngestor(**options).load(args.source)
+        frames, reports, seconds = {args.source: df}, {args.source: report}, report.seconds
+
+    total_rows = sum(report.rows for report in reports.values())
+    print(f"{'file':<60} {'rows':>9} {'rejected':>9} {'dupes':>6} {'gaps':>5} {'rows/s':>10}")
+    for path, report in reports.items():
+        print(f"{os.path.basename(path)[:60]:<60} {report.rows:>9} {report.rejected_rows:>9} "
+              f"{report.duplicate_dates:>6} {report.gap_count:>5} {report.rows_per_sec:>10,.0f}")
+    print(f"\nImported {total_rows} rows from {len(reports)} file(s) in {seconds:.2f}s "
+          f"({total_rows / seconds if seconds else 0:,.0f} rows/s)")
+
+    if args.feature_store:
+        store = FeatureStore(args.feature_store)
+        for path, df in frames.items():
+            # nepsealpha_export_price_<SYMBOL>_<start>_<end>.csv
+            groups = (df.groupby('Symbol', observed=True) if 'Symbol' in df.columns
+                      else [(os.path.basename(path).split('_')[3], df)])
+            for symbol, group in groups:
+                store.update(str(symbol), group)
+        print(f"Feature store {args.feature_store} holds {len(store.symbols())} symbol(s)")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'seconds': seconds, 'rows': total_rows,
+                       'files': [report.to_dict() for report in reports.values()]}, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
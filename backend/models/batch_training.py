@@ -0,0 +1,204 @@
+# backend/models/batch_training.py
+import os
+import time
+import hashlib
+import queue
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import logging
+from models.model_registry import ModelRegistry
+from models.walk_forward import MODEL_COLUMNS, error_metrics
+from models.schema import restore_prices
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cores this worker process is pinned to, set by _init_worker
+_cores = None
+
+
+def available_cores():
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_sets(workers, cores_per_worker=None):
+    """
+    Split the available CPUs into one set per worker. The sets are disjoint
+    while the cores go around; more workers than that wrap and share cores.
+    """
+    cores = available_cores()
+    size = min(cores_per_worker or max(len(cores) // workers, 1), len(cores))
+    sets = []
+    for i in range(workers):
+        start = (i * size) % len(cores)
+        sets.append(cores[start:start + size])
+    return sets
+
+
+def data_version(df):
+    """Content hash of the bars a model is trained on"""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df[['Date'] + MODEL_COLUMNS], index=False)
+                          .to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def _init_worker(core_queue):
+    """Pin the worker to its own cores and size TensorFlow's pools to match"""
+    global _cores
+    import tensorflow as tf
+
+    try:
+        _cores = core_queue.get_nowait()
+    except queue.Empty:
+        # A replacement for a crashed worker; the sets are all taken
+        _cores = available_cores()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, _cores)
+    else:
+        logger.warning("CPU pinning is not supported on this platform; only limiting TensorFlow threads")
+
+    tf.config.threading.set_intra_op_parallelism_threads(len(_cores))
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def train_symbol(task):
+    """Train, evaluate and register one symbol's model (runs in a worker)"""
+    from models.stock_model import StockPricePredictor
+    import tensorflow as tf
+
+    symbol, options = task['symbol'], task['options']
+    start = time.perf_counter()
+    result = {'symbol': symbol, 'cores': _cores, 'rows': len(task['frame'])}
+    try:
+        registry = ModelRegistry(task['registry'])
+        paths = registry.begin(symbol, {'data_version': task['data_version'], 'options': options})
+        tf.keras.utils.set_random_seed(options['seed'])
+
+        data = task['frame'][MODEL_COLUMNS]
+        train_rows = int(len(data) * options['train_fraction'])
+        predictor = StockPricePredictor(sequence_length=options['sequence_length'],
+                                        extra_features=options['extra_features'])
+        history = predictor.train(
+            data.iloc[:train_rows],
+            epochs=options['epochs'],
+            batch_size=options['batch_size'],
+            validation_split=options['validation_split'],
+            early_stopping_patience=options['early_stopping_patience'],
+            reduce_lr_patience=options['reduce_lr_patience'],
+            checkpoint_dir=paths['checkpoints'],
+            resume=task['resume']
+        )
+
+        # Indicators are causal, so predictions whose target falls after the split are out of sample
+        first = train_rows - predictor.sequence_length
+        predicted = predictor.predict_batch(data)[first:first + len(data) - train_rows]
+        test_metrics = error_metrics(predicted, data['Close'].to_numpy()[train_rows:])
+        # Calibration windows start one sequence early so every forecast target is a test row
+        predictor.calibrate_uncertainty(data.iloc[first:])
+
+        predictor.save_model(paths['model'], paths['scaler'])
+        registry.commit(symbol, {
+            'symbol': symbol,
+            'data_version': task['data_version'],
+            'options': options,
+            'rows': len(data),
+            'last_date': task['frame']['Date'].iloc[-1].strftime('%Y-%m-%d'),
+            'metrics': test_metrics,
+            'model_version': predictor.model_version,
+            'trained_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'seconds': time.perf_counter() - start
+        })
+        result.update(status='trained', epochs=len(history.history['loss']), metrics=test_metrics)
+
+    except Exception as e:
+        logger.error(f"Error training {symbol}: {str(e)}")
+        result.update(status='failed', error=str(e))
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+class BatchTrainer:
+    """
+    Train one StockPricePredictor per symbol on a process pool. Each worker is
+    pinned to a disjoint set of cores with TensorFlow's pools sized to it, so
+    parallel fits don't oversubscribe the CPU. Models go to a per-symbol
+    ModelRegistry; a symbol whose registered model was trained on the same
+    bars with the same options is skipped.
+    """
+
+    def __init__(self, registry_root='models/registry', max_workers=None, cores_per_worker=None,
+                 sequence_length=60, epochs=50, batch_size=32, validation_split=0.2,
+                 early_stopping_patience=10, reduce_lr_patience=5, train_fraction=0.8,
+                 min_rows=250, seed=42, extra_features=None):
+        self.registry = ModelRegistry(registry_root)
+        cores = len(available_cores())
+        self.max_workers = max_workers or max(cores // (cores_per_worker or 1), 1)
+        self.cores_per_worker = cores_per_worker
+        self.min_rows = min_rows
+        self.options = {
+            'sequence_length': sequence_length,
+            'epochs': epochs,
+            'batch_size': batch_size,
+            'validation_split': validation_split,
+            'early_stopping_patience': early_stopping_patience,
+            'reduce_lr_patience': reduce_lr_patience,
+            'train_fraction': train_fraction,
+            'seed': seed,
+            'extra_features': list(extra_features or [])
+        }
+
+    def plan(self, frames, force=False):
+        """Split {symbol: frame} into training tasks and results for symbols that need none"""
+        tasks, results = [], []
+        for symbol, df in sorted(frames.items()):
+            # Chronological order, as in walk-forward evaluation
+            df = restore_prices(df).sort_values('Date').reset_index(drop=True)
+            version = data_version(df)
+            if len(df) < self.min_rows:
+                results.append({'symbol': symbol, 'status': 'skipped', 'rows': len(df),
+                                'reason': f"fewer than {self.min_rows} rows"})
+            elif not force and self.registry.is_current(symbol, version, self.options):
+                results.append({'symbol': symbol, 'status': 'up_to_date', 'rows': len(df)})
+            else:
+                tasks.append({'symbol': symbol, 'frame': df, 'data_version': version,
+                              'options': self.options, 'registry': self.registry.root})
+        return tasks, results
+
+    def run(self, frames, force=False, resume=True):
+        """Train every symbol that is missing or out of date; returns one result per symbol"""
+        try:
+            start = time.perf_counter()
+            tasks, results = self.plan(frames, force)
+            for task in tasks:
+                task['resume'] = resume
+            if tasks:
+                workers = min(self.max_workers, len(tasks))
+                sets = core_sets(workers, self.cores_per_worker)
+                context = multiprocessing.get_context('spawn')
+                core_queue = context.Queue()
+                for cores in sets:
+                    core_queue.put(cores)
+                logger.info(f"Batch training: {len(tasks)} symbol(s) on {workers} process(es), "
+                            f"cores {sets}")
+                # Spawned workers keep the caller's TensorFlow state out of the children
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(core_queue,)) as executor:
+                    futures = [executor.submit(train_symbol, task) for task in tasks]
+                    for future in as_completed(futures):
+                        result = future.result()
+                        logger.info(f"{result['symbol']}: {result['status']} in {result['seconds']:.1f}s")
+                        results.append(result)
+
+            logger.info(f"Batch training finished in {time.perf_counter() - start:.1f}s")
+            return sorted(results, key=lambda r: r['symbol'])
+
+        except Exception as e:
+            logger.error(f"Error in batch training: {str(e)}")
+            raise
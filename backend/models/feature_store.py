@@ -0,0 +1,390 @@
+# backend/models/feature_store.py
+import os
+import json
+import fcntl
+import inspect
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+import logging
+from models.schema import to_numeric, DATE_DTYPE
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = '.lock'
+RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+@dataclass
+class FeatureDef:
+    """
+    One stored feature column computed from the raw OHLCV columns.
+    `lookback` is the number of trailing rows needed to compute a new value
+    exactly; None means the feature is recursive (e.g. an EWM). A recursive
+    feature with a `step(raw, state, **params) -> (values, state)` continues
+    from the state saved after the last stored row (None starts from the first
+    row); without one its new values are computed over the full history.
+    """
+    name: str
+    compute: Callable[..., pd.Series]
+    lookback: Optional[int] = None
+    params: dict = field(default_factory=dict)
+    step: Optional[Callable] = None
+
+    @property
+    def definition_hash(self):
+        """Changes whenever the computation or its parameters change"""
+        source = b''.join(_source(func) for func in (self.compute, self.step) if func is not None)
+        return hashlib.sha1(source + json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _source(func):
+    try:
+        return inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        # Functions defined interactively have no source file
+        return func.__code__.co_code + repr(func.__code__.co_consts).encode()
+
+
+def _sma(raw, column, window):
+    return raw[column].rolling(window=window).mean()
+
+
+def _ema(raw, span):
+    return raw['Close'].ewm(span=span, adjust=False).mean()
+
+
+def _rsi(raw, window):
+    delta = raw['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def _macd(raw, fast, slow):
+    return raw['Close'].ewm(span=fast, adjust=False).mean() - raw['Close'].ewm(span=slow, adjust=False).mean()
+
+
+def _macd_signal(raw, fast, slow, signal):
+    return _macd(raw, fast, slow).ewm(span=signal, adjust=False).mean()
+
+
+def _macd_hist(raw, fast, slow, signal):
+    macd = _macd(raw, fast, slow)
+    return macd - macd.ewm(span=signal, adjust=False).mean()
+
+
+def _bollinger(raw, window, width):
+    close = raw['Close'].rolling(window=window)
+    return close.mean() + width * close.std()
+
+
+def _momentum(raw, periods):
+    return raw['Close'].pct_change(periods=periods)
+
+
+def _volume_ratio(raw, window):
+    return raw['Volume'] / raw['Volume'].rolling(window=window).mean()
+
+
+def _ewm(values, span, last=None):
+    """EWM (adjust=False) of `values`, continued from `last`, the value of the row before them"""
+    series = pd.Series(np.asarray(values, dtype=np.float64))
+    if last is None:
+        return series.ewm(span=span, adjust=False).mean().to_numpy()
+    # The recursion only needs the previous value, so it is seeded as the first element
+    seeded = pd.concat([pd.Series([last]), series], ignore_index=True)
+    return seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+def _ema_step(raw, state, span):
+    ema = _ewm(raw['Close'], span, None if state is None else state['ema'])
+    return ema, {'ema': float(ema[-1])}
+
+
+def _macd_step(raw, state, fast, slow):
+    state = state or {}
+    fast_ema = _ewm(raw['Close'], fast, state.get('fast'))
+    slow_ema = _ewm(raw['Close'], slow, state.get('slow'))
+    return fast_ema - slow_ema, {'fast': float(fast_ema[-1]), 'slow': float(slow_ema[-1])}
+
+
+def _macd_signal_step(raw, state, fast, slow, signal):
+    macd, macd_state = _macd_step(raw, state, fast, slow)
+    line = _ewm(macd, signal, (state or {}).get('signal'))
+    return line, {**macd_state, 'signal': float(line[-1])}
+
+
+def _macd_hist_step(raw, state, fast, slow, signal):
+    macd, macd_state = _macd_step(raw, state, fast, slow)
+    line = _ewm(macd, signal, (state or {}).get('signal'))
+    return macd - line, {**macd_state, 'signal': float(line[-1])}
+
+
+# Union of the indicators computed by prepare_training_data,
+# StockPricePredictor.prepare_features and TradingStrategy.prepare_data
+FEATURES = [
+    FeatureDef('SMA_20', _sma, 20, {'column': 'Close', 'window': 20}),
+    FeatureDef('SMA_50', _sma, 50, {'column': 'Close', 'window': 50}),
+    FeatureDef('EMA_9', _ema, None, {'span': 9}, _ema_step),
+    FeatureDef('EMA_21', _ema, None, {'span': 21}, _ema_step),
+    FeatureDef('RSI', _rsi, 15, {'window': 14}),
+    FeatureDef('MACD', _macd, None, {'fast': 12, 'slow': 26}, _macd_step),
+    FeatureDef('Signal_Line', _macd_signal, None, {'fast': 12, 'slow': 26, 'signal': 9}, _macd_signal_step),
+    FeatureDef('MACD_Hist', _macd_hist, None, {'fast': 12, 'slow': 26, 'signal': 9}, _macd_hist_step),
+    FeatureDef('BB_middle', _sma, 20, {'column': 'Close', 'window': 20}),
+    FeatureDef('BB_upper', _bollinger, 20, {'window': 20, 'width': 2}),
+    FeatureDef('BB_lower', _bollinger, 20, {'window': 20, 'width': -2}),
+    FeatureDef('Momentum', _momentum, 11, {'periods': 10}),
+    FeatureDef('Volume_MA', _sma, 20, {'column': 'Volume', 'window': 20}),
+    FeatureDef('Volume_Ratio', _volume_ratio, 20, {'window': 20}),
+]
+
+# Indicator columns each consumer reads from the store
+MODEL_FEATURES = ['SMA_20', 'SMA_50', 'RSI', 'MACD', 'Signal_Line', 'BB_middle', 'BB_upper', 'BB_lower',
+                  'Momentum']
+STRATEGY_FEATURES = ['EMA_9', 'EMA_21', 'RSI', 'MACD', 'Signal_Line', 'MACD_Hist', 'BB_middle', 'BB_upper',
+                     'BB_lower', 'Volume_MA', 'Volume_Ratio']
+
+
+def default_root():
+    return os.path.join(tempfile.gettempdir(), 'stock-feature-store')
+
+
+class FeatureStore:
+    """
+    On-disk feature store: one directory per symbol holding the raw bars and
+    every feature as a flat binary column that readers memory-map.
+    New bars are appended to the column files and only their values are
+    computed; a column whose definition hash changed is rewritten alone.
+    The manifest is replaced atomically after the columns are written, so
+    readers only ever map rows that are complete. Writers, including other
+    processes (serving workers, ingest.py), take turns on a per-symbol lock
+    file for the whole read-manifest, append, write-manifest sequence.
+    """
+
+    def __init__(self, root=None, features=None):
+        self.root = root or default_root()
+        self.features = {feature.name: feature for feature in (features or FEATURES)}
+        self.hashes = {name: feature.definition_hash for name, feature in self.features.items()}
+        self.version = hashlib.sha1(json.dumps(self.hashes, sort_keys=True).encode()).hexdigest()[:12]
+        self.lock = threading.RLock()
+        self._maps = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, str(symbol))
+
+    def manifest(self, symbol):
+        try:
+            with open(os.path.join(self._symbol_dir(symbol), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'rows': 0, 'columns': {}}
+
+    def _write_manifest(self, symbol, manifest):
+        path = os.path.join(self._symbol_dir(symbol), MANIFEST_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    @contextmanager
+    def _locked(self, symbol):
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        with open(os.path.join(self._symbol_dir(symbol), LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def symbols(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, MANIFEST_FILE)))
+
+    def update(self, symbol, df):
+        """
+        Bring a symbol's columns up to date with the bars in `df`.
+        Bars past the stored history are appended; if the stored history no
+        longer matches `df` (e.g. a corrected export) the symbol is rebuilt.
+        A `df` that is only behind the stored history (another writer already
+        appended its newer bars) leaves the rows alone. Returns the number of
+        rows written.
+        """
+        try:
+            raw = _raw_frame(df)
+            with self.lock, self._locked(symbol):
+                manifest = self.manifest(symbol)
+                stored = manifest['rows']
+                if stored and not self._history_matches(symbol, manifest, raw):
+                    logger.info(f"Stored history of {symbol} changed, rebuilding its features")
+                    stored = 0
+                    manifest = {'rows': 0, 'columns': {}}
+                elif stored > len(raw):
+                    raw = self._stored_raw(symbol)
+
+                stale = [name for name in self.features
+                         if manifest['columns'].get(name, {}).get('hash') != self.hashes[name]]
+                if stored == len(raw) and not stale:
+                    return 0
+
+                os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+                # Columns of features that are no longer defined are dropped
+                columns = {name: entry for name, entry in manifest['columns'].items()
+                           if name in self.features or name in ['Date'] + RAW_COLUMNS}
+                if stored < len(raw):
+                    # Only the new rows of up-to-date columns are computed and appended
+                    new_rows = {'Date': raw['Date'].to_numpy().astype(np.int64)[stored:]}
+                    new_rows.update({col: raw[col].to_numpy()[stored:] for col in RAW_COLUMNS})
+                    states = {}
+                    for name, feature in self.features.items():
+                        if name not in stale:
+                            new_rows[name], states[name] = self._compute_tail(feature, raw, stored,
+                                                                              columns[name].get('state'))
+                    for name, values in new_rows.items():
+                        columns[name] = self._append_column(symbol, columns.get(name), name, values, stored)
+                        if states.get(name) is not None:
+                            columns[name] = {**columns[name], 'state': states[name]}
+
+                # Changed or new definitions: recompute only those columns in full
+                for name in stale:
+                    values, state = self._compute_full(self.features[name], raw)
+                    columns[name] = self._write_column(symbol, name, self.hashes[name], values)
+                    if state is not None:
+                        columns[name]['state'] = state
+
+                self._write_manifest(symbol, {'rows': len(raw), 'version': self.version, 'columns': columns})
+                self._remove_orphans(symbol, columns)
+                if stale:
+                    logger.info(f"Recomputed {len(stale)} feature column(s) for {symbol}: {stale}")
+                return len(raw) - stored
+
+        except Exception as e:
+            logger.error(f"Error updating feature store for {symbol}: {str(e)}")
+            raise
+
+    def _history_matches(self, symbol, manifest, raw):
+        """Whether the stored rows and `raw` agree on the bars both of them hold"""
+        rows = min(manifest['rows'], len(raw))
+        columns = self.columns(symbol, ['Date', 'Close'])
+        return (np.array_equal(columns['Date'][:rows], raw['Date'].to_numpy().astype(np.int64)[:rows])
+                and np.allclose(columns['Close'][:rows], raw['Close'].to_numpy()[:rows], equal_nan=True))
+
+    def _stored_raw(self, symbol):
+        # Copied, as the stale columns computed from it replace mapped files
+        return pd.DataFrame({name: np.array(values) for name, values
+                             in self.frame(symbol, ['Date'] + RAW_COLUMNS).items()})
+
+    def _compute_full(self, feature, raw):
+        """Values of every row, plus the state a recursive feature continues from"""
+        if feature.step is not None:
+            return feature.step(raw, None, **feature.params)
+        return feature.compute(raw, **feature.params).to_numpy(np.float64), None
+
+    def _compute_tail(self, feature, raw, stored, state=None):
+        """
+        Values of the rows after `stored` (with the state to save), from the
+        trailing lookback window only, or one step at a time from the saved
+        state of a recursive feature.
+        """
+        if feature.step is not None and state is not None:
+            return feature.step(raw.iloc[stored:], state, **feature.params)
+        if feature.lookback is None:
+            values, state = self._compute_full(feature, raw)
+            return values[stored:], state
+        start = max(stored - feature.lookback, 0)
+        values = feature.compute(raw.iloc[start:], **feature.params).to_numpy(np.float64)
+        return values[stored - start:], None
+
+    def _append_column(self, symbol, entry, name, values, stored):
+        if entry is None:
+            return self._write_column(symbol, name, self.hashes.get(name, 'raw'), values)
+        path = os.path.join(self._symbol_dir(symbol), entry['file'])
+        values = np.ascontiguousarray(values, dtype=entry['dtype'])
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            # Drop bytes left by an append whose manifest was never written
+            f.truncate(stored * values.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+        return entry
+
+    def _write_column(self, symbol, name, definition, values):
+        values = np.ascontiguousarray(values)
+        filename = f"{name}.{definition}.bin"
+        path = os.path.join(self._symbol_dir(symbol), filename)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(values.tobytes())
+        os.replace(path + '.tmp', path)
+        return {'file': filename, 'hash': definition, 'dtype': values.dtype.str}
+
+    def _remove_orphans(self, symbol, columns):
+        # Open maps of replaced files stay valid after unlink
+        live = {entry['file'] for entry in columns.values()} | {MANIFEST_FILE, LOCK_FILE}
+        for name in os.listdir(self._symbol_dir(symbol)):
+            if name not in live:
+                os.remove(os.path.join(self._symbol_dir(symbol), name))
+
+    def columns(self, symbol, names=None):
+        """Read-only memory-mapped columns of a symbol (raw columns, Date as int64 seconds, and features)"""
+        with self.lock:
+            manifest = self.manifest(symbol)
+            if not manifest['rows']:
+                raise KeyError(f"No stored features for {symbol}")
+            key = (manifest['rows'], tuple(sorted((n, c['file']) for n, c in manifest['columns'].items())))
+            cached = self._maps.get(symbol)
+            if cached is None or cached[0] != key:
+                maps = {name: np.memmap(os.path.join(self._symbol_dir(symbol), entry['file']),
+                                        dtype=entry['dtype'], mode='r', shape=(manifest['rows'],))
+                        for name, entry in manifest['columns'].items()}
+                cached = self._maps[symbol] = (key, maps)
+            maps = cached[1]
+        names = list(maps) if names is None else names
+        return {name: maps[name] for name in names}
+
+    def dates(self, symbol):
+        return self.columns(symbol, ['Date'])['Date'].view(DATE_DTYPE)
+
+    def features_for(self, symbol, dates, names):
+        """
+        Feature values at the given dates, aligned with them. A run of
+        consecutive ascending dates is served as zero-copy slices.
+        """
+        stored_dates = self.dates(symbol)
+        wanted = pd.to_datetime(pd.Series(dates)).dt.normalize().to_numpy().astype(DATE_DTYPE)
+        positions = np.searchsorted(stored_dates, wanted)
+        found = (positions < len(stored_dates)) & (stored_dates[np.minimum(positions, len(stored_dates) - 1)] == wanted)
+        if not found.all():
+            raise KeyError(f"{int((~found).sum())} date(s) are not in the {symbol} feature store")
+
+        columns = self.columns(symbol, names)
+        if len(positions) and np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+            return {name: values[positions[0]:positions[-1] + 1] for name, values in columns.items()}
+        return {name: values[positions] for name, values in columns.items()}
+
+    def frame(self, symbol, names=None, tail=None):
+        """Chronological frame over the stored columns, backed by the memory maps"""
+        columns = self.columns(symbol, names)
+        start = 0 if tail is None else max(len(next(iter(columns.values()))) - tail, 0)
+        data = {name: (values[start:].view(DATE_DTYPE) if name == 'Date' else values[start:])
+                for name, values in columns.items()}
+        return pd.DataFrame(data, copy=False)
+
+
+def _raw_frame(df):
+    """Chronological OHLCV frame in float64 with second-resolution dates"""
+    raw = pd.DataFrame({
+        'Date': pd.to_datetime(df['Date']).dt.normalize().astype(DATE_DTYPE),
+        **{col: to_numeric(df[col]).astype(np.float64) for col in RAW_COLUMNS}
+    })
+    return raw.sort_values('Date').reset_index(drop=True)
@@ -0,0 +1,244 @@
+# backend/models/global_model.py
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+import tensorflow as tf
+from tensorflow.keras import Model
+from tensorflow.keras.layers import Input, Embedding, RepeatVector, Concatenate, LSTM, Dense, Dropout
+import joblib
+import logging
+from models.instrumentation import metrics
+from models.stock_model import StockPricePredictor
+from models.walk_forward import MODEL_COLUMNS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GlobalStockPredictor(StockPricePredictor):
+    """
+    One LSTM trained across all symbols. A learned symbol embedding is fed
+    alongside the features at every step, and each symbol keeps its own
+    MinMaxScaler, so prices of very different magnitudes share one set of
+    weights. Next-day predictions for many symbols run as one batched forward
+    pass. Monte Carlo weekly forecasts, calibration and fine-tuning stay with
+    the per-symbol models and raise ValueError here. train_global.py trains
+    it; the API serves its next-day predictions with MODEL_TYPE=global.
+    """
+
+    def __init__(self, sequence_length=60, embedding_dim=8, extra_features=None):
+        super().__init__(sequence_length, extra_features)
+        self.embedding_dim = embedding_dim
+        self.symbols = []
+        self.scalers = {}
+
+    def symbol_id(self, symbol):
+        try:
+            return self.symbols.index(str(symbol))
+        except ValueError:
+            raise ValueError(f"Symbol {symbol} is not known to the global model")
+
+    def _scaled_features(self, symbol, df, fit_scaler=False):
+        """Indicator features of one symbol's chronological bars, scaled with that symbol's scaler"""
+        df = self.prepare_features(df[MODEL_COLUMNS].copy())
+        df = df[self.feature_columns]
+        if fit_scaler:
+            self.scalers[symbol] = MinMaxScaler(feature_range=(0, 1)).fit(df)
+        with metrics.stage('scaling'):
+            return self.scalers[symbol].transform(df).astype(np.float32)
+
+    def _windows(self, scaled):
+        """Overlapping windows as a strided view, shape (n_windows, sequence_length, F)"""
+        return np.lib.stride_tricks.sliding_window_view(scaled, self.sequence_length, axis=0).transpose(0, 2, 1)
+
+    def _to_prices(self, symbol, scaled_predictions):
+        # Close is min-max scaled, so inverse transform is affine per column
+        scaler = self.scalers[symbol]
+        close_idx = self.feature_columns.index('Close')
+        return (scaled_predictions - scaler.min_[close_idx]) / scaler.scale_[close_idx]
+
+    def prepare_data(self, frames, validation_split=0.0):
+        """
+        Training windows of every symbol, with the symbol id of each window.
+        The last `validation_split` of each symbol's windows is held out, so
+        every symbol is validated on its most recent bars.
+        """
+        try:
+            self.symbols = sorted(str(symbol) for symbol in frames)
+            train, validation = [], []
+            for symbol in self.symbols:
+                df = frames[symbol]
+                if len(df) <= self.sequence_length:
+                    raise ValueError(f"Need more than {self.sequence_length} rows for {symbol}, got {len(df)}")
+                scaled = self._scaled_features(symbol, df, fit_scaler=True)
+                close_idx = self.feature_columns.index('Close')
+                X = self._windows(scaled[:-1])
+                y = scaled[self.sequence_length:, close_idx]
+                ids = np.full(len(X), self.symbol_id(symbol), dtype=np.int32)
+
+                split = len(X) - int(len(X) * validation_split)
+                train.append((X[:split], ids[:split], y[:split]))
+                validation.append((X[split:], ids[split:], y[split:]))
+
+            def stack(parts):
+                return ([np.concatenate([X for X, _, _ in parts]), np.concatenate([ids for _, ids, _ in parts])],
+                        np.concatenate([y for _, _, y in parts]))
+
+            return stack(train), stack(validation) if validation_split else None
+
+        except Exception as e:
+            logger.error(f"Error in prepare_data: {str(e)}")
+            raise
+
+    def build_model(self, input_shape, n_symbols=None):
+        """Build the LSTM model with a symbol embedding concatenated to every step"""
+        try:
+            sequence = Input(shape=input_shape, name='sequence')
+            symbol = Input(shape=(), dtype='int32', name='symbol')
+            embedding = Embedding(n_symbols or len(self.symbols), self.embedding_dim)(symbol)
+            x = Concatenate()([sequence, RepeatVector(input_shape[0])(embedding)])
+            x = LSTM(100, return_sequences=True)(x)
+            x = Dropout(0.2)(x)
+            x = LSTM(100, return_sequences=True)(x)
+            x = Dropout(0.2)(x)
+            x = LSTM(100)(x)
+            x = Dropout(0.2)(x)
+            x = Dense(50)(x)
+            model = Model(inputs=[sequence, symbol], outputs=Dense(1)(x))
+
+            model.compile(
+                optimizer='adam',
+                loss='mean_squared_error',
+                metrics=['mae', 'mse']
+            )
+
+            self.model = model
+            return model
+
+        except Exception as e:
+            logger.error(f"Error in build_model: {str(e)}")
+            raise
+
+    def train(self, frames, epochs=50, batch_size=32, validation_split=0.2, early_stopping_patience=None,
+              reduce_lr_patience=None):
+        """Train on {symbol: chronological OHLCV frame}"""
+        try:
+            (X, y), validation = self.prepare_data(frames, validation_split)
+            if self.model is None:
+                self.build_model((X[0].shape[1], X[0].shape[2]))
+            logger.info(f"Training global model on {len(y)} windows from {len(self.symbols)} symbol(s)")
+
+            monitor = 'val_loss' if validation is not None else 'loss'
+            callbacks = []
+            if early_stopping_patience:
+                callbacks.append(tf.keras.callbacks.EarlyStopping(
+                    monitor=monitor, patience=early_stopping_patience, restore_best_weights=True))
+            if reduce_lr_patience:
+                callbacks.append(tf.keras.callbacks.ReduceLROnPlateau(
+                    monitor=monitor, factor=0.5, patience=reduce_lr_patience, min_lr=1e-5))
+
+            return self.model.fit(
+                X, y,
+                epochs=epochs,
+                batch_size=batch_size,
+                validation_data=validation,
+                callbacks=callbacks,
+                verbose=1
+            )
+
+        except Exception as e:
+            logger.error(f"Error in train: {str(e)}")
+            raise
+
+    def predict_batch(self, data, symbol, batch_size=256):
+        """
+        Predict the next close after every complete window of one symbol's bars.
+        Element j is the prediction for row j + sequence_length; the last one is beyond the data.
+        """
+        try:
+            windows = self._windows(self._scaled_features(str(symbol), data))
+            ids = np.full(len(windows), self.symbol_id(symbol), dtype=np.int32)
+            with metrics.stage('model_forward'):
+                scaled_predictions = self.model.predict([windows, ids], batch_size=batch_size, verbose=0)[:, 0]
+            return self._to_prices(str(symbol), scaled_predictions)
+
+        except Exception as e:
+            logger.error(f"Error in predict_batch: {str(e)}")
+            raise
+
+    def predict_next_day(self, data, features=None, symbol=None):
+        """Predict one symbol's next closing price"""
+        if symbol is None:
+            raise ValueError("The global model needs the symbol to predict")
+        return self.predict_many({symbol: data})[str(symbol)]
+
+    def predict_many(self, frames, batch_size=256):
+        """Next-day closes of {symbol: chronological frame} from one batched forward pass"""
+        try:
+            symbols = [str(symbol) for symbol in frames]
+            ids = np.array([self.symbol_id(symbol) for symbol in symbols], dtype=np.int32)
+            windows = []
+            for symbol, df in zip(symbols, frames.values()):
+                if len(df) < self.sequence_length:
+                    raise ValueError(f"Need at least {self.sequence_length} rows for {symbol}, got {len(df)}")
+                windows.append(self._scaled_features(symbol, df)[-self.sequence_length:])
+
+            with metrics.stage('model_forward'):
+                scaled_predictions = self.model.predict([np.stack(windows), ids], batch_size=batch_size,
+                                                        verbose=0)[:, 0]
+            return {symbol: float(self._to_prices(symbol, value))
+                    for symbol, value in zip(symbols, scaled_predictions)}
+
+        except Exception as e:
+            logger.error(f"Error in predict_many: {str(e)}")
+            raise
+
+    def save_model(self, model_path, scaler_path):
+        """Save the model and the per-symbol scalers"""
+        try:
+            self.model.save(model_path)
+            joblib.dump({
+                'scalers': self.scalers,
+                'symbols': self.symbols,
+                'feature_columns': self.feature_columns,
+                'extra_features': self.extra_features,
+                'embedding_dim': self.embedding_dim
+            }, scaler_path)
+            self.set_model_version(model_path)
+
+            logger.info("Global model and scalers saved successfully")
+
+        except Exception as e:
+            logger.error(f"Error in save_model: {str(e)}")
+            raise
+
+    def load_model(self, model_path, scaler_path, variant='float', num_threads=None):
+        """Load the saved model and per-symbol scalers"""
+        try:
+            if variant != 'float':
+                raise ValueError("The global model has no quantized variant")
+            self.model = tf.keras.models.load_model(model_path, compile=False)
+            saved_dict = joblib.load(scaler_path)
+            self.scalers = saved_dict['scalers']
+            self.symbols = saved_dict['symbols']
+            self.feature_columns = saved_dict['feature_columns']
+            self.extra_features = saved_dict.get('extra_features', [])
+            self.embedding_dim = saved_dict['embedding_dim']
+            self.set_model_version(model_path)
+
+            logger.info(f"Global model loaded for {len(self.symbols)} symbol(s)")
+
+        except Exception as e:
+            logger.error(f"Error in load_model: {str(e)}")
+            raise
+
+    # Per-symbol features that need a single scaler or Monte Carlo sampling;
+    # the per-symbol models in the registry keep serving these
+    def predict_weekly(self, data, n_samples=None, quantiles=None, features=None):
+        raise ValueError("The global model has no weekly Monte Carlo forecast; use a per-symbol model")
+
+    def calibrate_uncertainty(self, test_data, n_samples=None, max_windows=50):
+        raise ValueError("The global model has no weekly intervals to calibrate; use a per-symbol model")
+
+    def fine_tune(self, data, *args, **kwargs):
+        raise ValueError("The global model can't be fine-tuned per symbol; retrain it with train_global.py")
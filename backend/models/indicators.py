@@ -0,0 +1,294 @@
+# backend/models/indicators.py
+import numpy as np
+import pandas as pd
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Indicator kernels over chronologically sorted bars. Every kernel takes a
+# (time,) vector for one symbol or a (symbols, time) matrix for many and
+# returns arrays of the same shape, oldest bar first. Bars before the warm-up
+# is complete are NaN, as are padding bars (see bar_matrices) while they are
+# inside a window. Rolling and recursive smoothing run over all symbols at
+# once, so a whole universe costs one call per kernel.
+
+# Named indicator columns indicator_columns can compute, with standard parameters
+INDICATOR_FEATURES = ('ATR', 'Stoch_K', 'Stoch_D', 'OBV', 'VWAP', 'ADX', 'Plus_DI', 'Minus_DI',
+                      'KC_middle', 'KC_upper', 'KC_lower', 'RSI_Wilder', 'Close_Z')
+
+
+def _rows(x):
+    """`x` as a float64 (symbols, time) matrix"""
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim not in (1, 2):
+        raise ValueError(f"Expected a (time,) or (symbols, time) array, got shape {x.shape}")
+    return np.atleast_2d(x)
+
+
+def _like(result, reference):
+    """Drop the symbol axis again when the caller passed a single series"""
+    return result[0] if np.ndim(reference) == 1 else result
+
+
+def _by_time(x):
+    # pandas stores a 2D block as (columns, rows), so the time x symbols
+    # frame wraps the matrix without copying it
+    return pd.DataFrame(x.T, copy=False)
+
+
+def _matrix(frame):
+    return frame.to_numpy().T
+
+
+def _previous(x):
+    """Each bar's predecessor, NaN for the first bar"""
+    previous = np.empty_like(x)
+    previous[:, 0] = np.nan
+    previous[:, 1:] = x[:, :-1]
+    return previous
+
+
+def _ratio(numerator, denominator, fill):
+    """numerator / denominator, `fill` where the denominator is zero"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator == 0, fill, numerator / denominator)
+
+
+def _rolling(x, window, reduce):
+    """
+    Reduce every trailing `window` of bars of all symbols at once; NaN until
+    the window is full or while it holds a NaN. `reduce` maps the
+    (symbols, windows, window) strided view to (symbols, windows).
+    """
+    result = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        result[:, window - 1:] = reduce(np.lib.stride_tricks.sliding_window_view(x, window, axis=1))
+    return result
+
+
+def _window_sums(x, window, power=1):
+    """
+    Trailing sums of (x - offset)**power as differences of running totals,
+    NaN until the window is full or while it holds a NaN. The offset is each
+    symbol's mean, which keeps the running totals small. Returns (sums, offset).
+    """
+    missing = np.isnan(x)
+    filled = np.where(missing, 0.0, x)
+    offset = filled.sum(axis=1, keepdims=True) / np.maximum((~missing).sum(axis=1, keepdims=True), 1)
+    centred = np.where(missing, 0.0, filled - offset)
+    totals = np.zeros((x.shape[0], x.shape[1] + 1))
+    np.cumsum(centred ** power if power != 1 else centred, axis=1, out=totals[:, 1:])
+    gaps = np.zeros(totals.shape, dtype=np.int64)
+    np.cumsum(missing, axis=1, out=gaps[:, 1:])
+
+    result = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        sums = totals[:, window:] - totals[:, :-window]
+        result[:, window - 1:] = np.where(gaps[:, window:] > gaps[:, :-window], np.nan, sums)
+    return result, offset
+
+
+def _rolling_sum(x, window):
+    sums, offset = _window_sums(x, window)
+    return sums + window * offset
+
+
+def _rolling_mean(x, window):
+    return _rolling_sum(x, window) / window
+
+
+def _rolling_std(x, window):
+    """Sample standard deviation; the centring cancels out of the variance"""
+    sums, _ = _window_sums(x, window)
+    squares, _ = _window_sums(x, window, power=2)
+    return np.sqrt(np.maximum((squares - sums * sums / window) / (window - 1), 0.0))
+
+
+def _ema(x, span):
+    # Recursive smoothing is sequential in time; pandas' compiled ewm runs it per symbol
+    return _matrix(_by_time(x).ewm(span=span, adjust=False).mean())
+
+
+def _wilder(x, window):
+    """
+    Wilder's smoothing (an EMA with alpha 1/window) seeded with the simple
+    mean of the first `window` values, as in his original definitions.
+    """
+    seed = _rolling_mean(x, window)
+    seeded = ~np.isnan(seed)
+    first = seeded.copy()
+    first[:, 1:] &= ~seeded[:, :-1]
+    start = np.where(first, seed, np.where(seeded, x, np.nan))
+    return _matrix(_by_time(start).ewm(alpha=1 / window, adjust=False).mean())
+
+
+def true_range(high, low, close):
+    """Largest of the bar's range and its gaps from the previous close; NaN for the first bar"""
+    reference = close
+    high, low, close = _rows(high), _rows(low), _rows(close)
+    previous = _previous(close)
+    result = np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+    return _like(result, reference)
+
+
+def atr(high, low, close, window=14):
+    """Average true range with Wilder's smoothing"""
+    return _like(_wilder(_rows(true_range(high, low, close)), window), close)
+
+
+def stochastic(high, low, close, k_window=14, d_window=3):
+    """
+    Stochastic oscillator: %K places the close within the range of the last
+    `k_window` bars (0-100, 50 when the range is flat) and %D is its
+    `d_window`-bar mean. Returns (k, d).
+    """
+    reference = close
+    high, low, close = _rows(high), _rows(low), _rows(close)
+    lowest = _rolling(low, k_window, lambda w: w.min(axis=-1))
+    highest = _rolling(high, k_window, lambda w: w.max(axis=-1))
+    k = _ratio(100 * (close - lowest), highest - lowest, 50.0)
+    d = _rolling_mean(k, d_window)
+    return _like(k, reference), _like(d, reference)
+
+
+def obv(close, volume):
+    """On-balance volume, starting from zero at the first bar"""
+    reference = close
+    close, volume = _rows(close), _rows(volume)
+    direction = np.sign(close - _previous(close))
+    flow = np.nan_to_num(direction * volume, nan=0.0)
+    result = np.cumsum(flow, axis=1)
+    result[np.isnan(close) | np.isnan(volume)] = np.nan
+    return _like(result, reference)
+
+
+def vwap(high, low, close, volume, window=20):
+    """
+    Volume-weighted average of the typical price over the last `window` bars,
+    or since the first bar with window=None. Falls back to the typical price
+    when no volume traded.
+    """
+    reference = close
+    high, low, close, volume = _rows(high), _rows(low), _rows(close), _rows(volume)
+    typical = (high + low + close) / 3
+    if window is None:
+        traded = np.nancumsum(typical * volume, axis=1)
+        total = np.nancumsum(volume, axis=1)
+    else:
+        traded = _rolling_sum(typical * volume, window)
+        total = _rolling_sum(volume, window)
+    return _like(_ratio(traded, total, typical), reference)
+
+
+def adx(high, low, close, window=14):
+    """
+    Wilder's average directional index with the directional indicators it is
+    built from. Returns (adx, plus_di, minus_di), all on a 0-100 scale.
+    """
+    reference = close
+    high, low, close = _rows(high), _rows(low), _rows(close)
+    up = high - _previous(high)
+    down = _previous(low) - low
+    # NaN for the first bar (no previous bar) so the smoothing starts with the true range
+    plus_dm = np.where((up > down) & (up > 0), up, np.where(np.isnan(up), np.nan, 0.0))
+    minus_dm = np.where((down > up) & (down > 0), down, np.where(np.isnan(down), np.nan, 0.0))
+
+    smoothed_range = _wilder(_rows(true_range(high, low, close)), window)
+    plus_di = _ratio(100 * _wilder(plus_dm, window), smoothed_range, 0.0)
+    minus_di = _ratio(100 * _wilder(minus_dm, window), smoothed_range, 0.0)
+    dx = _ratio(100 * np.abs(plus_di - minus_di), plus_di + minus_di, 0.0)
+    return _like(_wilder(dx, window), reference), _like(plus_di, reference), _like(minus_di, reference)
+
+
+def keltner(high, low, close, window=20, atr_window=10, multiplier=2.0):
+    """Keltner channels: an EMA of the close +/- `multiplier` ATRs. Returns (middle, upper, lower)."""
+    reference = close
+    high, low, close = _rows(high), _rows(low), _rows(close)
+    middle = _ema(close, window)
+    width = multiplier * _rows(atr(high, low, close, atr_window))
+    return _like(middle, reference), _like(middle + width, reference), _like(middle - width, reference)
+
+
+def rsi(close, window=14):
+    """Relative strength index with Wilder's smoothing of gains and losses"""
+    reference = close
+    close = _rows(close)
+    delta = close - _previous(close)
+    gain = _wilder(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), window)
+    loss = _wilder(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), window)
+    # No losses in the window: 100, or neutral if the price did not move at all
+    result = _ratio(100 * gain, gain + loss, 50.0)
+    return _like(result, reference)
+
+
+def zscore(x, window=20):
+    """Distance from the rolling mean in rolling standard deviations; 0 when the window is flat"""
+    reference = x
+    x = _rows(x)
+    mean, std = _rolling_mean(x, window), _rolling_std(x, window)
+    return _like(_ratio(x - mean, std, 0.0), reference)
+
+
+def indicator_columns(high, low, close, volume, names=INDICATOR_FEATURES):
+    """
+    Compute the named INDICATOR_FEATURES in one pass over the bars, sharing
+    the kernels behind related columns. Returns {name: array shaped like close}.
+    """
+    unknown = set(names) - set(INDICATOR_FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown indicators: {sorted(unknown)}")
+
+    try:
+        reference = close
+        high, low, close, volume = _rows(high), _rows(low), _rows(close), _rows(volume)
+        wanted = set(names)
+        columns = {}
+        if 'ATR' in wanted:
+            columns['ATR'] = atr(high, low, close)
+        if wanted & {'Stoch_K', 'Stoch_D'}:
+            columns['Stoch_K'], columns['Stoch_D'] = stochastic(high, low, close)
+        if 'OBV' in wanted:
+            columns['OBV'] = obv(close, volume)
+        if 'VWAP' in wanted:
+            columns['VWAP'] = vwap(high, low, close, volume)
+        if wanted & {'ADX', 'Plus_DI', 'Minus_DI'}:
+            columns['ADX'], columns['Plus_DI'], columns['Minus_DI'] = adx(high, low, close)
+        if wanted & {'KC_middle', 'KC_upper', 'KC_lower'}:
+            columns['KC_middle'], columns['KC_upper'], columns['KC_lower'] = keltner(high, low, close)
+        if 'RSI_Wilder' in wanted:
+            columns['RSI_Wilder'] = rsi(close)
+        if 'Close_Z' in wanted:
+            columns['Close_Z'] = zscore(close)
+        return {name: _like(columns[name], reference) for name in names}
+
+    except Exception as e:
+        logger.error(f"Error in indicator_columns: {str(e)}")
+        raise
+
+
+def bar_matrices(df, columns=('Open', 'High', 'Low', 'Close', 'Volume')):
+    """
+    Align a long frame of bars (one Symbol column, or a single symbol without
+    one) on the union of its dates. Returns (symbols, dates, {column: matrix})
+    with (symbols, time) matrices, oldest bar first and NaN where a symbol has
+    no bar on a date.
+    """
+    try:
+        if 'Symbol' in df.columns:
+            groups = [(str(symbol), group) for symbol, group in df.groupby('Symbol', observed=True)]
+        else:
+            groups = [(None, df)]
+        dates = np.unique(pd.to_datetime(df['Date']).to_numpy())
+
+        matrices = {col: np.full((len(groups), len(dates)), np.nan) for col in columns}
+        for i, (_, group) in enumerate(groups):
+            positions = np.searchsorted(dates, pd.to_datetime(group['Date']).to_numpy())
+            for col in columns:
+                matrices[col][i, positions] = pd.to_numeric(group[col], errors='coerce').to_numpy(np.float64)
+        return [symbol for symbol, _ in groups], dates, matrices
+
+    except Exception as e:
+        logger.error(f"Error in bar_matrices: {str(e)}")
+        raise
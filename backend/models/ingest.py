@@ -0,0 +1,173 @@
+# backend/models/ingest.py
+import os
+import glob
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import logging
+from models.schema import to_numeric, compact_frame, memory_report
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_DATE_FORMAT = '%Y-%m-%d'
+NUMERIC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+# Duplicates and gaps listed in a report; the counts cover all of them
+MAX_REPORTED = 20
+
+
+@dataclass
+class IngestReport:
+    """Outcome of ingesting one export file"""
+    path: str
+    rows: int = 0
+    rejected_rows: int = 0
+    invalid_values: Dict[str, int] = field(default_factory=dict)
+    duplicate_dates: int = 0
+    duplicates: List[str] = field(default_factory=list)
+    gap_count: int = 0
+    gaps: List[Dict] = field(default_factory=list)
+    chunks: int = 0
+    seconds: float = 0.0
+    # Per-symbol bytes of the parsed chunks before compaction, if measured
+    memory_before: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        return {**asdict(self), 'rows_per_sec': self.rows_per_sec}
+
+
+class CSVIngestor:
+    """
+    Chunked reader for nepsealpha price exports. Thousands separators and
+    dates are parsed by pandas' C engine; string cleaning only runs for a
+    column the engine could not parse as numbers. Each chunk is converted to
+    the compact schema before the next is read, so peak memory is bounded by
+    the chunk size plus the compact result.
+    """
+
+    def __init__(self, chunk_rows=100_000, max_gap_days=7, drop_duplicates=True, measure_memory=False):
+        self.chunk_rows = int(chunk_rows)
+        self.max_gap_days = max_gap_days
+        self.drop_duplicates = drop_duplicates
+        self.measure_memory = measure_memory
+
+    def iter_chunks(self, path, report=None):
+        """
+        Yield compact, validated chunks of an export in file order.
+        Rows without a valid Date or Close are rejected and counted in `report`.
+        """
+        report = report if report is not None else IngestReport(path)
+        reader = pd.read_csv(path, chunksize=self.chunk_rows, thousands=',', parse_dates=['Date'],
+                             date_format=EXPORT_DATE_FORMAT, engine='c')
+        for chunk in reader:
+            report.chunks += 1
+            if not pd.api.types.is_datetime64_any_dtype(chunk['Date']):
+                # Only a chunk holding a malformed date takes the coercing path
+                chunk['Date'] = pd.to_datetime(chunk['Date'], format=EXPORT_DATE_FORMAT, errors='coerce')
+            for col in NUMERIC_COLUMNS + ['Percent Change']:
+                if col in chunk.columns:
+                    values = chunk[col]
+                    chunk[col] = to_numeric(values)
+                    invalid = int((chunk[col].isna() & values.notna()).sum())
+                    if invalid:
+                        report.invalid_values[col] = report.invalid_values.get(col, 0) + invalid
+
+            valid = chunk['Date'].notna() & chunk['Close'].notna()
+            report.rejected_rows += int((~valid).sum())
+            report.rows += int(valid.sum())
+            chunk = chunk[valid]
+            if self.measure_memory:
+                for symbol, size in memory_report(chunk).items():
+                    report.memory_before[symbol] = report.memory_before.get(symbol, 0) + size
+            yield compact_frame(chunk)
+
+    def load(self, path):
+        """Read a whole export; returns (frame in file order, IngestReport)"""
+        try:
+            start = time.perf_counter()
+            report = IngestReport(path)
+            chunks = list(self.iter_chunks(path, report))
+            df = pd.concat(chunks, ignore_index=True) if chunks else compact_frame(
+                pd.read_csv(path, nrows=0, parse_dates=['Date']))
+            if 'Symbol' in df.columns:
+                # Chunks categorize symbols independently; concat falls back to object
+                df['Symbol'] = df['Symbol'].astype('category')
+
+            df = self._check_dates(df, report)
+            report.seconds = time.perf_counter() - start
+            logger.info(f"Ingested {report.rows} rows from {os.path.basename(path)} "
+                        f"({report.rows_per_sec:,.0f} rows/s, {report.rejected_rows} rejected, "
+                        f"{report.duplicate_dates} duplicate date(s), {report.gap_count} gap(s))")
+            return df, report
+
+        except Exception as e:
+            logger.error(f"Error ingesting {path}: {str(e)}")
+            raise
+
+    def _check_dates(self, df, report):
+        """Record duplicate dates and calendar gaps per symbol, dropping repeats if configured"""
+        keys = ['Symbol', 'Date'] if 'Symbol' in df.columns else ['Date']
+        duplicated = df.duplicated(keys, keep='first').to_numpy()
+        report.duplicate_dates = int(duplicated.sum())
+        report.duplicates = [f"{row.get('Symbol', '')} {row['Date']:%Y-%m-%d}".strip()
+                             for row in df.loc[duplicated, keys].head(MAX_REPORTED).to_dict('records')]
+        if self.drop_duplicates and report.duplicate_dates:
+            df = df.loc[~duplicated].reset_index(drop=True)
+            report.rows -= report.duplicate_dates
+
+        groups = df.groupby('Symbol', observed=True)['Date'] if 'Symbol' in df.columns else [(None, df['Date'])]
+        for symbol, dates in groups:
+            dates = np.unique(dates.to_numpy())
+            days = np.diff(dates) / np.timedelta64(1, 'D')
+            gaps = np.flatnonzero(days > self.max_gap_days)
+            report.gap_count += len(gaps)
+            for i in gaps[:MAX_REPORTED - len(report.gaps)]:
+                report.gaps.append({
+                    'symbol': None if symbol is None else str(symbol),
+                    'after': pd.Timestamp(dates[i]).strftime('%Y-%m-%d'),
+                    'before': pd.Timestamp(dates[i + 1]).strftime('%Y-%m-%d'),
+                    'days': int(days[i])
+                })
+        return df
+
+
+def _load_file(task):
+    """Ingest one file (runs in a worker)"""
+    ingestor = CSVIngestor(**task['options'])
+    return ingestor.load(task['path'])
+
+
+def import_directory(directory, pattern='*.csv', max_workers=None, **options):
+    """
+    Ingest every export in `directory` on a process pool.
+    Returns ({path: frame}, {path: IngestReport}, elapsed seconds).
+    """
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No files matching {pattern} in {directory}")
+
+    start = time.perf_counter()
+    tasks = [{'path': path, 'options': options} for path in paths]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        results = [_load_file(task) for task in tasks]
+    else:
+        # Spawned workers keep the caller's TensorFlow state out of the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(_load_file, tasks))
+
+    frames = {path: df for path, (df, _) in zip(paths, results)}
+    reports = {path: report for path, (_, report) in zip(paths, results)}
+    seconds = time.perf_counter() - start
+    logger.info(f"Imported {sum(r.rows for r in reports.values())} rows from {len(paths)} file(s) "
+                f"on {workers} process(es) in {seconds:.2f}s")
+    return frames, reports, seconds
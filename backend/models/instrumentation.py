@@ -0,0 +1,249 @@
+# backend/models/instrumentation.py
+import os
+import time
+import random
+import bisect
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, upper bounds as in Prometheus histograms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Peak allocation buckets in bytes, 64 KiB to 1 GiB in factors of four
+ALLOCATION_BUCKETS = tuple(float(4 ** k * 1024) for k in range(3, 11))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class AllocationFrame:
+    """Peak traced memory of one profiled block, in bytes above its starting point"""
+
+    def __init__(self, start):
+        self.start = start
+        self.seen = start
+        self.peak = 0
+        self.stages = {}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of counters, gauges and histograms.
+    With `profile_allocations` every stage (and each unit of work wrapped in
+    start_allocation_profile/end_allocation_profile) also records its peak
+    tracemalloc allocation. tracemalloc is process-wide, so the figures are
+    exact only while one unit of work runs at a time (e.g. one request thread).
+    """
+
+    def __init__(self, sample_rate=1.0, profile_allocations=False):
+        self.sample_rate = sample_rate
+        self.profile_allocations = profile_allocations
+        if profile_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.help = {}
+        self.buckets = {}
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def describe(self, name, text, buckets=None):
+        self.help[name] = text
+        if buckets is not None:
+            self.buckets[name] = tuple(buckets)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def clear_gauge(self, name):
+        with self._lock:
+            self.gauges = {key: value for key, value in self.gauges.items() if key[0] != name}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def start_sample(self):
+        """Decide whether the current unit of work (e.g. a request) is sampled"""
+        sampled = self.sample_rate >= 1.0 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        self._local.sampled = sampled
+        return sampled
+
+    def end_sample(self):
+        self._local.sampled = None
+
+    @property
+    def sampled(self):
+        sampled = getattr(self._local, 'sampled', None)
+        if sampled is None:
+            # Outside a sampled unit of work each call decides on its own
+            return self.sample_rate >= 1.0 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        return sampled
+
+    def stage(self, name):
+        """Context manager recording the latency (and, when profiling, peak allocation) of a pipeline stage"""
+        sampled = self.sampled
+        if not sampled and not self.profile_allocations:
+            return nullcontext()
+        return self._stage(name, sampled)
+
+    @contextmanager
+    def _stage(self, name, sampled):
+        timed = self._timed('stage_latency_seconds', stage=name) if sampled else nullcontext()
+        profiled = self._traced() if self.profile_allocations else nullcontext()
+        with timed, profiled as frame:
+            yield
+        if frame is not None:
+            self.observe('stage_peak_allocation_bytes', frame.peak, stage=name)
+            stack = getattr(self._local, 'allocations', None)
+            if stack:
+                # Report the stage with the outermost unit of work it ran in
+                stack[0].stages[name] = max(stack[0].stages.get(name, 0), frame.peak)
+
+    @contextmanager
+    def _timed(self, metric, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def _traced(self):
+        frame = self._push_allocation_frame()
+        try:
+            yield frame
+        finally:
+            self._pop_allocation_frame(frame)
+
+    def _push_allocation_frame(self):
+        # Nested frames share tracemalloc's single peak: fold the peak so far
+        # into the enclosing frame before resetting it for this one
+        stack = self._local.__dict__.setdefault('allocations', [])
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1].seen = max(stack[-1].seen, peak)
+        tracemalloc.reset_peak()
+        frame = AllocationFrame(current)
+        stack.append(frame)
+        return frame
+
+    def _pop_allocation_frame(self, frame):
+        stack = self._local.allocations
+        stack.remove(frame)
+        peak = max(frame.seen, tracemalloc.get_traced_memory()[1])
+        frame.peak = max(peak - frame.start, 0)
+        if stack:
+            stack[-1].seen = max(stack[-1].seen, peak)
+
+    def start_allocation_profile(self):
+        """Start tracing the current unit of work (e.g. a request); None unless profiling"""
+        if not self.profile_allocations:
+            return None
+        return self._push_allocation_frame()
+
+    def end_allocation_profile(self, frame, **labels):
+        """Record the unit of work's peak allocation; returns (peak bytes, {stage: peak bytes})"""
+        if frame is None:
+            return None
+        self._pop_allocation_frame(frame)
+        self.observe('request_peak_allocation_bytes', frame.peak, **labels)
+        return frame.peak, frame.stages
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count)
+                          for key, h in self.histograms.items()}
+
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, 'gauge')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _sample_rate_from_env():
+    try:
+        return min(max(float(os.environ.get('METRICS_SAMPLE_RATE', '1.0')), 0.0), 1.0)
+    except ValueError:
+        logger.warning("Invalid METRICS_SAMPLE_RATE, falling back to 1.0")
+        return 1.0
+
+
+# Process-wide registry; set METRICS_SAMPLE_RATE=0 to turn latency sampling off
+# and PROFILE_ALLOCATIONS=1 to trace peak allocations per request and stage
+metrics = MetricsRegistry(sample_rate=_sample_rate_from_env(),
+                          profile_allocations=os.environ.get('PROFILE_ALLOCATIONS') == '1')
+metrics.describe('request_latency_seconds', 'Latency of HTTP requests per endpoint')
+metrics.describe('stage_latency_seconds', 'Latency of request pipeline stages')
+metrics.describe('requests_total', 'HTTP requests per endpoint and status code')
+metrics.describe('cache_requests_total', 'Cache lookups per cache and result')
+metrics.describe('model_info', 'Currently loaded model version')
+metrics.describe('request_peak_allocation_bytes', 'Peak traced allocation of HTTP requests per endpoint',
+                 buckets=ALLOCATION_BUCKETS)
+metrics.describe('stage_peak_allocation_bytes', 'Peak traced allocation of request pipeline stages',
+                 buckets=ALLOCATION_BUCKETS)
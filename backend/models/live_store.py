@@ -0,0 +1,328 @@
+# backend/models/live_store.py
+import threading
+import numpy as np
+import pandas as pd
+import logging
+from models.range_query import RangeQueryIndex, GrowableArray
+from models.trading_strategy import TradingStrategy, score_signals, make_signal, SIGNAL_COLUMNS
+from models.schema import PRICE_DECIMALS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Lookback lengths used by TradingStrategy.prepare_data
+EMA_SPANS = (9, 12, 21, 26)
+SIGNAL_SPAN = 9
+RSI_WINDOW = 14
+BB_WINDOW = 20
+VOLUME_WINDOW = 20
+
+
+def parse_bar(bar):
+    """Validate one incoming OHLCV bar and convert it to typed values"""
+    fields = {key.lower(): value for key, value in bar.items()}
+    missing = [field for field in ['Date'] + BAR_FIELDS if field.lower() not in fields]
+    if missing:
+        raise ValueError(f"Bar is missing fields: {missing}")
+
+    parsed = {'Date': pd.Timestamp(fields['date'])}
+    for field in BAR_FIELDS:
+        value = fields[field.lower()]
+        if isinstance(value, str):
+            value = value.replace(',', '')
+        try:
+            parsed[field] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field} value in bar dated {parsed['Date'].date()}: {value!r}")
+        if not np.isfinite(parsed[field]) or parsed[field] < 0:
+            raise ValueError(f"Invalid {field} value in bar dated {parsed['Date'].date()}: {value!r}")
+
+    if parsed['High'] < parsed['Low']:
+        raise ValueError(f"High is below Low in bar dated {parsed['Date'].date()}")
+    return parsed
+
+
+def compute_indicators(df):
+    """Full indicator columns of a chronological frame, as TradingStrategy computes them"""
+    prepared = TradingStrategy(df).prepare_data()
+    indicators = {col: prepared[col].to_numpy() for col in prepared.columns if col != 'Symbol'}
+    for span in (12, 26):
+        indicators[f"EMA_{span}"] = prepared['Close'].ewm(span=span, adjust=False).mean().to_numpy(dtype=np.float64)
+    return indicators
+
+
+class SymbolStream:
+    """Bars of one symbol plus the indicator state needed to score the newest bar"""
+
+    def __init__(self, symbol, df):
+        self.symbol = symbol
+        df = df.sort_values('Date')
+        self.index = RangeQueryIndex.from_frame(df)
+        self.open = GrowableArray(df['Open'].to_numpy(dtype=np.float64).round(PRICE_DECIMALS))
+        self.volume = GrowableArray(df['Volume'].to_numpy(dtype=np.float64))
+
+        # Seed indicator state from a full computation over the history
+        self._seed_state(compute_indicators(df))
+
+    @classmethod
+    def from_arrays(cls, symbol, arrays):
+        """Rebuild a stream from export_arrays() output without copying the arrays"""
+        stream = cls.__new__(cls)
+        stream.symbol = symbol
+        stream.index = RangeQueryIndex.from_arrays(arrays)
+        stream.open = GrowableArray.wrap(arrays['Open'])
+        stream.volume = GrowableArray.wrap(arrays['Volume'])
+        stream._seed_state(arrays)
+        return stream
+
+    def _seed_state(self, indicators):
+        """Take indicator state from the last two rows of full indicator columns"""
+        rows = [{col: float(indicators[col][i]) for col in SIGNAL_COLUMNS}
+                for i in range(max(len(indicators['Close']) - 2, 0), len(indicators['Close']))]
+        self.prev, self.current = (rows if len(rows) == 2 else [None] + rows)
+        self.current_date = pd.Timestamp(indicators['Date'][-1])
+        self.ema = {span: float(indicators[f"EMA_{span}"][-1]) for span in EMA_SPANS}
+        self.signal_line = float(indicators['Signal_Line'][-1])
+        self.last_signal = self.evaluate()
+
+    def export_arrays(self):
+        """Price, index and full indicator arrays of this stream, keyed by column name"""
+        arrays = self.index.export_arrays()
+        arrays['Open'] = self.open.values
+        arrays['Volume'] = self.volume.values
+        for col, values in compute_indicators(self.frame()).items():
+            # High/Low are already exported as the sparse tables' first level
+            if col not in ('High', 'Low'):
+                arrays.setdefault(col, values)
+        return arrays
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.index.dates[len(self.index) - 1])
+
+    def append(self, bar):
+        """Append one parsed bar and update indicators for it only"""
+        if bar['Date'] <= self.last_date:
+            raise ValueError(f"Bar dated {bar['Date'].date()} is not newer than the latest "
+                             f"{self.symbol} bar ({self.last_date.date()})")
+
+        close = bar['Close']
+        self.index.append(bar['Date'], bar['High'], bar['Low'], close, bar['Volume'])
+        self.open.append(bar['Open'])
+        self.volume.append(bar['Volume'])
+
+        # Exponential averages update recursively, as ewm(adjust=False) does
+        for span in EMA_SPANS:
+            alpha = 2 / (span + 1)
+            self.ema[span] = alpha * close + (1 - alpha) * self.ema[span]
+        macd = self.ema[12] - self.ema[26]
+        alpha = 2 / (SIGNAL_SPAN + 1)
+        self.signal_line = alpha * macd + (1 - alpha) * self.signal_line
+
+        # Rolling indicators only need the trailing window
+        closes = self.index.close.values[-max(RSI_WINDOW + 1, BB_WINDOW):]
+        volumes = self.volume.values[-VOLUME_WINDOW:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.nan
+            if len(closes) > RSI_WINDOW:
+                delta = np.diff(closes[-(RSI_WINDOW + 1):])
+                gain = np.where(delta > 0, delta, 0).mean()
+                loss = np.where(delta < 0, -delta, 0).mean()
+                rsi = 100 - (100 / (1 + gain / loss))
+
+            bb_upper = bb_lower = np.nan
+            if len(closes) >= BB_WINDOW:
+                window = closes[-BB_WINDOW:]
+                bb_middle, bb_std = window.mean(), window.std(ddof=1)
+                bb_upper, bb_lower = bb_middle + bb_std * 2, bb_middle - bb_std * 2
+
+            volume_ratio = np.nan
+            if len(volumes) >= VOLUME_WINDOW:
+                volume_ratio = bar['Volume'] / volumes.mean()
+
+        current = {
+            'Close': close,
+            'EMA_9': self.ema[9],
+            'EMA_21': self.ema[21],
+            'RSI': rsi,
+            'MACD': macd,
+            'MACD_Hist': macd - self.signal_line,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+            'Volume_Ratio': volume_ratio
+        }
+        # Forward fill missing values like prepare_data does
+        for col, value in current.items():
+            if not np.isfinite(value) and self.current is not None:
+                value = self.current[col]
+            current[col] = float(value)
+
+        self.prev, self.current = self.current, current
+        self.current_date = bar['Date']
+        self.last_signal = self.evaluate()
+        return self.last_signal
+
+    def frame(self, tail=None):
+        """The latest `tail` bars (all if None) as a chronological OHLCV DataFrame"""
+        start = 0 if tail is None else max(len(self) - tail, 0)
+        return pd.DataFrame({
+            'Date': self.index.dates.values[start:],
+            'Open': self.open.values[start:],
+            'High': self.index.high.levels[0].values[start:],
+            'Low': self.index.low.levels[0].values[start:],
+            'Close': self.index.close.values[start:],
+            'Volume': self.volume.values[start:]
+        })
+
+    def evaluate(self):
+        """Apply the TradingStrategy rules to the newest bar"""
+        if self.prev is None:
+            return None
+        buy_confidence, sell_confidence = score_signals(self.prev, self.current)
+        if buy_confidence >= 0.5:
+            return make_signal(self.current_date, 'buy', float(buy_confidence), self.current)
+        if sell_confidence >= 0.5:
+            return make_signal(self.current_date, 'sell', float(sell_confidence), self.current)
+        return None
+
+    def snapshot(self):
+        """Latest bar, indicators and signal as plain Python values"""
+        return {
+            'symbol': self.symbol,
+            'date': self.current_date.strftime('%Y-%m-%d'),
+            'indicators': {col: float(value) for col, value in self.current.items()},
+            'signal': vars(self.last_signal) if self.last_signal else None
+        }
+
+
+class LiveBarStore:
+    """In-memory per-symbol bar store with incremental signal evaluation"""
+
+    def __init__(self):
+        self.streams = {}
+        self.lock = threading.RLock()
+        # Latest indicator rows of every symbol, rebuilt lazily after a change
+        self._latest = None
+
+    def load_frame(self, df, default_symbol=None):
+        """Replace the store contents with the bars in `df`"""
+        try:
+            if 'Symbol' not in df.columns:
+                df = df.assign(Symbol=default_symbol)
+            streams = {str(symbol): SymbolStream(str(symbol), group)
+                       for symbol, group in df.groupby('Symbol', observed=True)}
+            with self.lock:
+                self.streams = streams
+                self._latest = None
+            logger.info(f"Loaded {len(df)} bars for {len(streams)} symbol(s) into the live store")
+        except Exception as e:
+            logger.error(f"Error in load_frame: {str(e)}")
+            raise
+
+    def load_shared(self, reader):
+        """Replace the store contents with streams backed by a shared array snapshot"""
+        streams = {symbol: SymbolStream.from_arrays(symbol, reader.arrays(symbol))
+                   for symbol in reader.symbols()}
+        with self.lock:
+            self.streams = streams
+            self._latest = None
+        logger.info(f"Attached live store to shared arrays version {reader.version}")
+
+    def export_arrays(self):
+        with self.lock:
+            return {symbol: stream.export_arrays() for symbol, stream in self.streams.items()}
+
+    def symbols(self):
+        with self.lock:
+            return list(self.streams)
+
+    def __contains__(self, symbol):
+        with self.lock:
+            return symbol in self.streams
+
+    def ingest(self, symbol, bars):
+        """
+        Append bars for one symbol in date order and score each new bar.
+        Returns one snapshot per appended bar.
+        """
+        return self.ingest_batch({symbol: bars})[symbol]
+
+    def ingest_batch(self, bars_by_symbol):
+        """
+        Append bars of several symbols, {symbol: bars}. Every bar is validated
+        before any is appended, so a rejected batch leaves the store unchanged.
+        Returns {symbol: one snapshot per appended bar}.
+        """
+        with self.lock:
+            parsed = {symbol: self._validate(symbol, bars) for symbol, bars in bars_by_symbol.items()}
+            self._latest = None
+            return {symbol: self._append(symbol, bars) for symbol, bars in parsed.items()}
+
+    def _validate(self, symbol, bars):
+        """Parsed bars in date order; dates must be unique and newer than the stored ones"""
+        parsed = sorted((parse_bar(bar) for bar in bars), key=lambda bar: bar['Date'])
+        if not parsed:
+            raise ValueError("No bars provided")
+        for previous, bar in zip(parsed, parsed[1:]):
+            if bar['Date'] == previous['Date']:
+                raise ValueError(f"Duplicate {symbol} bar dated {bar['Date'].date()}")
+        stream = self.streams.get(symbol)
+        if stream is not None and parsed[0]['Date'] <= stream.last_date:
+            raise ValueError(f"Bar dated {parsed[0]['Date'].date()} is not newer than the latest "
+                             f"{symbol} bar ({stream.last_date.date()})")
+        return parsed
+
+    def _append(self, symbol, parsed):
+        results = []
+        stream = self.streams.get(symbol)
+        if stream is None:
+            # A new symbol is seeded from its first bar
+            stream = SymbolStream(symbol, pd.DataFrame(parsed[:1]))
+            self.streams[symbol] = stream
+            results.append(stream.snapshot())
+            parsed = parsed[1:]
+        for bar in parsed:
+            stream.append(bar)
+            results.append(stream.snapshot())
+        return results
+
+    def latest_indicators(self):
+        """
+        Previous and current indicator rows of every symbol with at least two
+        bars, as symbols x SIGNAL_COLUMNS matrices: (symbols, dates, prev, current).
+        """
+        with self.lock:
+            if self._latest is None:
+                streams = [stream for stream in self.streams.values() if stream.prev is not None]
+                self._latest = (
+                    np.array([stream.symbol for stream in streams], dtype=object),
+                    np.array([stream.current_date for stream in streams], dtype='datetime64[ns]'),
+                    np.array([[stream.prev[col] for col in SIGNAL_COLUMNS] for stream in streams],
+                             dtype=np.float64).reshape(len(streams), len(SIGNAL_COLUMNS)),
+                    np.array([[stream.current[col] for col in SIGNAL_COLUMNS] for stream in streams],
+                             dtype=np.float64).reshape(len(streams), len(SIGNAL_COLUMNS))
+                )
+            return self._latest
+
+    def invalidate(self):
+        """Drop the cached latest_indicators matrices so the next call rebuilds them"""
+        with self.lock:
+            self._latest = None
+
+    def metrics(self, symbol, windows=()):
+        with self.lock:
+            return self.streams[symbol].index.metrics(windows)
+
+    def snapshot(self, symbol):
+        with self.lock:
+            return self.streams[symbol].snapshot()
+
+    def frame(self, symbol, tail=None):
+        with self.lock:
+            return self.streams[symbol].frame(tail)
@@ -0,0 +1,103 @@
+# backend/models/model_registry.py
+import os
+import json
+import shutil
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = 'metadata.json'
+MODEL_FILE = 'stock_model.h5'
+SCALER_FILE = 'scaler.pkl'
+RUN_FILE = 'run.json'
+
+
+class ModelRegistry:
+    """
+    Per-symbol model artifacts: one directory per symbol holding the model,
+    its scaler, training checkpoints and a metadata file. The metadata is
+    removed before a symbol is retrained and replaced atomically once its
+    artifacts are saved, so a symbol with metadata always has a complete model.
+    Checkpoints are tagged with the data version and options of their run and
+    only resumed by a run with the same ones.
+    """
+
+    def __init__(self, root='models/registry'):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, str(symbol))
+
+    def paths(self, symbol):
+        directory = self._symbol_dir(symbol)
+        return {
+            'model': os.path.join(directory, MODEL_FILE),
+            'scaler': os.path.join(directory, SCALER_FILE),
+            'checkpoints': os.path.join(directory, 'checkpoints'),
+            'metadata': os.path.join(directory, METADATA_FILE)
+        }
+
+    def metadata(self, symbol):
+        try:
+            with open(self.paths(symbol)['metadata']) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def is_current(self, symbol, data_version, options):
+        """True if the symbol's model was trained on this data with these options"""
+        metadata = self.metadata(symbol)
+        paths = self.paths(symbol)
+        return (metadata is not None
+                and metadata.get('data_version') == data_version
+                and metadata.get('options') == options
+                and os.path.exists(paths['model']) and os.path.exists(paths['scaler']))
+
+    def begin(self, symbol, run=None):
+        """
+        Mark a symbol as being retrained; returns its artifact paths.
+        `run` ({'data_version', 'options'}) identifies the training run;
+        checkpoints an interrupted run with other data or options left behind
+        are discarded so they are never resumed.
+        """
+        paths = self.paths(symbol)
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        if os.path.exists(paths['metadata']):
+            os.remove(paths['metadata'])
+
+        if run is not None:
+            run = json.loads(json.dumps(run))
+            run_path = os.path.join(paths['checkpoints'], RUN_FILE)
+            try:
+                with open(run_path) as f:
+                    previous = json.load(f)
+            except FileNotFoundError:
+                previous = None
+            if previous != run:
+                if os.path.isdir(paths['checkpoints']):
+                    logger.info(f"Discarding checkpoints of an earlier {symbol} run with other data or options")
+                shutil.rmtree(paths['checkpoints'], ignore_errors=True)
+                os.makedirs(paths['checkpoints'])
+                with open(run_path, 'w') as f:
+                    json.dump(run, f, indent=2)
+        return paths
+
+    def commit(self, symbol, metadata):
+        """Record a finished training run once its artifacts are saved"""
+        path = self.paths(symbol)['metadata']
+        with open(path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def remove(self, symbol):
+        shutil.rmtree(self._symbol_dir(symbol), ignore_errors=True)
+
+    def symbols(self):
+        """Symbols with a complete model"""
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, METADATA_FILE)))
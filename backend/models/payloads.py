@@ -0,0 +1,76 @@
+# backend/models/payloads.py
+import numpy as np
+import pandas as pd
+import logging
+from models.schema import to_numeric
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+REQUIRED_FIELDS = ['Date', 'Close']
+
+
+def parse_prices(prices, fill_from_close=False):
+    """
+    Parse a `prices` payload into a typed OHLCV DataFrame, keeping row order.
+    Accepts a list of per-bar records or a columnar object holding one array
+    per field; unknown fields are dropped. With `fill_from_close`, missing
+    Open/High/Low/Volume fields are filled from Close.
+    """
+    if isinstance(prices, dict):
+        fields = {key: prices[key] for key in ['Date'] + NUMERIC_FIELDS if key in prices}
+        for key, values in fields.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Columnar field {key} must be an array")
+    elif isinstance(prices, list):
+        if not all(isinstance(bar, dict) for bar in prices):
+            raise ValueError("Every entry of a prices list must be an object")
+        records = pd.DataFrame.from_records(prices)
+        fields = {key: records[key].to_numpy() for key in ['Date'] + NUMERIC_FIELDS if key in records}
+    else:
+        raise ValueError("prices must be a list of bars or an object of arrays")
+
+    missing = [key for key in REQUIRED_FIELDS if key not in fields]
+    if missing:
+        raise ValueError(f"prices is missing fields: {missing}")
+    lengths = {key: len(values) for key, values in fields.items()}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"Columnar fields differ in length: {lengths}")
+    if not lengths['Close']:
+        raise ValueError("prices is empty")
+
+    columns = {'Date': _parse_dates(fields['Date'])}
+    close = _parse_numbers('Close', fields['Close'])
+    for key in NUMERIC_FIELDS:
+        if key in fields:
+            columns[key] = close if key == 'Close' else _parse_numbers(key, fields[key])
+        elif fill_from_close:
+            columns[key] = close
+    return pd.DataFrame(columns)
+
+
+def _parse_dates(values):
+    try:
+        return pd.to_datetime(np.asarray(values))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid Date values: {str(e)}")
+
+
+def _parse_numbers(key, values):
+    """float64 array of one numeric field; only string input goes through cleaning"""
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Exported strings such as "1,234.50"
+        array = to_numeric(pd.Series(values, dtype=object)).to_numpy(dtype=np.float64)
+    if array.ndim != 1:
+        raise ValueError(f"{key} must be a flat array of numbers")
+
+    invalid = ~np.isfinite(array) | (array < 0)
+    if invalid.any():
+        row = int(np.argmax(invalid))
+        value = values[row].item() if isinstance(values[row], np.generic) else values[row]
+        raise ValueError(f"Invalid {key} value at row {row}: {value!r}")
+    return array
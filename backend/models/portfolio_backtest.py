@@ -0,0 +1,194 @@
+# backend/models/portfolio_backtest.py
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict
+from models.trading_strategy import compute_signal_scores
+from models.schema import PRICE_DECIMALS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SIZING_RULES = ('equal', 'confidence', 'fixed_fraction')
+TRADING_DAYS_PER_YEAR = 252
+
+
+class PortfolioBacktester:
+    """
+    Runs TradingStrategy signals for many symbols on one shared cash account.
+    Prices, signal confidence, positions and cash are held as aligned
+    dates x symbols arrays; trades execute at the close of the signal bar,
+    exits before entries so freed cash can be reused the same day.
+    """
+
+    def __init__(self, data, initial_capital=100000, max_positions=10, sizing='equal',
+                 position_fraction=0.1, transaction_cost_bps=10.0, cash_buffer=0.05,
+                 min_confidence=0.5):
+        if sizing not in SIZING_RULES:
+            raise ValueError(f"Unknown sizing rule {sizing!r}, expected one of {SIZING_RULES}")
+        if max_positions < 1:
+            raise ValueError("max_positions must be at least 1")
+
+        self.initial_capital = float(initial_capital)
+        self.max_positions = int(max_positions)
+        self.sizing = sizing
+        self.position_fraction = float(position_fraction)
+        self.cost_rate = float(transaction_cost_bps) / 10000
+        self.cash_buffer = float(cash_buffer)
+        self.min_confidence = float(min_confidence)
+
+        # Accept {symbol: frame} or one long frame with a Symbol column
+        if isinstance(data, pd.DataFrame):
+            data = {str(symbol): group for symbol, group in data.groupby('Symbol', observed=True)}
+        self._build_matrices(data)
+
+    def _build_matrices(self, frames):
+        """Score every symbol and align prices and confidence on the union of dates"""
+        try:
+            scores = {symbol: compute_signal_scores(df) for symbol, df in frames.items() if len(df)}
+            self.symbols = list(scores)
+            self.dates = np.unique(np.concatenate([s['Date'].to_numpy() for s in scores.values()]))
+
+            shape = (len(self.dates), len(self.symbols))
+            close = np.full(shape, np.nan)
+            self.buy = np.zeros(shape)
+            self.sell = np.zeros(shape)
+            for j, s in enumerate(scores.values()):
+                rows = np.searchsorted(self.dates, s['Date'].to_numpy())
+                close[rows, j] = s['Close'].to_numpy().round(PRICE_DECIMALS)
+                self.buy[rows, j] = s['buy'].to_numpy()
+                self.sell[rows, j] = s['sell'].to_numpy()
+
+            # A symbol only trades on days it has a bar; in between (and after
+            # its last bar) holdings are valued at the last close
+            self.tradable = ~np.isnan(close)
+            self.prices = np.nan_to_num(pd.DataFrame(close).ffill().to_numpy(), nan=0.0)
+            logger.info(f"Aligned {shape[1]} symbol(s) over {shape[0]} dates for portfolio backtest")
+
+        except Exception as e:
+            logger.error(f"Error building portfolio matrices: {str(e)}")
+            raise
+
+    def _target_values(self, equity, confidence):
+        """Value to allocate to each new position under the sizing rule"""
+        if self.sizing == 'fixed_fraction':
+            return np.full(len(confidence), equity * self.position_fraction)
+        slot = equity * (1 - self.cash_buffer) / self.max_positions
+        if self.sizing == 'confidence':
+            return slot * confidence
+        return np.full(len(confidence), slot)
+
+    def run(self) -> Dict:
+        """Simulate the portfolio and return equity, per-symbol contribution and turnover"""
+        try:
+            n_dates, n_symbols = self.prices.shape
+            self.positions = np.zeros((n_dates, n_symbols))
+            self.cash = np.zeros(n_dates)
+            self.traded = np.zeros((n_dates, n_symbols))
+            self.costs = np.zeros((n_dates, n_symbols))
+
+            held = np.zeros(n_symbols)
+            balance = self.initial_capital
+            for t in range(n_dates):
+                price, tradable = self.prices[t], self.tradable[t]
+
+                # Exits: sell whole positions on a sell signal. A buy signal on the
+                # same bar takes precedence, as in generate_signals, so a held
+                # position isn't sold and bought straight back
+                buying = self.buy[t] >= self.min_confidence
+                exits = (self.sell[t] >= self.min_confidence) & ~buying & (held > 0) & tradable
+                if exits.any():
+                    value = held[exits] * price[exits]
+                    fee = value * self.cost_rate
+                    balance += (value - fee).sum()
+                    self.traded[t, exits] = -value
+                    self.costs[t, exits] = fee
+                    held[exits] = 0
+
+                # Entries: strongest buy signals first, up to the free slots
+                candidates = np.flatnonzero(buying & (held == 0) & tradable)
+                slots = self.max_positions - np.count_nonzero(held)
+                if candidates.size and slots > 0:
+                    if candidates.size > slots:
+                        order = np.argsort(-self.buy[t, candidates], kind='stable')[:slots]
+                        candidates = candidates[order]
+                    equity = balance + held @ price
+                    target = self._target_values(equity, self.buy[t, candidates])
+
+                    # Scale down when the orders would eat into the cash buffer
+                    budget = max(balance - equity * self.cash_buffer, 0.0)
+                    required = target.sum() * (1 + self.cost_rate)
+                    if required > budget:
+                        target *= budget / required
+
+                    shares = np.floor(target / (price[candidates] * (1 + self.cost_rate)))
+                    value = shares * price[candidates]
+                    fee = value * self.cost_rate
+                    balance -= (value + fee).sum()
+                    held[candidates] = shares
+                    self.traded[t, candidates] = value
+                    self.costs[t, candidates] = fee
+
+                self.positions[t] = held
+                self.cash[t] = balance
+
+            self.equity = self.cash + (self.positions * self.prices).sum(axis=1)
+            return self._summarize()
+
+        except Exception as e:
+            logger.error(f"Error in portfolio backtest: {str(e)}")
+            raise
+
+    def _summarize(self):
+        # Mark-to-market P&L per symbol; contributions sum to the total P&L
+        price_change = np.diff(self.prices, axis=0)
+        pnl = (self.positions[:-1] * price_change).sum(axis=0) - self.costs.sum(axis=0)
+        trades = np.count_nonzero(self.traded, axis=0)
+        traded_value = np.abs(self.traded).sum(axis=0)
+
+        final_value = float(self.equity[-1]) if len(self.equity) else self.initial_capital
+        running_peak = np.maximum.accumulate(self.equity)
+        max_drawdown = float(((self.equity - running_peak) / running_peak).min() * 100) if len(self.equity) else 0.0
+
+        total_traded = float(traded_value.sum())
+        mean_equity = float(self.equity.mean()) if len(self.equity) else self.initial_capital
+        turnover_ratio = total_traded / mean_equity / 2
+        years = len(self.dates) / TRADING_DAYS_PER_YEAR
+
+        dates = pd.DatetimeIndex(self.dates).strftime('%Y-%m-%d')
+        contributions = {
+            self.symbols[j]: {
+                'pnl': round(float(pnl[j]), 2),
+                'contribution_pct': round(float(pnl[j] / self.initial_capital * 100), 4),
+                'trades': int(trades[j]),
+                'traded_value': round(float(traded_value[j]), 2)
+            }
+            for j in np.argsort(-pnl, kind='stable') if trades[j]
+        }
+
+        return {
+            'initial_capital': self.initial_capital,
+            'final_value': final_value,
+            'return_pct': (final_value - self.initial_capital) / self.initial_capital * 100,
+            'max_drawdown_pct': max_drawdown,
+            'symbols': len(self.symbols),
+            'trades': int(trades.sum()),
+            'turnover': {
+                'traded_value': total_traded,
+                'transaction_costs': float(self.costs.sum()),
+                # One-sided: the lesser of buys and sells is roughly half the total
+                'turnover_ratio': turnover_ratio,
+                'annualized_turnover': turnover_ratio / years if years else 0.0
+            },
+            'equity': [
+                {
+                    'date': dates[t],
+                    'equity': round(float(self.equity[t]), 2),
+                    'cash': round(float(self.cash[t]), 2),
+                    'positions': int(np.count_nonzero(self.positions[t]))
+                }
+                for t in range(len(self.dates))
+            ],
+            'contributions': contributions
+        }
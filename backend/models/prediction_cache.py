@@ -0,0 +1,134 @@
+# backend/models/prediction_cache.py
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import logging
+from models.instrumentation import metrics
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+metrics.describe('prediction_cache_entries', 'Entries held by the prediction cache')
+metrics.describe('prediction_cache_bytes', 'Approximate bytes held by the prediction cache')
+metrics.describe('prediction_cache_evictions_total', 'Prediction cache evictions per reason')
+
+
+def window_key(kind, df, features=None, **params):
+    """
+    Cache key of one prediction request: the prediction kind, its parameters
+    and a hash of every input row. The whole window is hashed, not just the
+    last sequence_length rows, because EWM-based features depend on all of them.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((kind, sorted(params.items()), list(df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    for name, values in sorted((features or {}).items()):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results with a TTL, bounded by entry count and by
+    the pickled size of the results. Entries belong to one model version:
+    a lookup under a new version drops everything cached for the old one.
+    Values are stored pickled, so callers always get a private copy.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl_seconds=300.0):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self.model_version = None
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get_or_compute(self, model_version, key, compute):
+        """Cached result for `key` under `model_version`, computing and storing it on a miss"""
+        if not self.enabled or model_version is None:
+            return compute()
+
+        with self.lock:
+            if model_version != self.model_version:
+                if self.entries:
+                    logger.info(f"Model version changed to {model_version}, dropping {len(self.entries)} "
+                                f"cached prediction(s)")
+                self._clear()
+                self.model_version = model_version
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key, 'expired')
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc('cache_requests_total', cache='predictions', result='hit')
+                return pickle.loads(entry[1])
+            self.misses += 1
+        metrics.inc('cache_requests_total', cache='predictions', result='miss')
+
+        # Computed outside the lock; concurrent misses on one key just compute twice
+        value = compute()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) <= self.max_bytes:
+            with self.lock:
+                if model_version == self.model_version:
+                    self._store(key, payload)
+        return value
+
+    def _store(self, key, payload):
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self.bytes += len(payload)
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)), 'capacity')
+        self._publish()
+
+    def _remove(self, key, reason=None):
+        _, payload = self.entries.pop(key)
+        self.bytes -= len(payload)
+        if reason:
+            self.evictions += 1
+            metrics.inc('prediction_cache_evictions_total', reason=reason)
+        self._publish()
+
+    def _clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge('prediction_cache_entries', len(self.entries))
+        metrics.set_gauge('prediction_cache_bytes', self.bytes)
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'model_version': self.model_version
+            }
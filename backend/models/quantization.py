@@ -0,0 +1,134 @@
+# backend/models/quantization.py
+import os
+import json
+import threading
+import numpy as np
+import tensorflow as tf
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ('dynamic', 'float16')
+
+
+def quantized_paths(model_path):
+    """Paths of the promoted quantized variant and its metadata next to the float model"""
+    base = os.path.splitext(model_path)[0]
+    return base + '.tflite', base + '.tflite.json'
+
+
+def inference_graph(model):
+    """
+    Copy of a trained model with statically unrolled LSTMs. The TFLite
+    converter cannot lower Keras' dynamic recurrent loop, but converts the
+    unrolled graph into plain fully-connected ops; the outputs are identical.
+    """
+    def unroll(layer):
+        config = layer.get_config()
+        if isinstance(layer, tf.keras.layers.LSTM):
+            config['unroll'] = True
+        return layer.__class__.from_config(config)
+
+    unrolled = tf.keras.models.clone_model(model, clone_function=unroll)
+    unrolled.set_weights(model.get_weights())
+    return unrolled
+
+
+def quantize_model(model, mode='dynamic'):
+    """
+    Convert a Keras model to a TFLite flatbuffer.
+    'dynamic' stores weights as int8 (about 4x smaller) and quantizes
+    activations on the fly; 'float16' halves the weights with no int8 math.
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode {mode!r}, expected one of {QUANTIZATION_MODES}")
+    try:
+        converter = tf.lite.TFLiteConverter.from_keras_model(inference_graph(model))
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if mode == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        content = converter.convert()
+        logger.info(f"Quantized model ({mode}): {len(content) / 1024:.0f} KiB")
+        return content
+
+    except Exception as e:
+        logger.error(f"Error in quantize_model: {str(e)}")
+        raise
+
+
+class QuantizedModel:
+    """
+    TFLite interpreter exposing the predict/call surface StockPricePredictor
+    uses. Dropout is compiled out, so it only serves deterministic passes.
+    """
+    supports_sampling = False
+
+    def __init__(self, model_content, num_threads=None):
+        self.model_content = model_content
+        self.interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_shape = None
+        # One interpreter per model; its tensors are not safe to share across threads
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, num_threads=None):
+        with open(path, 'rb') as f:
+            return cls(f.read(), num_threads=num_threads)
+
+    def __call__(self, x, training=False):
+        if training:
+            raise ValueError("The quantized model has no dropout to sample")
+        return self.predict(x)
+
+    def predict(self, x, batch_size=256, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [self._invoke(x[start:start + batch_size]) for start in range(0, len(x), batch_size)]
+        return np.concatenate(outputs) if outputs else np.empty((0, 1), dtype=np.float32)
+
+    def _invoke(self, batch):
+        with self.lock:
+            # Reallocate only when the batch shape changes
+            if batch.shape != self.batch_shape:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_shape = batch.shape
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+def within_tolerance(float_metrics, quantized_metrics, tolerance):
+    """True if no error metric grew by more than `tolerance` (relative) under quantization"""
+    return all(quantized_metrics[key] <= float_metrics[key] * (1 + tolerance)
+               for key in ('rmse', 'mae', 'mape'))
+
+
+def write_variant(model_path, content, metadata):
+    """Promote a quantized variant next to the float model"""
+    tflite_path, metadata_path = quantized_paths(model_path)
+    with open(tflite_path + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(tflite_path + '.tmp', tflite_path)
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return tflite_path
+
+
+def remove_variant(model_path):
+    """Drop a promoted variant, e.g. one built from an older float model"""
+    for path in quantized_paths(model_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_variant_metadata(model_path):
+    _, metadata_path = quantized_paths(model_path)
+    try:
+        with open(metadata_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,235 @@
+# backend/models/range_query.py
+import numpy as np
+import pandas as pd
+import logging
+from models.schema import PRICE_DECIMALS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GrowableArray:
+    """Append-only numpy buffer with amortized O(1) appends"""
+
+    def __init__(self, values=None, dtype=np.float64):
+        values = np.asarray(values if values is not None else [], dtype=dtype)
+        self._data = np.empty(max(len(values) * 2, 16), dtype=dtype)
+        self._data[:len(values)] = values
+        self._size = len(values)
+
+    @classmethod
+    def wrap(cls, values):
+        """Use an existing (e.g. read-only shared) array in place; the first append copies it"""
+        array = cls.__new__(cls)
+        array._data = values
+        array._size = len(values)
+        return array
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self._data[:self._size][index]
+
+    @property
+    def values(self):
+        """Read-only view of the filled part of the buffer"""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def append(self, value):
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+
+class SparseTable:
+    """
+    Sparse table for idempotent range queries (max or min).
+    Build is O(n log n), queries are O(1) and appends are O(log n).
+    """
+
+    def __init__(self, values, op):
+        self.op = op
+        level = np.asarray(values, dtype=np.float64)
+        self.levels = [GrowableArray(level)]
+
+        # Level k holds op() over the 2**k values starting at each index
+        size, half = len(level), 1
+        while 2 * half <= size:
+            level = op(level[:-half], level[half:])
+            self.levels.append(GrowableArray(level))
+            half *= 2
+
+    @classmethod
+    def from_levels(cls, levels, op):
+        """Rebuild a table from previously computed levels without copying them"""
+        table = cls.__new__(cls)
+        table.op = op
+        table.levels = [GrowableArray.wrap(level) for level in levels]
+        return table
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def append(self, value):
+        """Append a value, adding one entry to every level that now fits"""
+        self.levels[0].append(value)
+        size = len(self)
+        k = 1
+        while (1 << k) <= size:
+            if k == len(self.levels):
+                self.levels.append(GrowableArray())
+            prev = self.levels[k - 1]
+            start = size - (1 << k)
+            self.levels[k].append(self.op(prev[start], prev[start + (1 << (k - 1))]))
+            k += 1
+
+    def query(self, start, stop):
+        """Return op() over values[start:stop]"""
+        if not 0 <= start < stop <= len(self):
+            raise ValueError(f"Invalid range [{start}, {stop}) for table of size {len(self)}")
+        k = (stop - start).bit_length() - 1
+        level = self.levels[k]
+        return self.op(level[start], level[stop - (1 << k)])
+
+
+class PrefixSum:
+    """Running prefix sums for O(1) range sums and means"""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.sums = GrowableArray(np.concatenate(([0.0], np.cumsum(values))))
+
+    @classmethod
+    def from_sums(cls, sums):
+        """Rebuild from previously computed prefix sums without copying them"""
+        prefix = cls.__new__(cls)
+        prefix.sums = GrowableArray.wrap(sums)
+        return prefix
+
+    def __len__(self):
+        return len(self.sums) - 1
+
+    def append(self, value):
+        self.sums.append(self.sums[len(self.sums) - 1] + value)
+
+    def query(self, start, stop):
+        """Return the sum of values[start:stop]"""
+        return self.sums[stop] - self.sums[start]
+
+
+class RangeQueryIndex:
+    """
+    Range-query index over one symbol's chronologically ordered bars.
+    Serves high/low/average volume for any trailing window in constant time.
+    """
+
+    def __init__(self, dates, high, low, close, volume):
+        self.dates = GrowableArray(np.asarray(dates, dtype='datetime64[ns]'), dtype='datetime64[ns]')
+        self.close = GrowableArray(close)
+        self.high = SparseTable(high, np.maximum)
+        self.low = SparseTable(low, np.minimum)
+        self.volume = PrefixSum(volume)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build an index from an OHLCV DataFrame in any date order"""
+        try:
+            df = df.sort_values('Date')
+            # Served figures are float64; rounding drops float32 storage noise
+            return cls(
+                dates=df['Date'].to_numpy(dtype='datetime64[ns]'),
+                high=df['High'].to_numpy(dtype=np.float64).round(PRICE_DECIMALS),
+                low=df['Low'].to_numpy(dtype=np.float64).round(PRICE_DECIMALS),
+                close=df['Close'].to_numpy(dtype=np.float64).round(PRICE_DECIMALS),
+                volume=df['Volume'].to_numpy(dtype=np.float64)
+            )
+        except Exception as e:
+            logger.error(f"Error in RangeQueryIndex.from_frame: {str(e)}")
+            raise
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild an index from export_arrays() output, e.g. shared read-only arrays"""
+        index = cls.__new__(cls)
+        index.dates = GrowableArray.wrap(arrays['Date'])
+        index.close = GrowableArray.wrap(arrays['Close'])
+        index.high = SparseTable.from_levels(_levels(arrays, 'High'), np.maximum)
+        index.low = SparseTable.from_levels(_levels(arrays, 'Low'), np.minimum)
+        index.volume = PrefixSum.from_sums(arrays['Volume_Sum'])
+        return index
+
+    def export_arrays(self):
+        """All arrays backing the index, keyed by column name"""
+        arrays = {
+            'Date': self.dates.values,
+            'Close': self.close.values,
+            'Volume_Sum': self.volume.sums.values
+        }
+        for name, table in (('High', self.high), ('Low', self.low)):
+            for k, level in enumerate(table.levels):
+                arrays[f"{name}_L{k}"] = level.values
+        return arrays
+
+    def __len__(self):
+        return len(self.close)
+
+    def append(self, date, high, low, close, volume):
+        """Append a new bar; it must not be older than the latest indexed bar"""
+        date = np.datetime64(pd.Timestamp(date), 'ns')
+        if len(self) and date < self.dates[len(self) - 1]:
+            raise ValueError(f"Bar dated {date} is older than the latest indexed bar")
+        self.dates.append(date)
+        self.close.append(close)
+        self.high.append(high)
+        self.low.append(low)
+        self.volume.append(volume)
+
+    def window_stats(self, window):
+        """High, low and average volume over the trailing `window` bars"""
+        if window < 1:
+            raise ValueError(f"Window must be a positive number of bars, got {window}")
+        stop = len(self)
+        start = max(stop - window, 0)
+        return {
+            'high': float(self.high.query(start, stop)),
+            'low': float(self.low.query(start, stop)),
+            'average_volume': float(self.volume.query(start, stop) / (stop - start)),
+            'bars': stop - start
+        }
+
+    def metrics(self, windows=()):
+        """Market metrics for the latest bar plus any extra trailing windows"""
+        if len(self) < 2:
+            raise ValueError("At least two bars are required to calculate metrics")
+
+        current_price = float(self.close[len(self) - 1])
+        previous_price = float(self.close[len(self) - 2])
+        weekly = self.window_stats(5)
+        monthly = self.window_stats(20)
+
+        return {
+            'current_price': current_price,
+            'daily_change': float(current_price - previous_price),
+            'daily_change_percent': float((current_price - previous_price) / previous_price * 100),
+            'weekly_high': weekly['high'],
+            'weekly_low': weekly['low'],
+            'monthly_high': monthly['high'],
+            'monthly_low': monthly['low'],
+            'average_volume': monthly['average_volume'],
+            'windows': {str(window): self.window_stats(window) for window in windows}
+        }
+
+
+def _levels(arrays, name):
+    """Sparse-table levels exported under `<name>_L<k>`, in level order"""
+    levels = []
+    while f"{name}_L{len(levels)}" in arrays:
+        levels.append(arrays[f"{name}_L{len(levels)}"])
+    return levels
@@ -0,0 +1,92 @@
+# backend/models/schema.py
+import numpy as np
+import pandas as pd
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+PRICE_DTYPE = np.float32
+INDICATOR_DTYPE = np.float32
+# pandas supports second resolution at the coarsest; daily bars carry no time of day
+DATE_DTYPE = 'datetime64[s]'
+# Exports quote prices in paisa, i.e. two decimals
+PRICE_DECIMALS = 2
+
+
+def to_numeric(series):
+    """Parse a column to numbers, stripping thousands separators only for string input"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.replace(',', '').str.rstrip(' %'), errors='coerce')
+
+
+def compact_frame(df):
+    """
+    Convert an OHLCV frame to the compact internal schema:
+    float32 prices and other float columns, integer volume (float32 if any
+    volume is fractional), second-resolution dates and a categorical symbol.
+    Columns already in the compact schema are shared with `df`, not copied,
+    so the result must be treated as read-only.
+    """
+    try:
+        columns = {}
+        for col in df.columns:
+            series = df[col]
+            if col == 'Date':
+                if series.dtype != DATE_DTYPE:
+                    series = pd.to_datetime(series).dt.normalize().astype(DATE_DTYPE)
+            elif col == 'Symbol':
+                if not isinstance(series.dtype, pd.CategoricalDtype):
+                    series = series.astype('category')
+            elif col == 'Volume':
+                if pd.api.types.is_integer_dtype(series):
+                    # Already minimal integer columns come back uncopied
+                    series = pd.to_numeric(series, downcast='integer')
+                elif series.dtype != np.float32:
+                    series = to_numeric(series)
+                    if series.notna().all() and (series % 1 == 0).all():
+                        series = pd.to_numeric(series.astype(np.int64), downcast='integer')
+                    else:
+                        series = series.astype(np.float32)
+            elif col in PRICE_COLUMNS or col == 'Percent Change':
+                if series.dtype != PRICE_DTYPE:
+                    series = to_numeric(series).astype(PRICE_DTYPE)
+            elif pd.api.types.is_float_dtype(series) and series.dtype != INDICATOR_DTYPE:
+                series = series.astype(INDICATOR_DTYPE)
+            columns[col] = series
+        return pd.DataFrame(columns, index=df.index, copy=False)
+
+    except Exception as e:
+        logger.error(f"Error in compact_frame: {str(e)}")
+        raise
+
+
+def as_price(value):
+    """A float64 price rounded to the export precision, free of float32 noise"""
+    return round(float(value), PRICE_DECIMALS)
+
+
+def restore_prices(df, columns=PRICE_COLUMNS):
+    """float64 copies of float32 price columns rounded to the export precision, for output"""
+    present = [col for col in columns if col in df.columns]
+    return df.assign(**{col: df[col].astype(np.float64).round(PRICE_DECIMALS) for col in present})
+
+
+def memory_report(df):
+    """Deep memory usage in bytes per symbol (or for the whole frame without a Symbol column)"""
+    if 'Symbol' not in df.columns:
+        return {'ALL': int(df.memory_usage(deep=True).sum())}
+    return {str(symbol): int(group.memory_usage(deep=True).sum())
+            for symbol, group in df.groupby('Symbol', observed=True)}
+
+
+def log_memory_report(before, after):
+    """Log per-symbol memory before and after converting to the compact schema"""
+    for symbol, size in after.items():
+        original = before.get(symbol, 0)
+        saving = (1 - size / original) * 100 if original else 0
+        logger.info(f"Memory for {symbol}: {original / 1024:.1f} KiB -> {size / 1024:.1f} KiB "
+                    f"({saving:.0f}% smaller)")
@@ -0,0 +1,75 @@
+# backend/models/screener.py
+import operator
+import numpy as np
+import pandas as pd
+import logging
+from models.trading_strategy import score_signals, SIGNAL_COLUMNS
+from models.schema import as_price
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCREEN_ACTIONS = ('buy', 'sell', 'any')
+
+# Query filter -> (indicator column, comparison against the filter value)
+SCREEN_FILTERS = {
+    'min_price': ('Close', operator.ge),
+    'max_price': ('Close', operator.le),
+    'min_rsi': ('RSI', operator.ge),
+    'max_rsi': ('RSI', operator.le),
+    'min_volume_ratio': ('Volume_Ratio', operator.ge),
+}
+
+
+def screen_signals(symbols, dates, prev, current, action='any', min_confidence=0.5, filters=None, limit=None):
+    """
+    Score the latest bar of every symbol with the TradingStrategy rules in one
+    pass. `prev` and `current` are symbols x SIGNAL_COLUMNS matrices (see
+    LiveBarStore.latest_indicators); returns matches, strongest first.
+    """
+    if action not in SCREEN_ACTIONS:
+        raise ValueError(f"Unknown action {action!r}, expected one of {SCREEN_ACTIONS}")
+    unknown = set(filters or {}) - set(SCREEN_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {sorted(unknown)}")
+
+    try:
+        column = {col: j for j, col in enumerate(SIGNAL_COLUMNS)}
+        buy_confidence, sell_confidence = score_signals(
+            {col: prev[:, j] for col, j in column.items()},
+            {col: current[:, j] for col, j in column.items()}
+        )
+
+        # A bar counts as a buy when it clears the threshold, as in generate_signals
+        is_buy = buy_confidence >= min_confidence
+        is_sell = ~is_buy & (sell_confidence >= min_confidence)
+        matches = {'buy': is_buy, 'sell': is_sell, 'any': is_buy | is_sell}[action]
+        for name, value in (filters or {}).items():
+            col, compare = SCREEN_FILTERS[name]
+            matches &= compare(current[:, column[col]], value)
+
+        rows = np.flatnonzero(matches)
+        confidence = np.where(is_buy, buy_confidence, sell_confidence)
+        rows = rows[np.argsort(-confidence[rows], kind='stable')][:limit]
+
+        dates = pd.DatetimeIndex(dates[rows]).strftime('%Y-%m-%d')
+        return [
+            {
+                'symbol': symbols[i],
+                'date': dates[k],
+                'action': 'buy' if is_buy[i] else 'sell',
+                'confidence': float(confidence[i]),
+                'price': as_price(current[i, column['Close']]),
+                'indicators': {
+                    'rsi': float(current[i, column['RSI']]),
+                    'macd': float(current[i, column['MACD']]),
+                    'volume_ratio': float(current[i, column['Volume_Ratio']])
+                }
+            }
+            for k, i in enumerate(rows)
+        ]
+
+    except Exception as e:
+        logger.error(f"Error in screen_signals: {str(e)}")
+        raise
@@ -0,0 +1,143 @@
+# backend/models/shared_arrays.py
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+# A snapshot can be cleaned up while a reader is still opening it; the reader
+# then re-reads CURRENT, which by then names a newer version
+REFRESH_ATTEMPTS = 5
+
+
+def default_root():
+    return os.path.join(tempfile.gettempdir(), 'stock-shared-arrays')
+
+
+class SharedArrayPublisher:
+    """
+    Publishes per-symbol column arrays as memory-mapped .npy snapshots.
+    Each snapshot lives in its own versioned directory; the CURRENT file is
+    swapped atomically once the snapshot is complete, so readers never see a
+    partially written version.
+    """
+
+    def __init__(self, root=None, keep_versions=2):
+        self.root = root or default_root()
+        self.keep_versions = keep_versions
+        os.makedirs(self.root, exist_ok=True)
+
+    def current_version(self):
+        return read_version(self.root)
+
+    def publish(self, symbol_arrays):
+        """
+        Write a new snapshot from {symbol: {column: array}} and make it current.
+        Columns of all symbols are concatenated into one file per column.
+        """
+        try:
+            version = self.current_version() + 1
+            version_dir = os.path.join(self.root, f"v{version:06d}")
+            tmp_dir = version_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            columns = sorted({col for arrays in symbol_arrays.values() for col in arrays})
+            segments = {}
+            for col in columns:
+                parts, offset = [], 0
+                segments[col] = {}
+                for symbol, arrays in symbol_arrays.items():
+                    if col not in arrays:
+                        continue
+                    values = np.ascontiguousarray(arrays[col])
+                    segments[col][symbol] = [offset, offset + len(values)]
+                    offset += len(values)
+                    parts.append(values)
+                np.save(os.path.join(tmp_dir, f"{col}.npy"), np.concatenate(parts))
+
+            manifest = {'version': version, 'symbols': list(symbol_arrays), 'segments': segments}
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_dir, version_dir)
+
+            # Atomically point readers at the new snapshot
+            current_tmp = os.path.join(self.root, CURRENT_FILE + '.tmp')
+            with open(current_tmp, 'w') as f:
+                f.write(str(version))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(current_tmp, os.path.join(self.root, CURRENT_FILE))
+
+            self._cleanup(version)
+            logger.info(f"Published shared arrays version {version} for {len(symbol_arrays)} symbol(s)")
+            return version
+
+        except Exception as e:
+            logger.error(f"Error publishing shared arrays: {str(e)}")
+            raise
+
+    def _cleanup(self, version):
+        # Readers that still map an old snapshot keep it alive after unlink;
+        # one that is still opening it retries with the newer version
+        for name in os.listdir(self.root):
+            if name.startswith('v') and name[1:].isdigit() and int(name[1:]) <= version - self.keep_versions:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+class SharedArrayReader:
+    """Read-only view of the current shared snapshot, re-attached when a new version appears"""
+
+    def __init__(self, root=None):
+        self.root = root or default_root()
+        self.version = 0
+        self.manifest = None
+        self.columns = {}
+
+    def refresh(self):
+        """Attach to the latest snapshot; returns True if the version changed"""
+        for attempt in range(REFRESH_ATTEMPTS):
+            version = read_version(self.root)
+            if version == self.version:
+                return False
+
+            version_dir = os.path.join(self.root, f"v{version:06d}")
+            try:
+                with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+                    manifest = json.load(f)
+                columns = {col: np.load(os.path.join(version_dir, f"{col}.npy"), mmap_mode='r')
+                           for col in manifest['segments']}
+            except FileNotFoundError:
+                if attempt == REFRESH_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"Shared arrays version {version} was removed while attaching, retrying")
+                continue
+
+            self.manifest, self.columns, self.version = manifest, columns, version
+            return True
+
+    def symbols(self):
+        return list(self.manifest['symbols']) if self.manifest else []
+
+    def arrays(self, symbol):
+        """Read-only slices of every column published for `symbol`"""
+        return {col: self.columns[col][start:stop]
+                for col, segments in self.manifest['segments'].items()
+                if symbol in segments
+                for start, stop in [segments[symbol]]}
+
+
+def read_version(root):
+    """Current snapshot version under `root`, 0 if nothing was published yet"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
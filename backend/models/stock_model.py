@@ -5,114 +5,296 @@ import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 import joblib
+import os
+import hashlib
+import math
 import logging
+from models.instrumentation import metrics
+from models.feature_store import MODEL_FEATURES
+from models.indicators import INDICATOR_FEATURES, indicator_columns
+from models.schema import to_numeric, restore_prices
+from models.quantization import QuantizedModel, quantized_paths, read_variant_metadata
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StockPricePredictor:
-    def __init__(self, sequence_length=60):
+    def __init__(self, sequence_length=60, extra_features=None):
         self.sequence_length = sequence_length
+        # Optional INDICATOR_FEATURES added to the model inputs
+        self.extra_features = list(extra_features or [])
+        unknown = set(self.extra_features) - set(INDICATOR_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown extra features: {sorted(unknown)}")
         self.model = None
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.feature_columns = None
+        self.model_version = None
+        # Monte Carlo dropout settings for predict_weekly
+        self.mc_samples = 100
+        self.interval_quantiles = (0.05, 0.95)
+        self.confidence_tolerance = 0.02
+        self.interval_scale = None
         
-    def prepare_features(self, df):
-        """Prepare all technical indicators and features"""
+    def prepare_features(self, df, features=None):
+        """
+        Prepare all technical indicators and features.
+        `features` optionally maps indicator names to precomputed values aligned
+        with the rows of `df` (e.g. read from the feature store). Rows without a
+        Date column are taken to be oldest first.
+        """
+        with metrics.stage('feature_prep'):
+            return self._prepare_features(df, features)
+    
+    def _prepare_features(self, df, features=None):
         try:
-            # Store original columns
-            orig_columns = df.columns.tolist()
-            
-            # Remove Date column if exists
-            if 'Date' in df.columns:
-                df = df.drop('Date', axis=1)
+            # The input is read-only: the bars are referenced and only the
+            # feature frame handed to the scaler is allocated
+            columns = {col: df[col] for col in df.columns if col != 'Date'}
+            dates = df['Date'] if 'Date' in df.columns else None
                 
             # Ensure all required columns exist
             required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in required_columns if col not in columns]
             if missing_columns:
                 raise ValueError(f"Missing required columns: {missing_columns}")
                 
             # Convert Volume to numeric if it isn't already
-            if 'Volume' in df.columns:
-                df['Volume'] = pd.to_numeric(df['Volume'].astype(str).str.replace(',', ''), errors='coerce')
+            columns['Volume'] = to_numeric(columns['Volume'])
+            
+            if features is not None:
+                # Stored indicators were computed over the symbol's full history
+                for name in MODEL_FEATURES:
+                    columns[name] = np.asarray(features[name])
+                # Extra indicators the store doesn't hold are computed from these bars
+                self._add_extra_features(columns, features, dates)
+                return self._finish_features(columns, df.index)
                 
             # Add technical indicators
-            df['SMA_20'] = df['Close'].rolling(window=20).mean()
-            df['SMA_50'] = df['Close'].rolling(window=50).mean()
+            close = columns['Close']
+            columns['SMA_20'] = close.rolling(window=20).mean()
+            columns['SMA_50'] = close.rolling(window=50).mean()
             
             # RSI
-            delta = df['Close'].diff()
+            delta = close.diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
             rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
+            columns['RSI'] = 100 - (100 / (1 + rs))
             
             # MACD
-            exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-            df['MACD'] = exp1 - exp2
-            df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
+            exp1 = close.ewm(span=12, adjust=False).mean()
+            exp2 = close.ewm(span=26, adjust=False).mean()
+            columns['MACD'] = exp1 - exp2
+            columns['Signal_Line'] = columns['MACD'].ewm(span=9, adjust=False).mean()
             
             # Bollinger Bands
-            df['BB_middle'] = df['Close'].rolling(window=20).mean()
-            df['BB_upper'] = df['BB_middle'] + 2 * df['Close'].rolling(window=20).std()
-            df['BB_lower'] = df['BB_middle'] - 2 * df['Close'].rolling(window=20).std()
+            rolling = close.rolling(window=20)
+            columns['BB_middle'] = rolling.mean()
+            bb_std = rolling.std()
+            columns['BB_upper'] = columns['BB_middle'] + 2 * bb_std
+            columns['BB_lower'] = columns['BB_middle'] - 2 * bb_std
             
             # Price momentum
-            df['Momentum'] = df['Close'].pct_change(periods=10)
-            
-            # Fill NaN values using forward fill then backward fill
-            df = df.ffill().bfill()
+            columns['Momentum'] = close.pct_change(periods=10)
             
-            # Store feature columns
-            if self.feature_columns is None:
-                self.feature_columns = df.columns.tolist()
-            
-            return df
+            self._add_extra_features(columns, dates=dates)
+            return self._finish_features(columns, df.index)
             
         except Exception as e:
             logger.error(f"Error in prepare_features: {str(e)}")
             raise
     
-    def train(self, data, epochs=50, batch_size=32, validation_split=0.2):
-        """Train the model with the given data"""
+    def _add_extra_features(self, columns, features=None, dates=None):
+        """Configured extra indicators, read from `features` when it has them, else computed from the bars"""
+        stored = {name for name in self.extra_features if features is not None and name in features}
+        computed = [name for name in self.extra_features if name not in stored]
+        if computed:
+            # The kernels smooth forward in time, so run them over the bars
+            # oldest first and put the values back in the rows' order
+            order = (np.argsort(pd.to_datetime(dates).to_numpy(), kind='stable') if dates is not None
+                     else np.arange(len(columns['Close'])))
+            bars = {col: np.asarray(columns[col], dtype=np.float64)[order]
+                    for col in ('High', 'Low', 'Close', 'Volume')}
+            chronological = indicator_columns(bars['High'], bars['Low'], bars['Close'], bars['Volume'], computed)
+            computed = {}
+            for name, values in chronological.items():
+                computed[name] = np.empty_like(values)
+                computed[name][order] = values
+        for name in self.extra_features:
+            columns[name] = np.asarray(features[name]) if name in stored else computed[name]
+    
+    def _finish_features(self, columns, index):
+        df = pd.DataFrame(columns, index=index)
+        
+        # Fill NaN values using forward fill then backward fill; the frame is
+        # new, so it is filled in place
+        df.ffill(inplace=True)
+        df.bfill(inplace=True)
+        
+        # Store feature columns
+        if self.feature_columns is None:
+            self.feature_columns = df.columns.tolist()
+        
+        return df
+    
+    def _feature_frame(self, df):
+        """Features in training column order; selecting columns copies, so only when reordering"""
+        missing_cols = set(self.feature_columns) - set(df.columns)
+        if missing_cols:
+            raise ValueError(f"Missing columns from training data: {missing_cols}")
+        return df if df.columns.tolist() == self.feature_columns else df[self.feature_columns]
+    
+    def train(self, data, epochs=50, batch_size=32, validation_split=0.2, features=None,
+              early_stopping_patience=None, reduce_lr_patience=None, checkpoint_dir=None,
+              checkpoint_every=1, resume=False):
+        """
+        Train the model with the given data.
+        Optionally stops early on a validation-loss plateau (restoring the best
+        weights), lowers the learning rate on plateau, and checkpoints model,
+        optimizer and scaler state to `checkpoint_dir` so that `resume=True`
+        continues an interrupted run from its last completed epoch.
+        """
         try:
-            # Prepare training data
-            X, y = self.prepare_data(data)
+            initial_epoch = 0
+            checkpoint = TrainingCheckpoint(self, checkpoint_dir, checkpoint_every) if checkpoint_dir else None
+            if resume and checkpoint is not None:
+                initial_epoch = checkpoint.restore()
+            
+            # Prepare training data; a resumed run keeps the checkpoint's scaler
+            X, y = self.prepare_data(data, features, fit_scaler=initial_epoch == 0)
             
             # Build model if not already built
             if self.model is None:
                 input_shape = (X.shape[1], X.shape[2])
                 self.build_model(input_shape)
+            
+            monitor = 'val_loss' if validation_split else 'loss'
+            callbacks = [checkpoint] if checkpoint is not None else []
+            if early_stopping_patience:
+                callbacks.append(tf.keras.callbacks.EarlyStopping(
+                    monitor=monitor, patience=early_stopping_patience, restore_best_weights=True))
+            if reduce_lr_patience:
+                callbacks.append(tf.keras.callbacks.ReduceLROnPlateau(
+                    monitor=monitor, factor=0.5, patience=reduce_lr_patience, min_lr=1e-5))
                 
             # Train the model
             history = self.model.fit(
                 X, y,
                 epochs=epochs,
+                initial_epoch=initial_epoch,
                 batch_size=batch_size,
                 validation_split=validation_split,
+                callbacks=callbacks,
                 verbose=1
             )
             
+            # The run finished; its checkpoint is no longer needed
+            if checkpoint is not None:
+                checkpoint.clear()
+            
             return history
             
         except Exception as e:
             logger.error(f"Error in train: {str(e)}")
             raise
     
-    def prepare_data(self, data):
+    def fine_tune(self, data, epochs=3, recent_windows=250, replay_windows=250, batch_size=32,
+                  learning_rate=1e-4, scaler_policy='extend', drift_tolerance=0.1, dates=None,
+                  features=None, seed=None):
+        """
+        Continue training the loaded model on new bars instead of retraining from scratch.
+        Trains on a replay buffer of the `recent_windows` newest windows plus a random
+        sample of `replay_windows` older ones, so the model adapts without forgetting.
+        
+        Scaler drift policy: 'keep' never changes the fitted scaler. 'extend' widens it
+        with partial_fit, but only once a feature leaves its fitted range by more than
+        `drift_tolerance` of that range; smaller excursions are left to the model,
+        since rescaling shifts every input it has learned.
+        """
+        try:
+            if self.model is None or self.feature_columns is None:
+                raise ValueError("No trained model to fine-tune")
+            if scaler_policy not in ('keep', 'extend'):
+                raise ValueError(f"Unknown scaler policy {scaler_policy!r}, expected 'keep' or 'extend'")
+            
+            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data
+            df = self._feature_frame(self.prepare_features(df, features))
+            if len(df) <= self.sequence_length:
+                raise ValueError(f"Need more than {self.sequence_length} rows to fine-tune, got {len(df)}")
+            
+            # How far the new data leaves the fitted range, as a share of that range
+            values = df.to_numpy(dtype=np.float64)
+            fitted_range = self.scaler.data_max_ - self.scaler.data_min_
+            fitted_range = np.where(fitted_range > 0, fitted_range, 1.0)
+            excursion = np.maximum(self.scaler.data_min_ - values.min(axis=0),
+                                   values.max(axis=0) - self.scaler.data_max_) / fitted_range
+            max_excursion = float(max(excursion.max(), 0.0))
+            scaler_updated = scaler_policy == 'extend' and max_excursion > drift_tolerance
+            if scaler_updated:
+                self.scaler.partial_fit(df)
+                logger.info(f"Scaler range extended for drift of {max_excursion:.1%}")
+            
+            scaled = self.scaler.transform(df).astype(np.float32)
+            close_idx = df.columns.get_loc('Close')
+            
+            # Window i covers rows i .. i+sequence_length-1 and predicts the next row
+            windows = np.lib.stride_tricks.sliding_window_view(
+                scaled, self.sequence_length, axis=0).transpose(0, 2, 1)[:-1]
+            targets = scaled[self.sequence_length:, close_idx]
+            
+            # Replay buffer: newest windows by target date plus a sample of older ones
+            if dates is not None:
+                order = np.argsort(np.asarray(pd.to_datetime(pd.Series(dates)))[self.sequence_length:], kind='stable')
+            else:
+                order = np.arange(len(targets))
+            recent, older = order[-recent_windows:], order[:-recent_windows]
+            rng = np.random.default_rng(seed)
+            replay = rng.choice(older, size=min(replay_windows, len(older)), replace=False)
+            selected = np.concatenate([recent, replay])
+            
+            # A fresh optimizer with a small learning rate nudges rather than retrains
+            self.model.compile(
+                optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                loss='mean_squared_error',
+                metrics=['mae', 'mse']
+            )
+            history = self.model.fit(
+                windows[selected], targets[selected],
+                epochs=epochs,
+                batch_size=batch_size,
+                shuffle=True,
+                verbose=0
+            )
+            
+            return {
+                'loss': [float(loss) for loss in history.history['loss']],
+                'recent_windows': int(len(recent)),
+                'replay_windows': int(len(replay)),
+                'scaler_updated': bool(scaler_updated),
+                'max_scaler_excursion': max_excursion
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in fine_tune: {str(e)}")
+            raise
+    
+    def prepare_data(self, data, features=None, fit_scaler=True):
         """Prepare data for training or prediction"""
         try:
             # Convert to DataFrame if it's a Series
-            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data.copy()
+            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data
             
             # Prepare features
-            df = self.prepare_features(df)
+            df = self.prepare_features(df, features)
             
             # Scale features
-            scaled_features = self.scaler.fit_transform(df)
+            if fit_scaler:
+                scaled_features = self.scaler.fit_transform(df)
+            else:
+                df = self._feature_frame(df)
+                scaled_features = self.scaler.transform(df)
             
             X, y = [], []
             for i in range(self.sequence_length, len(scaled_features)):
@@ -152,46 +334,71 @@ class StockPricePredictor:
             logger.error(f"Error in build_model: {str(e)}")
             raise
     
-    def predict_next_day(self, data):
+    def predict_next_day(self, data, features=None):
         """Predict the next day's closing price"""
         try:
             # Convert to DataFrame if necessary
-            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data.copy()
+            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data
             
             # Add technical indicators
-            df = self.prepare_features(df)
-            
-            # Ensure columns match training data
-            missing_cols = set(self.feature_columns) - set(df.columns)
-            if missing_cols:
-                raise ValueError(f"Missing columns from training data: {missing_cols}")
-            
-            # Reorder columns to match training data
-            df = df[self.feature_columns]
+            df = self.prepare_features(df, features)
             
-            # Get the most recent sequence
-            recent_data = df.tail(self.sequence_length)
+            # Get the most recent sequence, in the training column order
+            recent_data = self._feature_frame(df.tail(self.sequence_length))
             
             # Scale the features
-            scaled_data = self.scaler.transform(recent_data)
+            with metrics.stage('scaling'):
+                scaled_data = self.scaler.transform(recent_data)
             X = scaled_data.reshape(1, self.sequence_length, scaled_data.shape[1])
             
             # Make prediction
-            scaled_prediction = self.model.predict(X, verbose=0)
+            with metrics.stage('model_forward'):
+                scaled_prediction = self.model.predict(X, verbose=0)
             
             # Create a dummy row for inverse transform
+            close_idx = recent_data.columns.get_loc('Close')
             dummy = np.zeros((1, scaled_data.shape[1]))
-            dummy[0, df.columns.get_loc('Close')] = scaled_prediction[0, 0]
+            dummy[0, close_idx] = scaled_prediction[0, 0]
             
             # Inverse transform to get the actual price
-            prediction = self.scaler.inverse_transform(dummy)[0, df.columns.get_loc('Close')]
+            prediction = self.scaler.inverse_transform(dummy)[0, close_idx]
             
             return prediction
             
         except Exception as e:
             logger.error(f"Error in predict_next_day: {str(e)}")
             raise
-    
+
+    def predict_batch(self, data, batch_size=256):
+        """
+        Predict the next close after every complete window of `data` in batched forward passes.
+        Features are computed once over the whole chronological frame, as in training.
+        Element j is the prediction for row j + sequence_length; the last one is beyond the data.
+        """
+        try:
+            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data
+            df = self._feature_frame(self.prepare_features(df))
+            close_idx = df.columns.get_loc('Close')
+            if len(df) < self.sequence_length:
+                raise ValueError(f"Need at least {self.sequence_length} rows, got {len(df)}")
+
+            with metrics.stage('scaling'):
+                scaled_data = self.scaler.transform(df).astype(np.float32)
+
+            # Overlapping windows as a strided view, shape (n_windows, sequence_length, F)
+            windows = np.lib.stride_tricks.sliding_window_view(
+                scaled_data, self.sequence_length, axis=0).transpose(0, 2, 1)
+
+            with metrics.stage('model_forward'):
+                scaled_predictions = self.model.predict(windows, batch_size=batch_size, verbose=0)[:, 0]
+
+            # Close is min-max scaled, so inverse transform is affine per column
+            return (scaled_predictions - self.scaler.min_[close_idx]) / self.scaler.scale_[close_idx]
+
+        except Exception as e:
+            logger.error(f"Error in predict_batch: {str(e)}")
+            raise
+
     def save_model(self, model_path, scaler_path):
         """Save the model and scaler"""
         try:
@@ -201,9 +408,12 @@ class StockPricePredictor:
             # Save scaler and feature columns together
             save_dict = {
                 'scaler': self.scaler,
-                'feature_columns': self.feature_columns
+                'feature_columns': self.feature_columns,
+                'extra_features': self.extra_features,
+                'interval_scale': self.interval_scale
             }
             joblib.dump(save_dict, scaler_path)
+            self.set_model_version(model_path)
             
             logger.info("Model and scaler saved successfully")
             
@@ -211,9 +421,21 @@ class StockPricePredictor:
             logger.error(f"Error in save_model: {str(e)}")
             raise
     
-    def load_model(self, model_path, scaler_path):
-        """Load the saved model and scaler"""
+    def load_model(self, model_path, scaler_path, variant='float', num_threads=None):
+        """
+        Load the saved model and scaler.
+        variant='quantized' serves the promoted TFLite variant instead of the
+        Keras model when one exists for this exact model file.
+        """
         try:
+            if variant == 'quantized' and self._load_quantized(model_path, num_threads):
+                saved_dict = joblib.load(scaler_path)
+                self.scaler = saved_dict['scaler']
+                self.feature_columns = saved_dict['feature_columns']
+                self.extra_features = saved_dict.get('extra_features', [])
+                self.interval_scale = saved_dict.get('interval_scale')
+                return
+            
             # Load model with custom metrics
             self.model = tf.keras.models.load_model(
                 model_path,
@@ -225,6 +447,9 @@ class StockPricePredictor:
             saved_dict = joblib.load(scaler_path)
             self.scaler = saved_dict['scaler']
             self.feature_columns = saved_dict['feature_columns']
+            self.extra_features = saved_dict.get('extra_features', [])
+            self.interval_scale = saved_dict.get('interval_scale')
+            self.set_model_version(model_path)
             
             # Compile the model with metrics
             self.model.compile(
@@ -239,57 +464,79 @@ class StockPricePredictor:
             logger.error(f"Error in load_model: {str(e)}")
             raise
         
+    def _load_quantized(self, model_path, num_threads=None):
+        """Load the promoted quantized variant; False if it is missing or stale"""
+        tflite_path, _ = quantized_paths(model_path)
+        metadata = read_variant_metadata(model_path)
+        if metadata is None or not os.path.exists(tflite_path):
+            logger.warning("No quantized model variant found, serving the float model")
+            return False
+        if metadata['source_version'] != file_version(model_path):
+            logger.warning("Quantized model variant was built from another model version, serving the float model")
+            return False
+        
+        self.model = QuantizedModel.load(tflite_path, num_threads=num_threads)
+        self.set_model_version(tflite_path)
+        logger.info(f"Loaded {metadata['mode']} quantized model variant")
+        return True
+    
+    def set_model_version(self, model_path):
+        """Derive the model version from the saved model file contents"""
+        self.model_version = file_version(model_path)
+        
+        metrics.clear_gauge('model_info')
+        metrics.set_gauge('model_info', 1, version=self.model_version)
+        return self.model_version
+        
     def analyze_trends(self, df):
         """Analyze market trends from the data"""
+        with metrics.stage('analyze_trends'):
+            return self._analyze_trends(df)
+    
+    def _analyze_trends(self, df):
         try:
-            # Convert data types
-            df = df.copy()
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # Clean numeric data
-            numeric_columns = ['Open', 'High', 'Low', 'Close']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace('[^\d.]', ''), errors='coerce')
+            # Work on the needed columns only; parsed payloads are already
+            # numeric and typed, so nothing is copied for them
+            dates = pd.to_datetime(df['Date'])
+            # float64 prices at the export precision, so the returns and
+            # levels reported in JSON carry no float32 noise
+            prices = restore_prices(pd.DataFrame({col: to_numeric(df[col]) for col in ('Close', 'High', 'Low')}))
+            close = prices['Close']
             
             # Calculate moving averages
-            df['SMA_20'] = df['Close'].rolling(window=20).mean()
-            df['SMA_50'] = df['Close'].rolling(window=50).mean()
+            sma_20 = close.rolling(window=20).mean()
+            sma_50 = close.rolling(window=50).mean()
             
             # Determine trend
-            current_price = df['Close'].iloc[0]
-            sma_20 = df['SMA_20'].iloc[0]
-            sma_50 = df['SMA_50'].iloc[0]
+            current_price = close.iloc[0]
             
-            if current_price > sma_20 > sma_50:
+            if current_price > sma_20.iloc[0] > sma_50.iloc[0]:
                 trend = 'uptrend'
-            elif current_price < sma_20 < sma_50:
+            elif current_price < sma_20.iloc[0] < sma_50.iloc[0]:
                 trend = 'downtrend'
             else:
                 trend = 'sideways'
                 
-            # Calculate performance metrics
-            df['Daily_Return'] = df['Close'].pct_change() * 100
-            best_day = df.nlargest(1, 'Daily_Return').iloc[0]
-            worst_day = df.nsmallest(1, 'Daily_Return').iloc[0]
+            # Calculate performance metrics; the first best and worst day win ties
+            daily_return = (close.pct_change() * 100).to_numpy()
+            best_day, worst_day = np.nanargmax(daily_return), np.nanargmin(daily_return)
             
             # Calculate support and resistance levels
-            last_price = df['Close'].iloc[0]
-            support_levels = df['Low'].nsmallest(3).tolist()
-            resistance_levels = df['High'].nlargest(3).tolist()
+            support_levels = prices['Low'].nsmallest(3).tolist()
+            resistance_levels = prices['High'].nlargest(3).tolist()
+            
+            def day(i):
+                return {
+                    'date': dates.iloc[i].strftime('%Y-%m-%d'),
+                    'return': float(daily_return[i]),
+                    'close': float(close.iloc[i])
+                }
             
             return {
                 'trend': trend,
                 'performance': {
-                    'best_day': {
-                        'date': best_day['Date'].strftime('%Y-%m-%d'),
-                        'return': float(best_day['Daily_Return']),
-                        'close': float(best_day['Close'])
-                    },
-                    'worst_day': {
-                        'date': worst_day['Date'].strftime('%Y-%m-%d'),
-                        'return': float(worst_day['Daily_Return']),
-                        'close': float(worst_day['Close'])
-                    }
+                    'best_day': day(best_day),
+                    'worst_day': day(worst_day)
                 },
                 'support_resistance': {
                     'support_levels': support_levels,
@@ -300,68 +547,190 @@ class StockPricePredictor:
             logger.error(f"Error in analyze_trends: {str(e)}")
             raise
         
-    def predict_weekly(self, data):
-        """Predict stock prices for the next week"""
+    def predict_weekly(self, data, n_samples=None, quantiles=None, features=None):
+        """
+        Predict stock prices for the next week with Monte Carlo dropout.
+        Runs `n_samples` stochastic forward passes per horizon as one batch and
+        returns the mean price, quantile bands and a calibrated confidence.
+        With a single path (n_samples=1, or a quantized variant that cannot
+        sample) there is no spread to measure: the band, std and confidence
+        are None rather than a zero-width interval at full confidence.
+        """
         try:
+            n_samples = self.mc_samples if n_samples is None else int(n_samples)
+            lower_q, upper_q = quantiles or self.interval_quantiles
+            if n_samples < 1:
+                raise ValueError(f"n_samples must be at least 1, got {n_samples}")
+            if not getattr(self.model, 'supports_sampling', True):
+                # Quantized variants have dropout compiled out: one deterministic path
+                n_samples = 1
+            
             # Convert to DataFrame if necessary
-            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data.copy()
+            df = pd.DataFrame(data) if isinstance(data, pd.Series) else data
             
             # Add technical indicators
-            df = self.prepare_features(df)
-            
-            # Ensure columns match training data
-            missing_cols = set(self.feature_columns) - set(df.columns)
-            if missing_cols:
-                raise ValueError(f"Missing columns from training data: {missing_cols}")
-            
-            # Reorder columns to match training data
-            df = df[self.feature_columns]
+            df = self.prepare_features(df, features)
             
-            # Get the most recent sequence
-            recent_data = df.tail(self.sequence_length)
+            # Get the most recent sequence, in the training column order
+            recent_data = self._feature_frame(df.tail(self.sequence_length))
+            close_idx = recent_data.columns.get_loc('Close')
             
             # Scale the features
-            scaled_data = self.scaler.transform(recent_data)
+            with metrics.stage('scaling'):
+                scaled_data = self.scaler.transform(recent_data)
+            
+            # One window per Monte Carlo sample, shape (N, sequence_length, F)
+            temp_data = np.repeat(scaled_data[np.newaxis].astype(np.float32), n_samples, axis=0)
+            scaled_paths = np.empty((n_samples, 5))
+            
+            # Predict for next 5 trading days, every sample path in one forward pass
+            for day in range(5):
+                with metrics.stage('model_forward'):
+                    # training=True keeps dropout active; one sample is the deterministic forecast
+                    scaled_prediction = np.asarray(self.model(temp_data, training=n_samples > 1))[:, 0]
+                scaled_paths[:, day] = scaled_prediction
+                
+                # Each path continues from its own prediction
+                new_rows = temp_data[:, -1].copy()
+                new_rows[:, close_idx] = scaled_prediction
+                temp_data = np.concatenate((temp_data[:, 1:], new_rows[:, np.newaxis]), axis=1)
             
-            # Initialize predictions array
-            weekly_predictions = []
-            temp_data = scaled_data.copy()
+            # Close is min-max scaled, so inverse transform is affine per column
+            paths = ((scaled_paths - self.scaler.min_[close_idx]) / self.scaler.scale_[close_idx])
             
-            # Predict for next 5 trading days
-            for _ in range(5):
-                # Reshape data for prediction
-                X = temp_data.reshape(1, self.sequence_length, temp_data.shape[1])
-                
-                # Make prediction
-                scaled_prediction = self.model.predict(X, verbose=0)
-                
-                # Create a dummy row for inverse transform
-                dummy = np.zeros((1, scaled_data.shape[1]))
-                dummy[0, df.columns.get_loc('Close')] = scaled_prediction[0, 0]
-                
-                # Inverse transform to get actual price
-                prediction = self.scaler.inverse_transform(dummy)[0, df.columns.get_loc('Close')]
-                weekly_predictions.append(float(prediction))
-                
-                # Update temp_data for next prediction
-                new_row = temp_data[-1].copy()
-                new_row[df.columns.get_loc('Close')] = scaled_prediction[0, 0]
-                temp_data = np.vstack((temp_data[1:], new_row))
-            
-            # Calculate confidence scores based on model uncertainty
-            confidence_scores = []
-            for i in range(len(weekly_predictions)):
-                # Simple confidence calculation based on prediction day
-                # Confidence decreases as we predict further into the future
-                confidence = max(0.9 - (i * 0.1), 0.5)
-                confidence_scores.append(confidence)
-            
-            return [{
-                'day': i + 1,
-                'price': price,
-                'confidence': conf
-            } for i, (price, conf) in enumerate(zip(weekly_predictions, confidence_scores))]
+            return [self._horizon_summary(day, paths[:, day], lower_q, upper_q)
+                    for day in range(5)]
             
         except Exception as e:
             logger.error(f"Error in predict_weekly: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _horizon_summary(self, day, samples, lower_q, upper_q):
+        """Mean, calibrated quantile band and confidence for one forecast horizon"""
+        mean = float(samples.mean())
+        if len(samples) < 2:
+            return {'day': day + 1, 'price': mean, 'lower': None, 'upper': None, 'std': None,
+                    'confidence': None}
+        scale = float(self.interval_scale[day]) if self.interval_scale is not None else 1.0
+        
+        # Widen (or narrow) the raw Monte Carlo spread by the calibration factor
+        std = float(samples.std()) * scale
+        lower, upper = np.quantile(samples, [lower_q, upper_q])
+        lower = mean - (mean - float(lower)) * scale
+        upper = mean + (float(upper) - mean) * scale
+        
+        # Probability that the close lands within the tolerance band around the mean
+        if std > 0:
+            confidence = math.erf(self.confidence_tolerance * abs(mean) / (std * math.sqrt(2)))
+        else:
+            confidence = 1.0
+        
+        return {
+            'day': day + 1,
+            'price': mean,
+            'lower': lower,
+            'upper': upper,
+            'std': std,
+            'confidence': confidence
+        }
+    
+    def calibrate_uncertainty(self, test_data, n_samples=None, max_windows=50):
+        """
+        Calibrate Monte Carlo intervals on held-out data.
+        Sets a per-horizon scale so the nominal quantile band covers the
+        matching share of actual closes, and returns the achieved coverage.
+        """
+        try:
+            lower_q, upper_q = self.interval_quantiles
+            target = upper_q - lower_q
+            horizon = 5
+            if not getattr(self.model, 'supports_sampling', True) or (n_samples is not None and n_samples < 2):
+                raise ValueError("Calibration needs Monte Carlo sampling: a float model and n_samples of at least 2")
+            
+            starts = range(0, len(test_data) - self.sequence_length - horizon + 1)
+            step = max(len(starts) // max_windows, 1)
+            saved_scale, self.interval_scale = self.interval_scale, None
+            ratios = []
+            for i in starts[::step]:
+                window = test_data.iloc[i:i + self.sequence_length]
+                actual = test_data['Close'].iloc[i + self.sequence_length:
+                                                 i + self.sequence_length + horizon].to_numpy()
+                forecast = self.predict_weekly(window, n_samples=n_samples)
+                half_widths = np.array([(f['upper'] - f['lower']) / 2 for f in forecast])
+                errors = np.abs(actual - np.array([f['price'] for f in forecast]))
+                ratios.append(errors / np.maximum(half_widths, 1e-12))
+            
+            if not ratios:
+                self.interval_scale = saved_scale
+                raise ValueError("Not enough test data to calibrate uncertainty")
+            
+            ratios = np.array(ratios)
+            self.interval_scale = np.quantile(ratios, target, axis=0)
+            coverage = (ratios <= self.interval_scale).mean(axis=0)
+            logger.info(f"Calibrated interval scale per horizon: {np.round(self.interval_scale, 3).tolist()}")
+            return {'interval_scale': self.interval_scale.tolist(), 'coverage': coverage.tolist()}
+            
+        except Exception as e:
+            logger.error(f"Error in calibrate_uncertainty: {str(e)}")
+            raise
+
+class TrainingCheckpoint(tf.keras.callbacks.Callback):
+    """Saves model, optimizer and scaler state every few epochs so training can resume"""
+    
+    MODEL_FILE = 'checkpoint.keras'
+    STATE_FILE = 'checkpoint.pkl'
+    
+    def __init__(self, predictor, directory, every=1):
+        super().__init__()
+        self.predictor = predictor
+        self.directory = directory
+        self.every = max(int(every), 1)
+        os.makedirs(directory, exist_ok=True)
+    
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.every:
+            return
+        model_path = os.path.join(self.directory, self.MODEL_FILE)
+        state_path = os.path.join(self.directory, self.STATE_FILE)
+        
+        # Write both files under temporary names first so a crash mid-save
+        # leaves the previous checkpoint intact
+        self.model.save(model_path + '.tmp.keras')
+        joblib.dump({
+            'epoch': epoch + 1,
+            'scaler': self.predictor.scaler,
+            'feature_columns': self.predictor.feature_columns,
+            'logs': dict(logs or {})
+        }, state_path + '.tmp')
+        os.replace(model_path + '.tmp.keras', model_path)
+        os.replace(state_path + '.tmp', state_path)
+        logger.info(f"Saved training checkpoint after epoch {epoch + 1}")
+    
+    def restore(self):
+        """Load the latest checkpoint into the predictor; returns the epoch to resume from"""
+        model_path = os.path.join(self.directory, self.MODEL_FILE)
+        state_path = os.path.join(self.directory, self.STATE_FILE)
+        if not (os.path.exists(model_path) and os.path.exists(state_path)):
+            logger.info("No training checkpoint found, starting from scratch")
+            return 0
+        
+        state = joblib.load(state_path)
+        self.predictor.model = tf.keras.models.load_model(model_path)
+        self.predictor.scaler = state['scaler']
+        self.predictor.feature_columns = state['feature_columns']
+        logger.info(f"Resuming training from checkpoint at epoch {state['epoch']}")
+        return state['epoch']
+    
+    def clear(self):
+        for name in (self.MODEL_FILE, self.STATE_FILE):
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+def file_version(path):
+    """Short content hash of a saved model file"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
@@ -0,0 +1,238 @@
+# backend/models/strategy_optimizer.py
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import logging
+from models.trading_strategy import (TradingStrategy, SignalParams, DEFAULT_SIGNAL_PARAMS, SIGNAL_COLUMNS,
+                                     score_signals)
+from models.shared_arrays import SharedArrayPublisher, SharedArrayReader
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Range sampled for each SignalParams field
+SEARCH_SPACE = {
+    'ema_weight': (0.0, 0.5),
+    'rsi_weight': (0.0, 0.5),
+    'macd_weight': (0.0, 0.5),
+    'bb_weight': (0.0, 0.5),
+    'volume_weight': (0.0, 0.5),
+    'rsi_oversold': (15.0, 40.0),
+    'rsi_overbought': (60.0, 85.0),
+    'volume_ratio': (1.0, 3.0),
+    'threshold': (0.2, 0.8),
+}
+
+# Share of the capital TradingStrategy.backtest_strategy puts into a position
+POSITION_ALLOCATION = 0.95
+
+# Indicator arrays of every symbol, attached read-only once per worker
+_arrays = None
+
+
+def fast_backtest(close, buy, sell, params, cost_rate):
+    """
+    Daily returns of the backtest_strategy rules on score arrays: go long at
+    the close of a buy signal when flat, exit on a sell signal when long.
+    Fractional shares; returns (daily returns, position changes).
+    Scaling every daily return by POSITION_ALLOCATION approximates
+    backtest_strategy: it ignores the drift of the invested share as the
+    position gains or loses, and the integer share counts.
+    """
+    is_buy = buy >= params.threshold
+    is_sell = ~is_buy & (sell >= params.threshold)
+    # A buy while long and a sell while flat are no-ops, so the position
+    # after each bar is whichever signal fired last
+    last = np.maximum.accumulate(np.where(is_buy | is_sell, np.arange(len(close)), -1))
+    held = (last >= 0) & is_buy[np.maximum(last, 0)]
+
+    changes = held != np.concatenate(([False], held[:-1]))
+    returns = np.zeros(len(close))
+    returns[1:] = held[:-1] * (close[1:] / close[:-1] - 1)
+    return POSITION_ALLOCATION * (returns - changes * cost_rate), changes
+
+
+def _boundaries(dates, cutoffs):
+    """Bar index of every fold boundary, with the first bar and one past the last"""
+    return np.concatenate(([0], np.searchsorted(dates, cutoffs), [len(dates)]))
+
+
+def _mean_over_symbols(values, mask):
+    """Mean of trials x symbols x periods values over the symbols in `mask`; 0 where there are none"""
+    counts = mask.sum(axis=0)
+    return np.where(counts > 0, (values * mask).sum(axis=1) / np.maximum(counts, 1), 0.0)
+
+
+def _init_worker(root):
+    global _arrays
+    reader = SharedArrayReader(root)
+    reader.refresh()
+    _arrays = [reader.arrays(symbol) for symbol in reader.symbols()]
+
+
+def run_trials(task):
+    """
+    Score a batch of parameter sets on every symbol (runs in a worker).
+    Returns, per parameter set, equity and cumulative trades at each fold
+    boundary as symbols x boundaries arrays.
+    """
+    results = []
+    for params in task['params']:
+        equity, trades = [], []
+        for arrays in _arrays:
+            prev = {col: arrays[col][:-1] for col in SIGNAL_COLUMNS}
+            current = {col: arrays[col][1:] for col in SIGNAL_COLUMNS}
+            buy, sell = score_signals(prev, current, params)
+            close = arrays['Close']
+            returns, changes = fast_backtest(close, np.concatenate(([0.0], buy)),
+                                             np.concatenate(([0.0], sell)), params, task['cost_rate'])
+
+            # Value of 1 invested at the start, after the bars before each boundary
+            bounds = _boundaries(arrays['Date'], task['cutoffs'])
+            equity.append(np.exp(np.concatenate(([0.0], np.cumsum(np.log1p(returns))))[bounds]))
+            trades.append(np.concatenate(([0], np.cumsum(changes)))[bounds])
+        results.append((np.array(equity), np.array(trades)))
+    return results
+
+
+class StrategyOptimizer:
+    """
+    Random search over the TradingStrategy rule weights, RSI bands, volume
+    threshold and confidence threshold. Indicators are computed once, published
+    as a shared array snapshot and memory-mapped by a process pool; each trial
+    is scored with a vectorized long/flat backtest. The history is split by
+    date into an in-sample period and `n_folds` walk-forward validation folds.
+    """
+
+    def __init__(self, data, n_trials=200, n_folds=4, train_fraction=0.5, max_workers=None,
+                 transaction_cost_bps=10.0, top_k=5, batch_size=20, seed=42):
+        if not 0 < train_fraction < 1:
+            raise ValueError("train_fraction must be between 0 and 1")
+        if n_folds < 1:
+            raise ValueError("n_folds must be at least 1")
+
+        self.n_trials = int(n_trials)
+        self.n_folds = int(n_folds)
+        self.train_fraction = float(train_fraction)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cost_rate = float(transaction_cost_bps) / 10000
+        self.top_k = int(top_k)
+        self.batch_size = int(batch_size)
+        self.rng = np.random.default_rng(seed)
+
+        # Accept {symbol: frame} or one long frame with a Symbol column
+        if isinstance(data, pd.DataFrame):
+            data = {str(symbol): group for symbol, group in data.groupby('Symbol', observed=True)}
+        self._prepare_arrays(data)
+
+    def _prepare_arrays(self, frames):
+        """Compute the signal indicators of every symbol once"""
+        try:
+            self.arrays = {}
+            for symbol, df in frames.items():
+                if len(df) < 2:
+                    continue
+                prepared = TradingStrategy(df.sort_values('Date')).prepare_data()
+                arrays = {col: prepared[col].to_numpy(dtype=np.float64) for col in SIGNAL_COLUMNS}
+                arrays['Date'] = prepared['Date'].to_numpy(dtype='datetime64[s]')
+                self.arrays[symbol] = arrays
+            if not self.arrays:
+                raise ValueError("Need at least one symbol with two or more bars")
+
+            # Fold boundaries are dates, shared by every symbol
+            dates = np.unique(np.concatenate([arrays['Date'] for arrays in self.arrays.values()]))
+            fractions = self.train_fraction + (1 - self.train_fraction) * np.arange(self.n_folds) / self.n_folds
+            self.cutoffs = dates[(fractions * len(dates)).astype(int)]
+            self.period_dates = [dates[0]] + list(self.cutoffs) + [dates[-1]]
+            logger.info(f"Prepared signal indicators for {len(self.arrays)} symbol(s)")
+
+        except Exception as e:
+            logger.error(f"Error preparing optimizer arrays: {str(e)}")
+            raise
+
+    def sample_params(self):
+        """The current defaults followed by random draws from SEARCH_SPACE"""
+        trials = [DEFAULT_SIGNAL_PARAMS]
+        for _ in range(self.n_trials - 1):
+            trials.append(SignalParams(**{name: round(float(self.rng.uniform(low, high)), 3)
+                                          for name, (low, high) in SEARCH_SPACE.items()}))
+        return trials
+
+    def run(self):
+        """Run every trial in parallel and return the best configurations with their validation returns"""
+        try:
+            trials = self.sample_params()
+            tasks = [{'params': trials[start:start + self.batch_size], 'cutoffs': self.cutoffs,
+                      'cost_rate': self.cost_rate}
+                     for start in range(0, len(trials), self.batch_size)]
+
+            workers = min(self.max_workers, len(tasks))
+            logger.info(f"Strategy search: {len(trials)} trial(s) on {workers} process(es)")
+            with tempfile.TemporaryDirectory(prefix='strategy-optimizer-') as root:
+                SharedArrayPublisher(root).publish(self.arrays)
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_worker, initargs=(root,)) as executor:
+                    results = [result for batch in executor.map(run_trials, tasks) for result in batch]
+
+            return self._summarize(trials, results)
+
+        except Exception as e:
+            logger.error(f"Error in strategy optimization: {str(e)}")
+            raise
+
+    def _summarize(self, trials, results):
+        # Mean return between every pair of boundaries across the symbols with
+        # bars in that period; one without any would count as a 0% return
+        equity = np.array([trial_equity for trial_equity, _ in results])
+        trades = np.array([trial_trades for _, trial_trades in results])
+        has_bars = np.array([np.diff(_boundaries(arrays['Date'], self.cutoffs)) > 0
+                             for arrays in self.arrays.values()])
+        periods = _mean_over_symbols(equity[:, :, 1:] / equity[:, :, :-1] - 1, has_bars)
+        anchored = _mean_over_symbols(equity[:, :, 1:] - 1, np.cumsum(has_bars, axis=1) > 0)
+        period_trades = np.diff(trades, axis=2).sum(axis=1)
+
+        dates = pd.DatetimeIndex(self.period_dates).strftime('%Y-%m-%d')
+        folds = [{'start': dates[k], 'end': dates[k + 1]} for k in range(1, self.n_folds + 1)]
+
+        def describe(i):
+            validation = periods[i, 1:]
+            return {
+                'params': trials[i].to_dict(),
+                'in_sample_return_pct': float(periods[i, 0] * 100),
+                'in_sample_trades': int(period_trades[i, 0]),
+                'validation_return_pct': float((np.prod(1 + validation) - 1) * 100),
+                'validation_trades': int(period_trades[i, 1:].sum()),
+                'folds': [{**fold, 'return_pct': float(value * 100)} for fold, value in zip(folds, validation)]
+            }
+
+        # Walk-forward: before each fold, pick the best trial on all data up to it
+        walk_forward = []
+        for k, fold in enumerate(folds):
+            best = int(np.argmax(anchored[:, k]))
+            walk_forward.append({**fold, 'params': trials[best].to_dict(),
+                                 'return_pct': float(periods[best, k + 1] * 100)})
+
+        # Many parameter sets fire the exact same trades; report distinct outcomes only
+        ranked, seen = [], set()
+        for i in np.argsort(-periods[:, 0], kind='stable'):
+            outcome = (tuple(np.round(periods[i], 10)), tuple(period_trades[i]))
+            if outcome not in seen:
+                seen.add(outcome)
+                ranked.append(i)
+            if len(ranked) == self.top_k:
+                break
+        return {
+            'trials': len(trials),
+            'symbols': len(self.arrays),
+            'in_sample': {'start': dates[0], 'end': dates[1]},
+            'baseline': describe(0),
+            'top': [describe(i) for i in ranked],
+            'walk_forward': {
+                'return_pct': float((np.prod([1 + fold['return_pct'] / 100 for fold in walk_forward]) - 1) * 100),
+                'folds': walk_forward
+            }
+        }
@@ -0,0 +1,119 @@
+# backend/models/streaming.py
+import json
+import math
+import threading
+import itertools
+from collections import OrderedDict
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Event types that describe the latest state of a symbol; a newer one supersedes
+# any still pending. Other events (signals) are delivered in order.
+STATE_EVENTS = ('bar', 'metrics', 'prediction')
+
+
+class Subscription:
+    """
+    Bounded per-client event queue.
+    Pending STATE_EVENTS are coalesced per (symbol, event type) so a slow
+    client only ever receives the latest state, while signals are queued in
+    order. Once `max_pending` events are queued the oldest one is dropped
+    instead of blocking the publisher.
+    """
+
+    def __init__(self, symbols=None, max_pending=100):
+        self.symbols = set(symbols) if symbols else None
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.dropped = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def wants(self, symbol):
+        return self.symbols is None or symbol in self.symbols
+
+    def push(self, event):
+        with self._condition:
+            if event['type'] in STATE_EVENTS:
+                key = (event['symbol'], event['type'])
+            else:
+                key = (event['symbol'], event['type'], event['id'])
+            if key in self.pending:
+                # Replace the stale event but keep the newest at the back
+                del self.pending[key]
+                self.dropped += 1
+            elif len(self.pending) >= self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            self.pending[key] = event
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest pending event, or None on timeout or close"""
+        with self._condition:
+            if not self.pending and not self.closed:
+                self._condition.wait(timeout)
+            if self.closed or not self.pending:
+                return None
+            return self.pending.popitem(last=False)[1]
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class EventBroadcaster:
+    """Fans published events out to the subscriptions interested in their symbol"""
+
+    def __init__(self, max_subscribers=1000):
+        self.max_subscribers = max_subscribers
+        self.subscriptions = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbols=None, max_pending=100):
+        with self._lock:
+            if len(self.subscriptions) >= self.max_subscribers:
+                raise RuntimeError("Too many stream subscribers")
+            subscription = Subscription(symbols, max_pending)
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self.subscriptions.discard(subscription)
+
+    def has_subscribers(self, symbol):
+        with self._lock:
+            return any(subscription.wants(symbol) for subscription in self.subscriptions)
+
+    def publish(self, symbol, event_type, data):
+        """Queue an event for every subscriber of `symbol`; never blocks on clients"""
+        event = {'id': next(self._ids), 'symbol': symbol, 'type': event_type, 'data': data}
+        with self._lock:
+            subscriptions = [s for s in self.subscriptions if s.wants(symbol)]
+        for subscription in subscriptions:
+            subscription.push(event)
+        return len(subscriptions)
+
+
+def _finite(value):
+    """`value` with NaN and infinite floats replaced by None, which JSON.parse accepts"""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def format_sse(event):
+    """Serialize an event in the Server-Sent Events wire format"""
+    payload = json.dumps(_finite({'symbol': event['symbol'], **event['data']}), allow_nan=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
@@ -1,7 +1,8 @@
 # backend/models/technical_analysis.py
 import pandas as pd
-import numpy as np
-from datetime import datetime
+from models import indicators
+from models.indicators import INDICATOR_FEATURES
+from models.schema import to_numeric
 
 class TechnicalAnalysis:
     def __init__(self, df):
@@ -9,6 +10,9 @@ class TechnicalAnalysis:
         self.df = df.copy()
         if 'Date' in self.df.columns:
             self.df['Date'] = pd.to_datetime(self.df['Date'])
+            # Indicators run forward in time, so keep the bars oldest first
+            # whatever order the export came in
+            self.df = self.df.sort_values('Date', kind='stable').reset_index(drop=True)
         
     def calculate_moving_averages(self, short_window=20, long_window=50):
         """Calculate short and long-term moving averages"""
@@ -16,6 +20,14 @@ class TechnicalAnalysis:
         self.df['SMA_long'] = self.df['Close'].rolling(window=long_window).mean()
         return self.df
     
+    def calculate_indicators(self, names=INDICATOR_FEATURES):
+        """Add the named volatility, momentum and volume indicators (see models.indicators)"""
+        columns = indicators.indicator_columns(
+            self.df['High'], self.df['Low'], self.df['Close'], to_numeric(self.df['Volume']), names)
+        for name, values in columns.items():
+            self.df[name] = values
+        return self.df
+    
     def determine_trend(self, lookback_period=14):
         """
         Determine trend direction using multiple indicators
@@ -26,15 +38,11 @@ class TechnicalAnalysis:
         df['SMA_20'] = df['Close'].rolling(window=20).mean()
         df['SMA_50'] = df['Close'].rolling(window=50).mean()
         
-        # RSI calculation
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=lookback_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=lookback_period).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        # Wilder-smoothed RSI
+        df['RSI'] = indicators.rsi(df['Close'], window=lookback_period)
         
         # Get latest values
-        latest = df.iloc[0]  # Assuming data is in reverse chronological order
+        latest = df.iloc[-1]
         
         # Trend determination logic
         trend_signals = []
@@ -52,8 +60,8 @@ class TechnicalAnalysis:
             trend_signals.append('downtrend')
             
         # Price momentum
-        recent_prices = df['Close'].head(lookback_period)
-        price_change = (recent_prices.iloc[0] - recent_prices.iloc[-1]) / recent_prices.iloc[-1] * 100
+        recent_prices = df['Close'].tail(lookback_period)
+        price_change = (recent_prices.iloc[-1] - recent_prices.iloc[0]) / recent_prices.iloc[0] * 100
         
         if price_change > 5:
             trend_signals.append('uptrend')
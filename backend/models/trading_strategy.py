@@ -1,8 +1,11 @@
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from typing import List, Dict, Tuple
 import logging
+from models.schema import compact_frame, as_price, restore_prices
+from models.instrumentation import metrics
+from models.feature_store import STRATEGY_FEATURES
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,132 +19,131 @@ class TradeSignal:
     confidence: float
     indicators: Dict[str, float]
 
+@dataclass(frozen=True)
+class SignalParams:
+    """Rule weights, thresholds and the confidence needed to act on a signal"""
+    ema_weight: float = 0.3
+    rsi_weight: float = 0.2
+    macd_weight: float = 0.2
+    bb_weight: float = 0.15
+    volume_weight: float = 0.15
+    rsi_oversold: float = 30
+    rsi_overbought: float = 70
+    volume_ratio: float = 1.5
+    threshold: float = 0.5
+
+    def to_dict(self):
+        return asdict(self)
+
+DEFAULT_SIGNAL_PARAMS = SignalParams()
+
+# Indicator columns read by the signal scoring rules
+SIGNAL_COLUMNS = ['Close', 'EMA_9', 'EMA_21', 'RSI', 'MACD', 'MACD_Hist', 'BB_upper', 'BB_lower', 'Volume_Ratio']
+
+def score_signals(prev, current, params: SignalParams = DEFAULT_SIGNAL_PARAMS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score buy/sell confidence for one or many bars at once.
+    `prev` and `current` map indicator names to scalars or aligned arrays
+    (the previous and current bar of each row); returns (buy, sell) confidence arrays.
+    """
+    prev = {col: np.asarray(prev[col], dtype=float) for col in SIGNAL_COLUMNS if col in prev}
+    current = {col: np.asarray(current[col], dtype=float) for col in SIGNAL_COLUMNS}
+    buy_confidence = np.zeros(np.broadcast(current['Close']).shape)
+    sell_confidence = np.zeros_like(buy_confidence)
+    
+    # 1. EMA Crossover
+    buy_confidence += np.where((prev['EMA_9'] <= prev['EMA_21']) & (current['EMA_9'] > current['EMA_21']),
+                               params.ema_weight, 0)
+    sell_confidence += np.where((prev['EMA_9'] >= prev['EMA_21']) & (current['EMA_9'] < current['EMA_21']),
+                                params.ema_weight, 0)
+    
+    # 2. RSI Signals
+    buy_confidence += np.where(current['RSI'] < params.rsi_oversold, params.rsi_weight, 0)
+    sell_confidence += np.where(current['RSI'] > params.rsi_overbought, params.rsi_weight, 0)
+    
+    # 3. MACD Signals
+    buy_confidence += np.where((prev['MACD_Hist'] <= 0) & (current['MACD_Hist'] > 0), params.macd_weight, 0)
+    sell_confidence += np.where((prev['MACD_Hist'] >= 0) & (current['MACD_Hist'] < 0), params.macd_weight, 0)
+    
+    # 4. Bollinger Bands
+    buy_confidence += np.where(current['Close'] < current['BB_lower'], params.bb_weight, 0)
+    sell_confidence += np.where(current['Close'] > current['BB_upper'], params.bb_weight, 0)
+    
+    # 5. Volume Confirmation
+    high_volume = current['Volume_Ratio'] > params.volume_ratio
+    buy_confidence += np.where(high_volume & (buy_confidence > 0), params.volume_weight, 0)
+    sell_confidence += np.where(high_volume & (sell_confidence > 0), params.volume_weight, 0)
+    
+    return buy_confidence, sell_confidence
+
+def make_signal(date, action, confidence, current) -> TradeSignal:
+    """Build a TradeSignal from the current bar's indicator values"""
+    return TradeSignal(
+        date=date.strftime('%Y-%m-%d'),
+        action=action,
+        price=as_price(current['Close']),
+        confidence=confidence,
+        indicators={
+            'rsi': current['RSI'],
+            'macd': current['MACD'],
+            'volume_ratio': current['Volume_Ratio']
+        }
+    )
+
+def compute_signal_scores(df: pd.DataFrame, params: SignalParams = DEFAULT_SIGNAL_PARAMS) -> pd.DataFrame:
+    """
+    Buy/sell confidence for every bar of one symbol, scored like generate_signals.
+    Returns a chronological frame with Date, Close, buy and sell columns.
+    """
+    prepared = TradingStrategy(df.sort_values('Date')).prepare_data()
+    columns = {col: prepared[col].to_numpy(dtype=float) for col in SIGNAL_COLUMNS}
+    prev = {col: values[:-1] for col, values in columns.items()}
+    current = {col: values[1:] for col, values in columns.items()}
+    buy_confidence, sell_confidence = score_signals(prev, current, params)
+    
+    # The first bar has no predecessor and never signals
+    return pd.DataFrame({
+        'Date': prepared['Date'].to_numpy(),
+        'Close': columns['Close'],
+        'buy': np.concatenate(([0.0], buy_confidence)),
+        'sell': np.concatenate(([0.0], sell_confidence))
+    })
+
 class TradingStrategy:
-    def __init__(self, df: pd.DataFrame):
-        # Make a copy and ensure numeric columns are properly formatted
-        self.df = df.copy()
-        
-        # Ensure numeric columns are float
-        numeric_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        for col in numeric_columns:
-            if col in self.df.columns:
-                if self.df[col].dtype != 'float64':
-                    self.df[col] = self.df[col].astype(str).str.replace(',', '').astype(float)
-        
-        # Ensure Date is datetime
-        if 'Date' in self.df.columns and not pd.api.types.is_datetime64_any_dtype(self.df['Date']):
-            self.df['Date'] = pd.to_datetime(self.df['Date'])
+    def __init__(self, df: pd.DataFrame, feature_store=None, symbol=None,
+                 params: SignalParams = DEFAULT_SIGNAL_PARAMS):
+        # Compact view of the bars: float32 prices, integer volume, datetime dates.
+        # Columns already in that schema are shared with `df` and never modified
+        self.df = compact_frame(df)
+        # Optional FeatureStore to read indicators from instead of recomputing them
+        self.feature_store = feature_store
+        self.symbol = symbol
+        # Rule weights and thresholds, e.g. tuned by StrategyOptimizer
+        self.params = params
             
         self.signals = []
 
         
-    def analyze_temporal_patterns(self):
-        """Analyze temporal patterns in the stock price"""
-        try:
-            df = self.df.copy()
-            
-            # Add temporal features
-            df['Year'] = df['Date'].dt.year
-            df['Month'] = df['Date'].dt.month
-            df['DayOfWeek'] = df['Date'].dt.dayofweek  # Monday=0, Sunday=6
-            df['WeekOfYear'] = df['Date'].dt.isocalendar().week.astype(int)
-            
-            # Daily analysis (only trading days)
-            daily_analysis = df.groupby('DayOfWeek')['Close'].agg(['mean', 'max', 'min']).round(2)
-            # Only include Monday (0) through Friday (4)
-            daily_analysis = daily_analysis.iloc[0:5]
-            daily_analysis.index = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-            
-            # Weekly analysis
-            weekly_analysis = df.groupby('WeekOfYear')['Close'].agg(['mean', 'max', 'min']).round(2)
-            weekly_analysis.index = weekly_analysis.index.astype(str)  # Convert index to strings
-            
-            # Monthly analysis
-            monthly_analysis = df.groupby('Month')['Close'].agg(['mean', 'max', 'min']).round(2)
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                        'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            monthly_analysis.index = [month_names[i-1] for i in monthly_analysis.index]
-            
-            result = {
-                'daily': daily_analysis.to_dict('index'),
-                'weekly': weekly_analysis.to_dict('index'),
-                'monthly': monthly_analysis.to_dict('index')
-            }
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error in analyze_temporal_patterns: {str(e)}")
-            logger.error("Stack trace:", exc_info=True)
-            raise
-        
     def generate_signals(self) -> List[TradeSignal]:
         """Generate trading signals based on multiple indicators"""
         df = self.prepare_data()
         signals = []
         
-        for i in range(1, len(df)):
-            current = df.iloc[i]
-            prev = df.iloc[i-1]
-            
-            # Initialize confidence score
-            buy_confidence = 0
-            sell_confidence = 0
-            
-            # 1. EMA Crossover
-            if prev['EMA_9'] <= prev['EMA_21'] and current['EMA_9'] > current['EMA_21']:
-                buy_confidence += 0.3
-            elif prev['EMA_9'] >= prev['EMA_21'] and current['EMA_9'] < current['EMA_21']:
-                sell_confidence += 0.3
-            
-            # 2. RSI Signals
-            if current['RSI'] < 30:
-                buy_confidence += 0.2
-            elif current['RSI'] > 70:
-                sell_confidence += 0.2
-            
-            # 3. MACD Signals
-            if prev['MACD_Hist'] <= 0 and current['MACD_Hist'] > 0:
-                buy_confidence += 0.2
-            elif prev['MACD_Hist'] >= 0 and current['MACD_Hist'] < 0:
-                sell_confidence += 0.2
-            
-            # 4. Bollinger Bands
-            if current['Close'] < current['BB_lower']:
-                buy_confidence += 0.15
-            elif current['Close'] > current['BB_upper']:
-                sell_confidence += 0.15
-            
-            # 5. Volume Confirmation
-            if current['Volume_Ratio'] > 1.5:
-                buy_confidence += 0.15 if buy_confidence > 0 else 0
-                sell_confidence += 0.15 if sell_confidence > 0 else 0
-            
-            # Generate signal if confidence is high enough
-            if buy_confidence >= 0.5:
-                signals.append(TradeSignal(
-                    date=current['Date'].strftime('%Y-%m-%d'),
-                    action='buy',
-                    price=current['Close'],
-                    confidence=buy_confidence,
-                    indicators={
-                        'rsi': current['RSI'],
-                        'macd': current['MACD'],
-                        'volume_ratio': current['Volume_Ratio']
-                    }
-                ))
-            elif sell_confidence >= 0.5:
-                signals.append(TradeSignal(
-                    date=current['Date'].strftime('%Y-%m-%d'),
-                    action='sell',
-                    price=current['Close'],
-                    confidence=sell_confidence,
-                    indicators={
-                        'rsi': current['RSI'],
-                        'macd': current['MACD'],
-                        'volume_ratio': current['Volume_Ratio']
-                    }
-                ))
+        # Score every bar against its predecessor in one vectorized pass
+        columns = {col: df[col].to_numpy(dtype=float) for col in SIGNAL_COLUMNS}
+        prev = {col: values[:-1] for col, values in columns.items()}
+        current = {col: values[1:] for col, values in columns.items()}
+        buy_confidence, sell_confidence = score_signals(prev, current, self.params)
+        
+        # Generate signal if confidence is high enough
+        threshold = self.params.threshold
+        for i in np.flatnonzero((buy_confidence >= threshold) | (sell_confidence >= threshold)):
+            row = {col: values[i + 1] for col, values in columns.items()}
+            date = df['Date'].iloc[i + 1]
+            if buy_confidence[i] >= threshold:
+                signals.append(make_signal(date, 'buy', buy_confidence[i], row))
+            else:
+                signals.append(make_signal(date, 'sell', sell_confidence[i], row))
         
         self.signals = signals
         return signals
@@ -186,7 +188,7 @@ class TradingStrategy:
         # Calculate final portfolio value
         final_value = balance
         if position > 0:
-            final_value += position * self.df['Close'].iloc[-1]
+            final_value += position * as_price(self.df['Close'].iloc[-1])
             
         return {
             'initial_capital': initial_capital,
@@ -198,13 +200,15 @@ class TradingStrategy:
     def analyze_temporal_patterns(self):
         """Analyze temporal patterns in the stock price"""
         try:
-            df = self.df.copy()
-            
-            # Add temporal features
-            df['Year'] = df['Date'].dt.year.astype(int)
-            df['Month'] = df['Date'].dt.month.astype(int)
-            df['DayOfWeek'] = df['Date'].dt.dayofweek.astype(int)  # Monday=0, Sunday=6
-            df['WeekOfYear'] = df['Date'].dt.isocalendar().week.astype(int)
+            # Only the grouping keys and a float64 Close at the export
+            # precision are allocated, so reported values carry no float32 noise
+            dates = self.df['Date'].dt
+            df = pd.DataFrame({
+                'Close': restore_prices(self.df[['Close']])['Close'],
+                'Month': dates.month.astype(int),
+                'DayOfWeek': dates.dayofweek.astype(int),  # Monday=0, Sunday=6
+                'WeekOfYear': dates.isocalendar().week.astype(int)
+            })
             
             # Daily analysis (only trading days)
             daily_analysis = df.groupby('DayOfWeek')['Close'].agg(['mean', 'max', 'min']).round(2)
@@ -244,43 +248,65 @@ class TradingStrategy:
     
     def prepare_data(self):
         """Prepare data with all required indicators"""
+        with metrics.stage('strategy_indicators'):
+            return self._prepare_data()
+    
+    def _prepare_data(self):
         try:
-            df = self.df.copy()
+            # float64 prices at the export precision, so indicators and the
+            # values reported with signals carry no float32 noise
+            df = restore_prices(self.df)
+            
+            if self.feature_store is not None:
+                # Stored indicators are aligned to this frame's rows by date
+                features = self.feature_store.features_for(self.symbol, df['Date'], STRATEGY_FEATURES)
+                return self._finish_indicators(df, {name: features[name] for name in STRATEGY_FEATURES})
+            
+            indicators = {}
+            close = df['Close']
             
             # Calculate EMAs
-            df['EMA_9'] = df['Close'].ewm(span=9, adjust=False).mean()
-            df['EMA_21'] = df['Close'].ewm(span=21, adjust=False).mean()
+            indicators['EMA_9'] = close.ewm(span=9, adjust=False).mean()
+            indicators['EMA_21'] = close.ewm(span=21, adjust=False).mean()
             
             # Calculate RSI
-            delta = df['Close'].diff()
+            delta = close.diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
             rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
+            indicators['RSI'] = 100 - (100 / (1 + rs))
             
             # Calculate MACD
-            exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-            df['MACD'] = exp1 - exp2
-            df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-            df['MACD_Hist'] = df['MACD'] - df['Signal_Line']
+            exp1 = close.ewm(span=12, adjust=False).mean()
+            exp2 = close.ewm(span=26, adjust=False).mean()
+            indicators['MACD'] = exp1 - exp2
+            indicators['Signal_Line'] = indicators['MACD'].ewm(span=9, adjust=False).mean()
+            indicators['MACD_Hist'] = indicators['MACD'] - indicators['Signal_Line']
             
             # Calculate Bollinger Bands
-            df['BB_middle'] = df['Close'].rolling(window=20).mean()
-            bb_std = df['Close'].rolling(window=20).std()
-            df['BB_upper'] = df['BB_middle'] + (bb_std * 2)
-            df['BB_lower'] = df['BB_middle'] - (bb_std * 2)
+            indicators['BB_middle'] = close.rolling(window=20).mean()
+            bb_std = close.rolling(window=20).std()
+            indicators['BB_upper'] = indicators['BB_middle'] + (bb_std * 2)
+            indicators['BB_lower'] = indicators['BB_middle'] - (bb_std * 2)
             
             # Volume analysis
-            df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-            df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
+            indicators['Volume_MA'] = df['Volume'].rolling(window=20).mean()
+            indicators['Volume_Ratio'] = df['Volume'] / indicators['Volume_MA']
             
-            # Fill missing values
-            df = df.ffill().bfill()
-            
-            return df
+            return self._finish_indicators(df, indicators)
             
         except Exception as e:
             logger.error(f"Error in prepare_data: {str(e)}")
             logger.error("Stack trace:", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+    
+    def _finish_indicators(self, bars, indicators):
+        """The bars joined with the new float64 indicator columns"""
+        indicators = pd.DataFrame({name: np.asarray(values, dtype=np.float64)
+                                   for name, values in indicators.items()}, index=bars.index)
+        
+        # Fill missing values
+        indicators = indicators.ffill().bfill()
+        if bars.isna().to_numpy().any():
+            bars = bars.ffill().bfill()
+        return pd.concat([bars, indicators], axis=1, copy=False)
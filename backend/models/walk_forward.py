@@ -0,0 +1,171 @@
+# backend/models/walk_forward.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import logging
+from models.schema import to_numeric
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def walk_forward_segments(n_rows, train_window, refit_every, sequence_length):
+    """
+    (train_start, test_start, test_stop) row ranges of a walk-forward run.
+    Each segment refits on the `train_window` rows before `test_start` and
+    predicts the next `refit_every` rows out of sample.
+    """
+    if train_window <= sequence_length:
+        raise ValueError(f"train_window must exceed sequence_length ({sequence_length})")
+    segments = []
+    for test_start in range(train_window, n_rows, refit_every):
+        segments.append((test_start - train_window, test_start, min(test_start + refit_every, n_rows)))
+    return segments
+
+
+def _init_worker(tf_threads):
+    """Limit each worker's TensorFlow pools so parallel refits don't oversubscribe the CPU"""
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_segment(task):
+    """Refit a fresh model on one training window and predict its test rows (runs in a worker)"""
+    from models.stock_model import StockPricePredictor
+    import tensorflow as tf
+
+    frame, train_rows, options = task['frame'], task['train_rows'], task['options']
+    tf.keras.utils.set_random_seed(options['seed'] + task['segment'])
+
+    predictor = StockPricePredictor(sequence_length=options['sequence_length'])
+    predictor.train(frame.iloc[:train_rows], epochs=options['epochs'],
+                    batch_size=options['batch_size'], validation_split=0)
+
+    # Indicators are causal, so computing them over train + test rows sees no future bars;
+    # predictions whose target row falls in the test range are out of sample
+    predictions = predictor.predict_batch(frame)
+    first = train_rows - predictor.sequence_length
+    return {
+        'segment': task['segment'],
+        'predicted': predictions[first:first + len(frame) - train_rows]
+    }
+
+
+class WalkForwardEvaluator:
+    """Walk-forward evaluation of StockPricePredictor with a refit every `refit_every` rows"""
+
+    def __init__(self, sequence_length=60, train_window=500, refit_every=20, epochs=10,
+                 batch_size=32, max_workers=None, signal_threshold=0.0, transaction_cost_bps=10.0,
+                 seed=42):
+        self.sequence_length = sequence_length
+        self.train_window = train_window
+        self.refit_every = refit_every
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.max_workers = max_workers or max((os.cpu_count() or 1) // 2, 1)
+        self.signal_threshold = signal_threshold
+        self.cost_rate = transaction_cost_bps / 10000
+        self.seed = seed
+
+    def run(self, df):
+        """Run every segment in parallel and return out-of-sample errors and a backtest"""
+        try:
+            df = df.sort_values('Date').reset_index(drop=True)
+            data = pd.DataFrame({col: to_numeric(df[col]).astype(np.float64) for col in MODEL_COLUMNS})
+            segments = walk_forward_segments(len(data), self.train_window, self.refit_every,
+                                             self.sequence_length)
+            if not segments:
+                raise ValueError(f"Need more than {self.train_window} rows for walk-forward evaluation")
+
+            options = {'sequence_length': self.sequence_length, 'epochs': self.epochs,
+                       'batch_size': self.batch_size, 'seed': self.seed}
+            tasks = [{'segment': k, 'frame': data.iloc[start:stop], 'train_rows': test_start - start,
+                      'options': options}
+                     for k, (start, test_start, stop) in enumerate(segments)]
+
+            # Segments are independent; spawn keeps TensorFlow state out of forked children
+            workers = min(self.max_workers, len(tasks))
+            tf_threads = max((os.cpu_count() or 1) // workers, 1)
+            logger.info(f"Walk-forward: {len(tasks)} segment(s) on {workers} process(es)")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(tf_threads,)) as executor:
+                results = sorted(executor.map(run_segment, tasks), key=lambda r: r['segment'])
+
+            predicted = np.full(len(data), np.nan)
+            for (start, test_start, stop), result in zip(segments, results):
+                predicted[test_start:stop] = result['predicted']
+
+            return self._summarize(df['Date'], data['Close'].to_numpy(), predicted, segments)
+
+        except Exception as e:
+            logger.error(f"Error in walk-forward evaluation: {str(e)}")
+            raise
+
+    def _summarize(self, dates, close, predicted, segments):
+        dates = pd.to_datetime(dates).dt.strftime('%Y-%m-%d').to_numpy()
+        first = segments[0][1]
+
+        segment_errors = []
+        for start, test_start, stop in segments:
+            segment_errors.append({
+                'train_start': dates[start],
+                'test_start': dates[test_start],
+                'test_end': dates[stop - 1],
+                **error_metrics(predicted[test_start:stop], close[test_start:stop])
+            })
+
+        return {
+            'train_window': self.train_window,
+            'refit_every': self.refit_every,
+            'overall': error_metrics(predicted[first:], close[first:]),
+            'segments': segment_errors,
+            'predictions': [
+                {'date': dates[i], 'actual': float(close[i]), 'predicted': float(predicted[i])}
+                for i in range(first, len(close))
+            ],
+            'backtest': self.backtest(dates, close, predicted, first)
+        }
+
+    def backtest(self, dates, close, predicted, first):
+        """
+        Long/flat strategy driven by the predictions: hold from close t to
+        close t+1 when the forecast for t+1 beats the close at t by the threshold.
+        """
+        long = np.zeros(len(close), dtype=bool)
+        long[first - 1:-1] = predicted[first:] > close[first - 1:-1] * (1 + self.signal_threshold)
+
+        returns = np.zeros(len(close))
+        returns[first:] = close[first:] / close[first - 1:-1] - 1
+        held = long[first - 1:-1]
+        changes = np.diff(np.concatenate(([False], held)).astype(int)) != 0
+
+        strategy_returns = held * returns[first:] - changes * self.cost_rate
+        equity = np.cumprod(1 + strategy_returns)
+        direction_hits = np.sign(predicted[first:] - close[first - 1:-1]) == np.sign(returns[first:])
+
+        return {
+            'return_pct': float((equity[-1] - 1) * 100),
+            'buy_and_hold_pct': float((close[-1] / close[first - 1] - 1) * 100),
+            'trades': int(changes.sum()),
+            'exposure_pct': float(held.mean() * 100),
+            'directional_accuracy_pct': float(direction_hits.mean() * 100),
+            'equity': [{'date': dates[first + i], 'equity': float(value)} for i, value in enumerate(equity)]
+        }
+
+
+def error_metrics(predictions, actuals):
+    """The same error metrics train.evaluate_model reports"""
+    errors = predictions - actuals
+    return {
+        'mse': float(np.mean(errors ** 2)),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors))),
+        'mape': float(np.mean(np.abs(errors / actuals)) * 100)
+    }
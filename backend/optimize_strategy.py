@@ -0,0 +1,63 @@
+# backend/optimize_strategy.py
+"""
+Tune the TradingStrategy signal weights and thresholds by random search.
+
+    python optimize_strategy.py --data data/raw/<export>.csv --trials 500
+    python optimize_strategy.py --data data/raw/*.csv --folds 4 --output results.json
+"""
+import os
+import json
+import argparse
+import pandas as pd
+from models.strategy_optimizer import StrategyOptimizer
+
+
+def load_frames(paths):
+    """{symbol: frame} from price exports, one symbol per file or a Symbol column"""
+    frames = {}
+    for path in paths:
+        df = pd.read_csv(path)
+        if 'Symbol' in df.columns:
+            frames.update({str(symbol): group for symbol, group in df.groupby('Symbol')})
+        else:
+            # nepsealpha_export_price_<SYMBOL>_<start>_<end>.csv
+            frames[os.path.basename(path).split('_')[3]] = df
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search TradingStrategy weights and thresholds')
+    parser.add_argument('--data', nargs='+', required=True, help='Price export file(s)')
+    parser.add_argument('--trials', type=int, default=200, help='Parameter sets to evaluate')
+    parser.add_argument('--folds', type=int, default=4, help='Walk-forward validation folds')
+    parser.add_argument('--train-fraction', type=float, default=0.5,
+                        help='Share of the history used in-sample before the first fold')
+    parser.add_argument('--cost-bps', type=float, default=10.0, help='Transaction cost per trade')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=5, help='Configurations to report')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the full report to this JSON file')
+    args = parser.parse_args()
+
+    optimizer = StrategyOptimizer(load_frames(args.data), n_trials=args.trials, n_folds=args.folds,
+                                  train_fraction=args.train_fraction, max_workers=args.workers,
+                                  transaction_cost_bps=args.cost_bps, top_k=args.top, seed=args.seed)
+    report = optimizer.run()
+
+    print(f"\n{report['trials']} trial(s) over {report['symbols']} symbol(s), "
+          f"in-sample {report['in_sample']['start']} to {report['in_sample']['end']}")
+    print(f"{'':<10} {'in-sample':>10} {'validation':>11} {'trades':>7}")
+    for name, result in [('default', report['baseline'])] + [(f"#{i + 1}", r) for i, r in enumerate(report['top'])]:
+        print(f"{name:<10} {result['in_sample_return_pct']:>9.2f}% {result['validation_return_pct']:>10.2f}% "
+              f"{result['in_sample_trades'] + result['validation_trades']:>7}")
+    print(f"Walk-forward re-optimized return: {report['walk_forward']['return_pct']:.2f}%")
+    print(f"Best parameters: {report['top'][0]['params']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# backend/serve.py
+"""
+Production entry point: serves the Flask app under a pre-forking gunicorn server.
+
+    python serve.py --workers 4 --threads 4 --tf-intra-op-threads 2
+    python serve.py --bind 0.0.0.0:8000 --watch-model 30
+    python serve.py --model-type global
+
+The price data is loaded once in the master before workers are forked, so
+workers share those pages copy-on-write. With --shared-arrays-dir the price
+and indicator arrays are instead published as versioned memory-mapped files
+that every worker maps read-only. TensorFlow is not fork-safe once
+its runtime has started, so each worker loads the model right after the
+fork with its own intra/inter-op thread limits (--preload-model overrides this
+for TF builds known to be fork-safe).
+Send SIGHUP to the master (or pass --watch-model) to roll workers onto a
+new model version without dropping in-flight requests.
+
+/api/stream needs --workers 1: bars posted to /api/ingest only reach the
+subscribers of the worker that handled the post, so with more workers the
+endpoint refuses connections. Each connected stream client also holds one
+of the worker's --threads for as long as it stays connected.
+"""
+import os
+import signal
+import argparse
+import threading
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def parse_args():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Run the stock API under gunicorn')
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:5000'),
+                        help='Address to listen on (env BIND)')
+    parser.add_argument('--workers', type=int, default=env_int('WEB_WORKERS', cpu_count),
+                        help='Worker processes (env WEB_WORKERS)')
+    parser.add_argument('--threads', type=int, default=env_int('WEB_THREADS', 4),
+                        help='Request threads per worker (env WEB_THREADS)')
+    parser.add_argument('--timeout', type=int, default=env_int('WEB_TIMEOUT', 120),
+                        help='Worker timeout in seconds; retraining can take minutes')
+    parser.add_argument('--tf-intra-op-threads', type=int, default=env_int('TF_INTRA_OP_THREADS', 0),
+                        help='TensorFlow intra-op threads per worker, 0 lets TF decide')
+    parser.add_argument('--tf-inter-op-threads', type=int, default=env_int('TF_INTER_OP_THREADS', 0),
+                        help='TensorFlow inter-op threads per worker, 0 lets TF decide')
+    parser.add_argument('--preload-model', action='store_true',
+                        help='Also load the model in the master; only safe with fork-safe TF builds')
+    parser.add_argument('--shared-arrays-dir', default=os.environ.get('SHARED_ARRAYS_DIR'),
+                        help='Publish price/indicator arrays here as memory-mapped snapshots '
+                             'that workers attach to read-only (env SHARED_ARRAYS_DIR)')
+    parser.add_argument('--model-variant', choices=['float', 'quantized'],
+                        default=os.environ.get('MODEL_VARIANT', 'float'),
+                        help='Serve the promoted quantized TFLite variant instead of the float model (env MODEL_VARIANT)')
+    parser.add_argument('--model-type', choices=['symbol', 'global'], default=os.environ.get('MODEL_TYPE', 'symbol'),
+                        help='Serve the per-symbol model or the cross-symbol model from train_global.py (env MODEL_TYPE)')
+    parser.add_argument('--watch-model', type=float, default=float(os.environ.get('WATCH_MODEL', 0)),
+                        help='Poll the saved model every N seconds and reload workers when it changes')
+    return parser.parse_args()
+
+
+def model_signature(app_module):
+    """Modification times of the saved model files, or None if they are missing"""
+    from models.quantization import quantized_paths
+
+    try:
+        model_path, scaler_path = app_module.serving_model_paths()
+        signature = (os.path.getmtime(model_path), os.path.getmtime(scaler_path))
+    except OSError:
+        return None
+    # A newly promoted quantized variant also warrants a reload
+    tflite_path, _ = quantized_paths(model_path)
+    return signature + ((os.path.getmtime(tflite_path),) if os.path.exists(tflite_path) else ())
+
+
+def watch_model(app_module, interval):
+    """Master-side thread that asks gunicorn for a graceful reload on a new model version"""
+    last = model_signature(app_module)
+    while True:
+        threading.Event().wait(interval)
+        current = model_signature(app_module)
+        if current is not None and current != last:
+            logger.info("New model version detected, reloading workers")
+            last = current
+            os.kill(os.getpid(), signal.SIGHUP)
+
+
+def configure_tensorflow(intra_op_threads, inter_op_threads):
+    """Limit TensorFlow thread pools; must run before the TF runtime starts"""
+    import tensorflow as tf
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def main():
+    args = parse_args()
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("gunicorn is required for production serving: pip install gunicorn")
+
+    # Keep TensorFlow's runtime out of the master so forking stays safe
+    os.environ['STOCK_APP_DEFER_MODEL_LOAD'] = '1'
+    os.environ['MODEL_VARIANT'] = args.model_variant
+    os.environ['MODEL_TYPE'] = args.model_type
+    os.environ['TF_INTRA_OP_THREADS'] = str(args.tf_intra_op_threads)
+    os.environ['SERVING_WORKERS'] = str(args.workers)
+    if args.shared_arrays_dir:
+        os.environ['SHARED_ARRAYS_DIR'] = args.shared_arrays_dir
+    import app as app_module
+
+    def load_price_data():
+        if args.shared_arrays_dir:
+            # Workers see the new snapshot through its version counter
+            app_module.publish_shared_arrays()
+        else:
+            app_module.get_bar_store()
+
+    class StockApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind)
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread' if args.threads > 1 else 'sync')
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('graceful_timeout', args.timeout)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('when_ready', self.when_ready)
+            self.cfg.set('post_fork', self.post_fork)
+
+        def load(self):
+            # Runs in the master: load the price data once before forking
+            load_price_data()
+            if args.preload_model:
+                configure_tensorflow(args.tf_intra_op_threads, args.tf_inter_op_threads)
+                app_module.load_trained_model()
+            return app_module.app
+
+        def reload(self):
+            # Only reloads the config; gunicorn never calls load() again
+            super().reload()
+            # Pick up a replaced data file before the new workers fork
+            load_price_data()
+            if args.preload_model:
+                # Workers inherit the master's model, so the new version is loaded here
+                app_module.load_trained_model()
+
+        @staticmethod
+        def when_ready(server):
+            if args.watch_model > 0:
+                threading.Thread(target=watch_model, args=(app_module, args.watch_model),
+                                 daemon=True, name='model-watcher').start()
+
+        @staticmethod
+        def post_fork(server, worker):
+            if not args.preload_model:
+                configure_tensorflow(args.tf_intra_op_threads, args.tf_inter_op_threads)
+                app_module.load_trained_model()
+            server.log.info(f"Worker {worker.pid} loaded model version {app_module.model.model_version}")
+
+    StockApplication().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,30 @@
 import os
+import copy
+import json
+import time
+import argparse
 import pandas as pd
 import numpy as np
 from models.stock_model import StockPricePredictor
+from models.walk_forward import WalkForwardEvaluator
+from models.feature_store import FeatureStore, MODEL_FEATURES
+from models.indicators import INDICATOR_FEATURES
+from models.quantization import (QUANTIZATION_MODES, QuantizedModel, quantize_model, within_tolerance,
+                                 write_variant, remove_variant)
 
-def prepare_training_data(df):
-    """Prepare and enhance training data with technical indicators"""
+def prepare_training_data(df, feature_store=None, symbol=None):
+    """
+    Prepare and enhance training data with technical indicators.
+    With a feature store the indicators are brought up to date there and
+    read back instead of being recomputed.
+    """
     # Convert 'Date' to datetime if it isn't already
     df['Date'] = pd.to_datetime(df['Date'])
     
+    if feature_store is not None:
+        feature_store.update(symbol, df)
+        features = feature_store.features_for(symbol, df['Date'], MODEL_FEATURES)
+    
     # Remove unwanted columns
     numeric_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
     df = df[numeric_columns].copy()
@@ -15,6 +32,11 @@ def prepare_training_data(df):
     # Convert Volume to numeric, removing any non-numeric characters
     df['Volume'] = pd.to_numeric(df['Volume'].astype(str).str.replace(',', ''), errors='coerce')
     
+    if feature_store is not None:
+        for name in MODEL_FEATURES:
+            df[name] = np.asarray(features[name])
+        return df.fillna(df.bfill())
+    
     # Calculate technical indicators
     df['SMA_20'] = df['Close'].rolling(window=20).mean()
     df['SMA_50'] = df['Close'].rolling(window=50).mean()
@@ -74,21 +96,168 @@ def evaluate_model(model, test_data):
         'mape': mape
     }
 
+def promote_quantized_model(model, test_data, model_path, mode='dynamic', tolerance=0.02):
+    """
+    Quantize a saved model and promote the variant only if its held-out
+    error stays within `tolerance` (relative) of the float model's.
+    """
+    content = quantize_model(model.model, mode)
+    quantized = copy.copy(model)
+    quantized.model = QuantizedModel(content)
+    
+    start = time.perf_counter()
+    float_metrics = evaluate_model(model, test_data)
+    float_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    quantized_metrics = evaluate_model(quantized, test_data)
+    quantized_seconds = time.perf_counter() - start
+    
+    promoted = within_tolerance(float_metrics, quantized_metrics, tolerance)
+    report = {
+        'mode': mode,
+        'tolerance': tolerance,
+        'source_version': model.model_version,
+        'float_metrics': {key: float(value) for key, value in float_metrics.items()},
+        'quantized_metrics': {key: float(value) for key, value in quantized_metrics.items()},
+        'evaluation_seconds': {'float': float_seconds, 'quantized': quantized_seconds},
+        'size_bytes': len(content),
+        'promoted': promoted
+    }
+    if promoted:
+        write_variant(model_path, content, report)
+    else:
+        # A variant left from an older model must not be served with the new one
+        remove_variant(model_path)
+    return report
+
+def finish_training(args, model, df, test_data, model_path, scaler_path):
+    """Evaluate, calibrate, save and optionally quantize a trained model"""
+    # Evaluate model
+    print("Evaluating model...")
+    metrics = evaluate_model(model, test_data)
+    print("\\nModel Performance Metrics:")
+    print(f"Mean Squared Error: {metrics['mse']:.2f}")
+    print(f"Root Mean Squared Error: {metrics['rmse']:.2f}")
+    print(f"Mean Absolute Error: {metrics['mae']:.2f}")
+    print(f"Mean Absolute Percentage Error: {metrics['mape']:.2f}%")
+
+    # Calibrate Monte Carlo dropout intervals on the held-out split
+    print("Calibrating prediction intervals...")
+    uncertainty = model.calibrate_uncertainty(test_data)
+    print(f"Interval coverage per horizon: {[round(c, 2) for c in uncertainty['coverage']]}")
+
+    # Save model
+    print("\\nSaving model...")
+    model.save_model(model_path, scaler_path)
+
+    if args.quantize:
+        print(f"\nQuantizing model ({args.quantize})...")
+        report = promote_quantized_model(model, test_data, model_path, args.quantize, args.quantize_tolerance)
+        print(f"Float RMSE {report['float_metrics']['rmse']:.2f}, "
+              f"quantized RMSE {report['quantized_metrics']['rmse']:.2f}, "
+              f"size {report['size_bytes'] / 1024:.0f} KiB")
+        print("Quantized variant promoted" if report['promoted']
+              else f"Quantized variant rejected: error grew by more than {args.quantize_tolerance:.0%}")
+
+    # Test prediction
+    print("\\nTesting prediction...")
+    latest_data = df.head(60)
+    test_prediction = model.predict_next_day(latest_data)
+    print(f"Predicted next day closing price: Rs. {test_prediction:.2f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Train the stock price model')
+    parser.add_argument('--data', default='C:\\Users\\Acer\\OneDrive\\Desktop\\Stock Trading Model 2\\backend\\data\\raw\\nepsealpha_export_price_UNL_2020-01-03_2025-01-03.csv',
+                        help='Price export CSV to train on')
+    parser.add_argument('--walk-forward', action='store_true',
+                        help='Evaluate with periodic refits over a sliding window instead of one 80/20 split')
+    parser.add_argument('--train-window', type=int, default=500, help='Walk-forward training window in rows')
+    parser.add_argument('--refit-every', type=int, default=20, help='Walk-forward refit interval in rows')
+    parser.add_argument('--epochs', type=int, default=50, help='Training epochs (per refit when walking forward)')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel walk-forward processes')
+    parser.add_argument('--output', help='Write the walk-forward results to this JSON file')
+    parser.add_argument('--feature-store', help='Read indicators from (and fill) the feature store in this directory')
+    parser.add_argument('--symbol', help='Symbol key in the feature store, defaults to the one in the file name')
+    parser.add_argument('--early-stopping-patience', type=int, default=10,
+                        help='Stop after this many epochs without val_loss improvement (0 disables)')
+    parser.add_argument('--reduce-lr-patience', type=int, default=5,
+                        help='Halve the learning rate after this many epochs without improvement (0 disables)')
+    parser.add_argument('--checkpoint-dir', default='models/checkpoints',
+                        help='Directory for per-epoch training checkpoints')
+    parser.add_argument('--checkpoint-every', type=int, default=1, help='Checkpoint every N epochs')
+    parser.add_argument('--resume', action='store_true', help='Resume from the last training checkpoint')
+    parser.add_argument('--fine-tune', action='store_true',
+                        help='Fine-tune the saved model on a replay buffer instead of training from scratch')
+    parser.add_argument('--fine-tune-epochs', type=int, default=3, help='Epochs for --fine-tune')
+    parser.add_argument('--scaler-policy', choices=['keep', 'extend'], default='extend',
+                        help='Keep the fitted scaler, or extend it when the data drifts out of range')
+    parser.add_argument('--extra-features', nargs='+', choices=INDICATOR_FEATURES, default=[],
+                        help='Additional indicator inputs for the model (ignored with --fine-tune)')
+    parser.add_argument('--quantize', choices=QUANTIZATION_MODES,
+                        help='Also build a quantized variant and promote it if accurate enough')
+    parser.add_argument('--quantize-tolerance', type=float, default=0.02,
+                        help='Largest allowed relative increase in RMSE/MAE/MAPE for the quantized variant')
+    return parser.parse_args()
+
+def run_walk_forward(args):
+    """Walk-forward evaluation: out-of-sample error over time and a prediction-driven backtest"""
+    df = pd.read_csv(args.data)
+    df['Date'] = pd.to_datetime(df['Date'])
+    evaluator = WalkForwardEvaluator(
+        train_window=args.train_window,
+        refit_every=args.refit_every,
+        epochs=args.epochs,
+        max_workers=args.workers
+    )
+    results = evaluator.run(df)
+
+    overall = results['overall']
+    print("\nOut-of-sample Performance Metrics:")
+    print(f"Root Mean Squared Error: {overall['rmse']:.2f}")
+    print(f"Mean Absolute Error: {overall['mae']:.2f}")
+    print(f"Mean Absolute Percentage Error: {overall['mape']:.2f}%")
+    print("\nError by segment:")
+    for segment in results['segments']:
+        print(f"  {segment['test_start']} .. {segment['test_end']}: "
+              f"RMSE {segment['rmse']:.2f}, MAPE {segment['mape']:.2f}%")
+
+    backtest = results['backtest']
+    print(f"\nPrediction-driven strategy return: {backtest['return_pct']:.2f}% "
+          f"(buy and hold {backtest['buy_and_hold_pct']:.2f}%, {backtest['trades']} trades, "
+          f"directional accuracy {backtest['directional_accuracy_pct']:.1f}%)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
 def main():
+    args = parse_args()
+    if args.walk_forward:
+        return run_walk_forward(args)
+
     try:
         # Create directories if they don't exist
         os.makedirs('models/saved_models', exist_ok=True)
         os.makedirs('data/raw', exist_ok=True)
 
         # Define paths
-        data_path = 'C:\\Users\\Acer\\OneDrive\\Desktop\\Stock Trading Model 2\\backend\\data\\raw\\nepsealpha_export_price_UNL_2020-01-03_2025-01-03.csv'
+        data_path = args.data
         model_path = 'models/saved_models/stock_model.h5'
         scaler_path = 'models/saved_models/scaler.pkl'
 
         # Load and prepare data
         print("Loading and preparing data...")
-        df = pd.read_csv(data_path)
-        df = prepare_training_data(df)
+        # Exports are newest first; indicators and training windows run forward in time
+        raw_df = pd.read_csv(data_path)
+        raw_df = raw_df.sort_values('Date', key=pd.to_datetime, kind='stable').reset_index(drop=True)
+        if args.feature_store:
+            symbol = args.symbol or os.path.basename(data_path).split('_')[3]
+            df = prepare_training_data(raw_df, FeatureStore(args.feature_store), symbol)
+        else:
+            df = prepare_training_data(raw_df)
         print(f"Data prepared successfully. Shape: {df.shape}")
 
         # Split data into training and testing sets (80-20 split)
@@ -96,36 +265,42 @@ def main():
         train_data = df[:train_size]
         test_data = df[train_size:]
 
-        # Initialize and train model
-        print("Initializing model...")
-        model = StockPricePredictor(sequence_length=60)
-
-        print("Training model...")
-        history = model.train(
-            data=train_data,
-            epochs=50,
-            batch_size=32,
-            validation_split=0.2
-        )
-
-        # Evaluate model
-        print("Evaluating model...")
-        metrics = evaluate_model(model, test_data)
-        print("\\nModel Performance Metrics:")
-        print(f"Mean Squared Error: {metrics['mse']:.2f}")
-        print(f"Root Mean Squared Error: {metrics['rmse']:.2f}")
-        print(f"Mean Absolute Error: {metrics['mae']:.2f}")
-        print(f"Mean Absolute Percentage Error: {metrics['mape']:.2f}%")
-
-        # Save model
-        print("\\nSaving model...")
-        model.save_model(model_path, scaler_path)
-
-        # Test prediction
-        print("\\nTesting prediction...")
-        latest_data = df.head(60)
-        test_prediction = model.predict_next_day(latest_data)
-        print(f"Predicted next day closing price: Rs. {test_prediction:.2f}")
+        if args.fine_tune:
+            # Refresh the saved model on a replay buffer instead of training from scratch
+            print("Fine-tuning saved model...")
+            model = StockPricePredictor(sequence_length=60)
+            model.load_model(model_path, scaler_path)
+            report = model.fine_tune(
+                train_data,
+                epochs=args.fine_tune_epochs,
+                scaler_policy=args.scaler_policy,
+                dates=raw_df['Date'].iloc[:train_size],
+                features=train_data if args.feature_store else None
+            )
+            print(f"Fine-tuned for {len(report['loss'])} epoch(s) on "
+                  f"{report['recent_windows'] + report['replay_windows']} windows, "
+                  f"scaler {'extended' if report['scaler_updated'] else 'kept'}")
+        else:
+            # Initialize and train model
+            print("Initializing model...")
+            model = StockPricePredictor(sequence_length=60, extra_features=args.extra_features)
+
+            print("Training model...")
+            history = model.train(
+                data=train_data,
+                epochs=args.epochs,
+                batch_size=32,
+                validation_split=0.2,
+                features=train_data if args.feature_store else None,
+                early_stopping_patience=args.early_stopping_patience,
+                reduce_lr_patience=args.reduce_lr_patience,
+                checkpoint_dir=args.checkpoint_dir,
+                checkpoint_every=args.checkpoint_every,
+                resume=args.resume
+            )
+            print(f"Trained for {len(history.history['loss'])} epoch(s)")
+
+        finish_training(args, model, df, test_data, model_path, scaler_path)
 
         print("\\nTraining completed successfully!")
 
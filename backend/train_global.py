@@ -0,0 +1,142 @@
+# backend/train_global.py
+"""
+Train one cross-symbol model and compare it per symbol with the per-symbol
+models in the registry (see batch_train.py) on the same held-out bars.
+
+    python train_global.py --data data/raw/*.csv
+    python train_global.py --data data/raw/*.csv --epochs 30 --embedding-dim 16 --report global.json
+    python train_global.py --data data/raw/*.csv --extra-features ATR ADX RSI_Wilder OBV
+
+Per-symbol models trained on other bars or with another train fraction have
+seen part of the held-out rows, so they are reported as stale, not compared.
+Serve the saved model with `python serve.py --model-type global`.
+"""
+import os
+import json
+import time
+import argparse
+from batch_train import load_frames
+from models.batch_training import data_version
+from models.global_model import GlobalStockPredictor
+from models.stock_model import StockPricePredictor
+from models.model_registry import ModelRegistry
+from models.walk_forward import error_metrics
+from models.schema import restore_prices
+from models.indicators import INDICATOR_FEATURES
+
+
+def compare_registry(registry, symbol, frame, train_rows, train_fraction):
+    """
+    Held-out error of the symbol's registered per-symbol model; None without
+    one, or {'stale': reason} if it was trained on other bars or another split.
+    """
+    paths = registry.paths(symbol)
+    metadata = registry.metadata(symbol)
+    if metadata is None:
+        return None
+    if metadata.get('data_version') != data_version(frame):
+        return {'stale': 'trained on other bars'}
+    if metadata.get('options', {}).get('train_fraction') != train_fraction:
+        return {'stale': 'trained with another train fraction'}
+    model = StockPricePredictor(sequence_length=60)
+    model.load_model(paths['model'], paths['scaler'])
+    first = train_rows - model.sequence_length
+    predicted = model.predict_batch(frame)[first:first + len(frame) - train_rows]
+    return {**error_metrics(predicted, frame['Close'].to_numpy()[train_rows:]),
+            'parameters': model.model.count_params(),
+            'model_bytes': os.path.getsize(paths['model'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a global cross-symbol model')
+    parser.add_argument('--data', nargs='+', required=True, help='Price export file(s)')
+    parser.add_argument('--symbols', nargs='+', help='Only train on these symbols')
+    parser.add_argument('--model-dir', default='models/global',
+                        help='Where to save the global model (GLOBAL_MODEL_DIR when serving)')
+    parser.add_argument('--registry', default='models/registry', help='Per-symbol model registry to compare with')
+    parser.add_argument('--epochs', type=int, default=50, help='Training epochs')
+    parser.add_argument('--embedding-dim', type=int, default=8, help='Size of the learned symbol embedding')
+    parser.add_argument('--train-fraction', type=float, default=0.8, help='Share of each symbol used for training')
+    parser.add_argument('--early-stopping-patience', type=int, default=10,
+                        help='Stop after this many epochs without validation improvement (0 disables)')
+    parser.add_argument('--reduce-lr-patience', type=int, default=5,
+                        help='Halve the learning rate after this many epochs without improvement (0 disables)')
+    parser.add_argument('--extra-features', nargs='+', choices=INDICATOR_FEATURES, default=[],
+                        help='Additional indicator inputs for the model')
+    parser.add_argument('--report', help='Write the per-symbol comparison to this JSON file')
+    args = parser.parse_args()
+
+    # Chronological bars, split by the same fraction batch_train.py uses
+    frames = {symbol: restore_prices(df).sort_values('Date').reset_index(drop=True)
+              for symbol, df in load_frames(args.data, args.symbols).items()}
+    train_rows = {symbol: int(len(df) * args.train_fraction) for symbol, df in frames.items()}
+
+    model = GlobalStockPredictor(sequence_length=60, embedding_dim=args.embedding_dim,
+                                 extra_features=args.extra_features)
+    start = time.perf_counter()
+    history = model.train({symbol: df.iloc[:train_rows[symbol]] for symbol, df in frames.items()},
+                          epochs=args.epochs, early_stopping_patience=args.early_stopping_patience,
+                          reduce_lr_patience=args.reduce_lr_patience)
+    train_seconds = time.perf_counter() - start
+    print(f"Trained for {len(history.history['loss'])} epoch(s) in {train_seconds:.1f}s")
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    model_path = os.path.join(args.model_dir, 'stock_model.h5')
+    model.save_model(model_path, os.path.join(args.model_dir, 'scaler.pkl'))
+
+    start = time.perf_counter()
+    model.predict_many(frames)
+    batched_ms = (time.perf_counter() - start) * 1000
+
+    registry = ModelRegistry(args.registry)
+    results = []
+    for symbol, frame in frames.items():
+        rows = train_rows[symbol]
+        first = rows - model.sequence_length
+        predicted = model.predict_batch(frame, symbol)[first:first + len(frame) - rows]
+        results.append({'symbol': symbol, 'global': error_metrics(predicted, frame['Close'].to_numpy()[rows:]),
+                        'per_symbol': compare_registry(registry, symbol, frame, rows, args.train_fraction)})
+
+    print(f"\n{'symbol':<12} {'global rmse':>12} {'mape':>8} {'per-symbol rmse':>16} {'mape':>8}")
+    for result in results:
+        own = result['per_symbol']
+        line = f"{result['symbol']:<12} {result['global']['rmse']:>12.2f} {result['global']['mape']:>7.2f}%"
+        if own is None:
+            line += f" {'not trained':>16}"
+        elif 'stale' in own:
+            line += f" {'stale':>16}"
+        else:
+            line += f" {own['rmse']:>16.2f} {own['mape']:>7.2f}%"
+        print(line)
+
+    compared = [r for r in results if r['per_symbol'] and 'stale' not in r['per_symbol']]
+    summary = {
+        'symbols': len(results),
+        'train_seconds': train_seconds,
+        'batched_next_day_ms': batched_ms,
+        'global_parameters': model.model.count_params(),
+        'global_model_bytes': os.path.getsize(model_path),
+        'per_symbol_parameters': sum(r['per_symbol']['parameters'] for r in compared),
+        'per_symbol_model_bytes': sum(r['per_symbol']['model_bytes'] for r in compared),
+        'global_better': sum(r['global']['rmse'] < r['per_symbol']['rmse'] for r in compared),
+        'compared': len(compared),
+        'stale': sum(1 for r in results if r['per_symbol'] and 'stale' in r['per_symbol'])
+    }
+    print(f"\nNext-day prediction for {len(results)} symbol(s) in one pass: {batched_ms:.1f} ms")
+    print(f"Global model: {summary['global_parameters']:,} parameters, {summary['global_model_bytes']:,} bytes")
+    if compared:
+        print(f"Per-symbol models ({len(compared)}): {summary['per_symbol_parameters']:,} parameters, "
+              f"{summary['per_symbol_model_bytes']:,} bytes")
+        print(f"Global model has the lower RMSE on {summary['global_better']} of {len(compared)} symbol(s)")
+    if summary['stale']:
+        print(f"{summary['stale']} per-symbol model(s) are stale; retrain them with batch_train.py "
+              f"on the same data to compare them")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'summary': summary, 'symbols': results}, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -102,6 +102,26 @@ const StockDashboard = () => {
     fetchAllData();
   }, []);
 
+  // Live updates pushed by the backend when new bars arrive
+  useEffect(() => {
+    const source = new EventSource("http://localhost:5000/api/stream");
+
+    source.addEventListener("metrics", (event) => {
+      setMarketMetrics(JSON.parse(event.data));
+    });
+    source.addEventListener("signal", (event) => {
+      const signal = JSON.parse(event.data);
+      setTradingSignals((signals) => [...signals, signal]);
+    });
+    source.addEventListener("prediction", (event) => {
+      const data = JSON.parse(event.data);
+      setPrediction(data.prediction);
+      setWeeklyPredictions(data.weekly_predictions ?? []);
+    });
+
+    return () => source.close();
+  }, []);
+
   // Fetch Functions
   const fetchAllData = async () => {
     setLoading(true);
@@ -218,16 +238,17 @@ const StockDashboard = () => {
         body: JSON.stringify({ prices: priceData }),
       });
 
-      if (!dailyResponse.ok || !weeklyResponse.ok) throw new Error("HTTP error!");
+      if (!dailyResponse.ok) throw new Error("HTTP error!");
 
       const [dailyData, weeklyData] = await Promise.all([
         dailyResponse.json(),
         weeklyResponse.json()
       ]);
 
-      if (dailyData.status === "success" && weeklyData.status === "success") {
+      if (dailyData.status === "success") {
         setPrediction(dailyData.prediction);
-        setWeeklyPredictions(weeklyData.weekly_predictions);
+        // The global model serves next-day predictions only
+        setWeeklyPredictions(weeklyData.status === "success" ? weeklyData.weekly_predictions : []);
         setTrendAnalysis(dailyData.trend_analysis);
         setSupportResistance(dailyData.support_resistance);
       }
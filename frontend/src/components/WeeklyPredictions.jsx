@@ -23,7 +23,8 @@ const WeeklyPredictionCard = ({ predictions, lastClose }) => {
       day: "numeric",
     }),
     price: pred.price,
-    confidence: pred.confidence * 100,
+    // No confidence without Monte Carlo samples (e.g. a quantized model)
+    confidence: pred.confidence == null ? null : pred.confidence * 100,
   }));
 
   return (
@@ -162,7 +163,10 @@ const WeeklyPredictionCard = ({ predictions, lastClose }) => {
                       </span>
                     </div>
                     <p className="text-sm text-gray-600 mt-1">
-                      Confidence: {(pred.confidence * 100).toFixed(0)}%
+                      Confidence:{" "}
+                      {pred.confidence == null
+                        ? "n/a"
+                        : `${(pred.confidence * 100).toFixed(0)}%`}
                     </p>
                   </div>
                 </div>